@@ -5,6 +5,10 @@ class TradingConfig:
     LOT_SIZE = 25
     NUM_LOTS = 40
     
+    # Session parameters
+    TRADING_END_TIME = "15:30"
+    EVENT_QUEUE_SIZE = 64
+    
     # Adaptive parameters
     VOL_REGIME_THRESHOLDS = {
         "low": 0.15,
@@ -24,6 +28,15 @@ class TradingConfig:
         "GAMMA": -2000,
         "VEGA": 30000
     }
+    # Incremental greeks: reprice a position only past these moves
+    GREEKS_PRICE_TOLERANCE = 0.0005  # relative underlying move
+    GREEKS_IV_TOLERANCE = 0.0025  # absolute IV move
+    GREEKS_TIME_BUCKET = 1 / (365 * 24)  # years (1 hour)
+    
+    # Dashboard
+    DASHBOARD_STATE_PATH = "dashboard.state"  # memory-mapped latest snapshot
+    DASHBOARD_FPS = 2  # streaming dashboard frames per second
+    DASHBOARD_ROLLOVER = 10_000  # equity points kept in the streaming chart
     
     # Backtesting
     STRESS_SCENARIOS = [
@@ -4,6 +4,8 @@ from src.risk.risk_manager import InstitutionalRiskManager
 from src.strategy.core_strategy import AdaptiveIronCondor
 from src.portfolio.optimizer import PortfolioOptimizer
 from src.utils.dashboard import RiskDashboard
+import asyncio
+import datetime
 import time
 
 class HedgeFundTradingSystem:
@@ -53,6 +55,76 @@ class HedgeFundTradingSystem:
             except Exception as e:
                 self.handle_error(e)
     
+    async def run_async(self, tick_source):
+        # Event-driven session: each tick batch wakes the pipeline instead of a fixed sleep.
+        # Market, strategy and execution stages are tasks joined by bounded queues;
+        # blocking broker/data calls run in worker threads.
+        self.data_fetcher.connect()
+        self.dashboard.start()
+        queue_size = getattr(self.config, 'EVENT_QUEUE_SIZE', 64)
+        state_queue = asyncio.Queue(maxsize=1)
+        trade_queue = asyncio.Queue(maxsize=queue_size)
+        stop = object()
+        
+        async def market_task():
+            async for ticks in tick_source:
+                if hasattr(self.data_fetcher, 'apply_ticks'):
+                    self.data_fetcher.apply_ticks(ticks)
+                # Only the latest state matters; drop a stale one still waiting
+                if state_queue.full():
+                    state_queue.get_nowait()
+                state_queue.put_nowait(ticks)
+        
+        async def strategy_task():
+            while True:
+                item = await state_queue.get()
+                if item is stop:
+                    await trade_queue.put(stop)
+                    return
+                try:
+                    market_data = await asyncio.to_thread(self.data_fetcher.get_full_market_state)
+                    if not self.risk_manager.approve_trading():
+                        continue
+                    for trade in self.strategy.generate_trades(market_data):
+                        await trade_queue.put(trade)
+                except Exception as e:
+                    # handle_error blocks for its cool-off; keep it off the event loop
+                    await asyncio.to_thread(self.handle_error, e)
+        
+        async def execution_task():
+            while True:
+                trade = await trade_queue.get()
+                if trade is stop:
+                    return
+                try:
+                    execution_plan = self.order_executor.route_order(trade)
+                    await asyncio.to_thread(self.order_executor.execute, execution_plan)
+                    if self.portfolio.needs_rebalance():
+                        rebalance_orders = self.portfolio.create_rebalance_plan()
+                        await asyncio.to_thread(self.order_executor.execute_batch, rebalance_orders)
+                    self.dashboard.update()
+                except Exception as e:
+                    # handle_error blocks for its cool-off; keep it off the event loop
+                    await asyncio.to_thread(self.handle_error, e)
+        
+        async def session_clock():
+            end_time = datetime.datetime.strptime(
+                getattr(self.config, 'TRADING_END_TIME', '15:30'), '%H:%M').time()
+            now = datetime.datetime.now()
+            end = datetime.datetime.combine(now.date(), end_time)
+            await asyncio.sleep(max(0.0, (end - now).total_seconds()))
+        
+        market = asyncio.create_task(market_task())
+        clock = asyncio.create_task(session_clock())
+        workers = [asyncio.create_task(strategy_task()), asyncio.create_task(execution_task())]
+        await asyncio.wait([market, clock], return_when=asyncio.FIRST_COMPLETED)
+        market.cancel()
+        clock.cancel()
+        await asyncio.gather(market, clock, return_exceptions=True)
+        # Drain in order: strategy -> execution
+        await state_queue.put(stop)
+        await asyncio.gather(*workers)
+    
     def handle_error(self, exception):
         # Sophisticated error handling
         self.risk_manager.emergency_protocol()
@@ -0,0 +1,463 @@
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.backtest.monte_carlo import MonteCarloBacktester
+from src.data.option_chain import OptionChain
+from src.data.volatility_surface import VolatilitySurface
+from src.portfolio.optimizer import PortfolioOptimizer
+from src.pricing import black_scholes
+from src.risk.stress_tester import StressTester
+from src.utils import bench_report
+from src.utils.dashboard_stream import DashboardStream
+from src.utils.fake_portfolio_manager import FakePortfolioManager
+
+
+class ShortVolStrategy:
+    # Toy short-premium strategy: collects carry scaled by volatility, loses on large moves
+    def __init__(self, volatility=0.2, carry=0.002, convexity=4.0):
+        self.volatility = volatility
+        self.carry = carry
+        self.convexity = convexity
+
+    def update_volatility(self, volatility):
+        self.volatility = volatility
+
+    def execute(self, market_return):
+        return self.carry * self.volatility / 0.2 - self.convexity * market_return ** 2
+
+
+class VectorizedShortVolStrategy(ShortVolStrategy):
+    def execute_vectorized(self, market_returns, volatility):
+        return self.carry * volatility / 0.2 - self.convexity * market_returns ** 2
+
+
+def benchmark_monte_carlo(path_counts=(1_000, 10_000, 100_000), periods=252, scalar_paths=200):
+    results = []
+    start = time.perf_counter()
+    MonteCarloBacktester(ShortVolStrategy(), scalar_paths, seed=0).run(1.0, periods)
+    scalar_rate = scalar_paths / (time.perf_counter() - start)
+    for n in path_counts:
+        backtester = MonteCarloBacktester(VectorizedShortVolStrategy(), n, seed=0)
+        start = time.perf_counter()
+        metrics = backtester.run(1.0, periods)
+        elapsed = time.perf_counter() - start
+        results.append({
+            'paths': n,
+            'seconds': elapsed,
+            'paths_per_sec': n / elapsed,
+            'speedup_vs_scalar': (n / elapsed) / scalar_rate,
+            'var_95': metrics['var_95'],
+            'cvar_95': metrics['cvar_95'],
+        })
+    return scalar_rate, results
+
+
+def benchmark_monte_carlo_workers(n_paths=200_000, worker_counts=(1, 2, 4), periods=252):
+    # Sharded runs must match the single-process result bit for bit
+    reference = None
+    results = []
+    for workers in worker_counts:
+        backtester = MonteCarloBacktester(VectorizedShortVolStrategy(), n_paths, seed=0, workers=workers)
+        start = time.perf_counter()
+        metrics = backtester.run(1.0, periods, keep_paths=False)
+        elapsed = time.perf_counter() - start
+        key = (metrics['mean_return'], metrics['volatility'], metrics['var_95'], metrics['cvar_95'])
+        reference = reference or key
+        results.append({
+            'workers': workers,
+            'seconds': elapsed,
+            'paths_per_sec': n_paths / elapsed,
+            'identical': key == reference,
+        })
+    return results
+
+
+def make_synthetic_positions(n, underlying_price=48000.0, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        'symbol': np.array([f'OPT{i}' for i in range(n)]),
+        'option_type': rng.choice(np.array(['call', 'put']), n),
+        'underlying_price': np.full(n, underlying_price),
+        'strike': np.round(underlying_price * rng.uniform(0.8, 1.2, n), -2),
+        't': rng.uniform(1, 60, n) / 365,
+        'iv': rng.uniform(0.1, 0.4, n),
+        'qty': rng.choice(np.array([-50, -25, 25, 50]), n),
+    }
+
+
+def check_black_scholes(n=100_000, seed=0):
+    # Max abs error of the NumPy kernels against scipy, plus per-call timings
+    from scipy.special import ndtr
+    from scipy.stats import norm
+    rng = np.random.default_rng(seed)
+    S = 48000.0
+    K = S * rng.uniform(0.7, 1.3, n)
+    T = rng.uniform(1, 365, n) / 365
+    sigma = rng.uniform(0.05, 0.8, n)
+    r = 0.05
+    is_call = rng.random(n) < 0.5
+    d1 = (np.log(S / K) + (r + 0.5 * sigma ** 2) * T) / (sigma * np.sqrt(T))
+    d2 = d1 - sigma * np.sqrt(T)
+    ref_price = np.where(is_call, S * norm.cdf(d1) - K * np.exp(-r * T) * norm.cdf(d2),
+                         K * np.exp(-r * T) * norm.cdf(-d2) - S * norm.cdf(-d1))
+    ref_delta = np.where(is_call, norm.cdf(d1), norm.cdf(d1) - 1)
+    x = np.linspace(-38, 9, n)
+    prices = black_scholes.price(is_call, S, K, T, r, sigma)
+    iv = black_scholes.implied_volatility(prices, is_call, S, K, T, r)
+    identifiable = black_scholes.vega(S, K, T, r, sigma) > 0.01
+    errors = {
+        'cdf': np.max(np.abs(black_scholes.norm_cdf(x) - ndtr(x))),
+        'price': np.max(np.abs(prices - ref_price)),
+        'delta': np.max(np.abs(black_scholes.delta(is_call, S, K, T, r, sigma) - ref_delta)),
+        'gamma': np.max(np.abs(black_scholes.gamma(S, K, T, r, sigma) - norm.pdf(d1) / (S * sigma * np.sqrt(T)))),
+        'vega': np.max(np.abs(black_scholes.vega(S, K, T, r, sigma) - S * norm.pdf(d1) * np.sqrt(T) / 100)),
+        'iv': np.nanmax(np.abs(iv - sigma)[identifiable]),
+    }
+    timings_us = {}
+    for name, fn in (
+        ('norm_cdf', lambda: black_scholes.norm_cdf(d1)),
+        ('scipy_ndtr', lambda: ndtr(d1)),
+        ('price', lambda: black_scholes.price(is_call, S, K, T, r, sigma)),
+        ('greeks', lambda: black_scholes.greeks(is_call, S, K, T, r, sigma)),
+        ('implied_volatility', lambda: black_scholes.implied_volatility(prices, is_call, S, K, T, r)),
+    ):
+        best = float('inf')
+        for _ in range(5):
+            start = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - start)
+        timings_us[name] = best * 1e6
+    return errors, timings_us
+
+
+def make_synthetic_chain(underlying_price=48000.0, strike_step=100.0, width=0.3,
+                         expiries=(3, 10, 17, 24, 31, 59, 90), r=0.03):
+    # Multi-expiry chain records priced under a quadratic smile with a term slope
+    strikes = np.arange(underlying_price * (1 - width / 2), underlying_price * (1 + width / 2), strike_step).round(-2)
+    records = []
+    for dte in expiries:
+        moneyness = np.log(strikes / underlying_price)
+        iv = 0.15 + 0.5 * moneyness ** 2 - 0.1 * moneyness + 0.001 * dte
+        for option_type in ('CE', 'PE'):
+            ltp = black_scholes.price(option_type, underlying_price, strikes, dte / 365, r, iv)
+            records.extend({'Strike': k, 'OptionType': option_type, 'DaysToExpiry': float(dte), 'LTP': p}
+                           for k, p in zip(strikes.tolist(), ltp.tolist()))
+    return records
+
+
+def benchmark_vol_surface(n_queries=100_000, changed_fraction=0.01, underlying_price=48000.0):
+    # Full build (IV solve + grid) vs incremental update after a few quotes move, and batched queries
+    chain = OptionChain(make_synthetic_chain(underlying_price))
+    start = time.perf_counter()
+    surface = VolatilitySurface(chain, underlying_price)
+    build = time.perf_counter() - start
+
+    rng = np.random.default_rng(0)
+    rows = rng.choice(len(chain), max(1, int(len(chain) * changed_fraction)), replace=False)
+    chain.ltp[rows] *= 1.02
+    chain.solve_iv(underlying_price)
+    start = time.perf_counter()
+    surface.update(chain)
+    update = time.perf_counter() - start
+    start = time.perf_counter()
+    VolatilitySurface(chain, underlying_price)
+    rebuild = time.perf_counter() - start
+
+    strikes = rng.uniform(surface.strikes[0], surface.strikes[-1], n_queries)
+    dtes = rng.uniform(surface.expiries[0], surface.expiries[-1], n_queries)
+    start = time.perf_counter()
+    surface.get_volatility(strikes, dtes)
+    query = time.perf_counter() - start
+    return {
+        'options': len(chain),
+        'build_ms': build * 1e3,
+        'update_ms': update * 1e3,
+        'rebuild_ms': rebuild * 1e3,
+        'rows_changed': surface.stats['rows_changed'],
+        'queries_per_sec': n_queries / query,
+    }
+
+
+def benchmark_stress(n_rows=2_000, n_positions=200, n_symbols=100, seed=0):
+    # iterrows x positions loop (the original historical_scenario, applying each row's move
+    # since the symbol's first close to the position's price) against the vectorized join
+    rng = np.random.default_rng(seed)
+    symbols = np.array([f'SYM{i}' for i in range(n_symbols)])
+    scenario = pd.DataFrame({'symbol': rng.choice(symbols, n_rows), 'close': rng.uniform(50, 150, n_rows)})
+    portfolio = [{'symbol': s, 'qty': float(q), 'entry_price': 100.0}
+                 for s, q in zip(rng.choice(symbols, n_positions), rng.integers(-10, 10, n_positions))]
+    start = time.perf_counter()
+    reference = 0.0
+    first_close = {}
+    for _, row in scenario.iterrows():
+        first = first_close.setdefault(row['symbol'], row['close'])
+        for position in portfolio:
+            if position['symbol'] == row['symbol']:
+                spot = position['entry_price']
+                reference += position['qty'] * (spot * row['close'] / first - position['entry_price'])
+    loop_seconds = time.perf_counter() - start
+    with tempfile.TemporaryDirectory() as tmp:
+        scenario.to_csv(os.path.join(tmp, 'bench.csv'), index=False)
+        tester = StressTester(portfolio, scenario_dir=tmp)
+        tester.load_scenarios(['bench'])
+        start = time.perf_counter()
+        pnl = tester.historical_scenario('bench')
+        vector_seconds = time.perf_counter() - start
+    return {
+        'rows': n_rows,
+        'positions': n_positions,
+        'loop_ms': loop_seconds * 1e3,
+        'vectorized_ms': vector_seconds * 1e3,
+        'match': bool(np.isclose(pnl, reference)),
+    }
+
+
+def benchmark_var(iteration_counts=(10_000, 100_000, 1_000_000), n_options=100, underlying_price=48000.0):
+    # The original monte_carlo_var (10,000 scalar norm.rvs draws into a sorted list, no book)
+    # against the correlated engine repricing a short strangle book every iteration
+    from scipy.stats import norm
+    start = time.perf_counter()
+    returns = [norm.rvs(loc=0, scale=0.02) for _ in range(10000)]
+    losses = sorted(-x for x in returns if x < 0)
+    losses[int(len(losses) * 0.01)]
+    legacy_seconds = time.perf_counter() - start
+
+    book = [{'symbol': f'OPT{i}', 'underlying': 'NIFTY', 'option_type': 'call' if i % 2 else 'put',
+             'strike': underlying_price + 100 * (i - n_options // 2), 't': 20 / 365, 'iv': 0.15,
+             'qty': -25.0, 'underlying_price': underlying_price} for i in range(n_options)]
+    tester = StressTester(book)
+    results = []
+    for n in iteration_counts:
+        start = time.perf_counter()
+        risk = tester.monte_carlo_risk(n, 0.99, covariance=[[0.012 ** 2]], assets=['NIFTY'], seed=0)
+        elapsed = time.perf_counter() - start
+        results.append({
+            'iterations': n,
+            'seconds': elapsed,
+            'repricings_per_sec': n * n_options / elapsed,
+            'var': risk['var'],
+            'cvar': risk['cvar'],
+        })
+    return legacy_seconds, results
+
+
+def benchmark_greeks(position_counts=(10, 1_000, 100_000), scalar_limit=1_000):
+    # Per-position library calls (the old loop) against one batched call over the book
+    from src.risk.greeks_calculator import GreeksCalculator
+    calculator = GreeksCalculator()
+    results = []
+    for n in position_counts:
+        columns = make_synthetic_positions(n)
+        positions = pd.DataFrame(columns).to_dict('records')
+        sample = positions[:min(n, scalar_limit)]
+        start = time.perf_counter()
+        for pos in sample:
+            calculator.calculate_all_greeks([pos])
+        scalar_rate = len(sample) / (time.perf_counter() - start)
+        start = time.perf_counter()
+        totals = calculator.portfolio_greeks(positions)
+        elapsed = time.perf_counter() - start
+        results.append({
+            'positions': n,
+            'seconds': elapsed,
+            'positions_per_sec': n / elapsed,
+            'speedup_vs_scalar': (n / elapsed) / scalar_rate,
+            'delta': totals['delta'],
+        })
+    return results
+
+
+def benchmark_greeks_book(n_positions=100_000, ticks=20, tick_move=0.0001):
+    # Full recompute on every tick against the incremental book under small price moves
+    from src.risk.greeks_calculator import GreeksCalculator, GreeksBook
+    calculator = GreeksCalculator()
+    book = GreeksBook(calculator)
+    positions = pd.DataFrame(make_synthetic_positions(n_positions))
+    book.update(positions)
+    rng = np.random.default_rng(1)
+    full_seconds = book_seconds = 0.0
+    for _ in range(ticks):
+        positions['underlying_price'] *= 1 + rng.normal(0, tick_move)
+        start = time.perf_counter()
+        calculator.portfolio_greeks(positions)
+        full_seconds += time.perf_counter() - start
+        start = time.perf_counter()
+        book.update(positions)
+        book_seconds += time.perf_counter() - start
+    return {
+        'positions': n_positions,
+        'full_ms_per_tick': full_seconds / ticks * 1e3,
+        'book_ms_per_tick': book_seconds / ticks * 1e3,
+        'skip_ratio': book.skip_ratio(),
+    }
+
+
+def benchmark_dashboard(history_lengths=(1_000, 100_000, 500_000), frames=20, ticks_per_frame=5):
+    # Data work per dashboard frame: the full re-render reads (whole equity history,
+    # exposure, greeks, VaR/CVaR) against one streaming poll that fetches only new points
+    rows = []
+    for history in history_lengths:
+        pm = FakePortfolioManager(history=history, seed=0)
+        stream = DashboardStream(pm, fps=0)
+        stream.poll()
+        full_seconds = stream_seconds = 0.0
+        for _ in range(frames):
+            pm.step(ticks_per_frame)
+            start = time.perf_counter()
+            pm.current_greeks()
+            pm.get_exposure_report()
+            pm.value_at_risk(confidence=0.95)
+            pm.conditional_var(confidence=0.95)
+            pm.get_performance_history()
+            full_seconds += time.perf_counter() - start
+            start = time.perf_counter()
+            stream.poll()
+            stream_seconds += time.perf_counter() - start
+        rows.append({
+            'history': history,
+            'full_ms_per_frame': full_seconds / frames * 1e3,
+            'stream_ms_per_frame': stream_seconds / frames * 1e3,
+            'points_per_frame': (stream.stats['points'] - history - 1) / frames,
+        })
+    # Throttling: 1,000 update() calls over a simulated second at 2 fps
+    clock = [0.0]
+    throttled = DashboardStream(FakePortfolioManager(seed=0), fps=2, clock=lambda: clock[0])
+    for i in range(1_000):
+        clock[0] = i / 1_000
+        throttled.poll()
+    return rows, throttled.stats
+
+
+def benchmark_optimizer(strategy_counts=(5, 20, 50), target_return=0.15, seed=0):
+    # SLSQP mean-CVaR weights for books of synthetic strategies with random correlations
+    rng = np.random.default_rng(seed)
+    results = []
+    for n in strategy_counts:
+        strategies = [SimpleNamespace(expected_return=r) for r in rng.uniform(0.05, 0.30, n)]
+        factors = rng.normal(size=(n, 3))
+        cov = factors @ factors.T + np.eye(n)
+        scale = np.sqrt(np.diag(cov))
+        optimizer = PortfolioOptimizer(strategies, cov / np.outer(scale, scale))
+        start = time.perf_counter()
+        weights = optimizer.mean_cvar_optimization(target_return)
+        elapsed = time.perf_counter() - start
+        returns = np.array([s.expected_return for s in strategies])
+        results.append({
+            'strategies': n,
+            'seconds': elapsed,
+            'weight_sum_error': abs(weights.sum() - 1),
+            'target_error': abs(weights @ returns - target_return),
+        })
+    return results
+
+
+def _print_monte_carlo(result):
+    print(f"Monte Carlo (252 periods) scalar fallback: {result['scalar_paths_per_sec']:,.0f} paths/sec")
+    for row in result['batched']:
+        print(f"{row['paths']:>9,} paths  {row['seconds']:8.3f}s  {row['paths_per_sec']:>12,.0f} paths/sec  "
+              f"{row['speedup_vs_scalar']:7.1f}x  VaR95={row['var_95']:.4f} CVaR95={row['cvar_95']:.4f}")
+
+
+def _print_monte_carlo_workers(rows):
+    for row in rows:
+        print(f"workers={row['workers']:<3} {row['seconds']:8.3f}s  {row['paths_per_sec']:>12,.0f} paths/sec  "
+              f"identical={row['identical']}")
+
+
+def _print_greeks(rows):
+    for row in rows:
+        print(f"greeks {row['positions']:>9,} positions  {row['seconds']:8.4f}s  "
+              f"{row['positions_per_sec']:>12,.0f} positions/sec  {row['speedup_vs_scalar']:7.1f}x")
+
+
+def _print_greeks_book(row):
+    print(f"greeks book {row['positions']:,} positions: full {row['full_ms_per_tick']:.1f} ms/tick, "
+          f"incremental {row['book_ms_per_tick']:.1f} ms/tick, skipped {row['skip_ratio']:.1%}")
+
+
+def _print_black_scholes(result):
+    print("black_scholes max abs error vs scipy: " + ", ".join(
+        f"{k[:-len('_error')]}={v:.2e}" for k, v in result['errors'].items()))
+    print("black_scholes 100k options: " + ", ".join(
+        f"{k[:-len('_us')]}={v / 1e3:.1f}ms" for k, v in result['timings'].items()))
+
+
+def _print_vol_surface(row):
+    print(f"vol surface {row['options']:,} options: build {row['build_ms']:.2f}ms, "
+          f"update ({row['rows_changed']} rows) {row['update_ms']:.2f}ms, rebuild {row['rebuild_ms']:.2f}ms, "
+          f"{row['queries_per_sec']:,.0f} queries/sec")
+
+
+def _print_stress(row):
+    print(f"stress {row['rows']:,} rows x {row['positions']} positions: loop {row['loop_ms']:.1f}ms, "
+          f"vectorized {row['vectorized_ms']:.2f}ms, match={row['match']}")
+
+
+def _print_var(result):
+    print(f"MC VaR legacy (10,000 draws, no book): {result['legacy_ms']:.1f}ms")
+    for row in result['book']:
+        print(f"MC VaR {row['iterations']:>9,} iterations  {row['seconds']:7.3f}s  "
+              f"{row['repricings_per_sec']:,.0f} repricings/sec  VaR99={row['var']:,.0f} CVaR99={row['cvar']:,.0f}")
+
+
+def _print_dashboard(result):
+    for row in result['frames']:
+        print(f"dashboard {row['history']:>7,} equity points: full reads {row['full_ms_per_frame']:.2f} ms/frame, "
+              f"stream {row['stream_ms_per_frame']:.2f} ms/frame ({row['points_per_frame']:.0f} new points)")
+    stats = result['throttle']
+    print(f"dashboard throttle at 2 fps: {stats['polls']} updates -> {stats['frames']} frames")
+
+
+def _print_optimizer(rows):
+    for row in rows:
+        print(f"optimizer {row['strategies']:>3} strategies  {row['seconds'] * 1e3:8.1f}ms  "
+              f"weight sum error {row['weight_sum_error']:.1e}  target error {row['target_error']:.1e}")
+
+
+def _monte_carlo():
+    scalar_rate, rows = benchmark_monte_carlo()
+    return {'scalar_paths_per_sec': scalar_rate, 'batched': rows}
+
+
+def _black_scholes():
+    # Unit suffixes let bench_report tell errors and timings from informational values
+    errors, timings_us = check_black_scholes()
+    return {'errors': {f'{k}_error': v for k, v in errors.items()},
+            'timings': {f'{k}_us': v for k, v in timings_us.items()}}
+
+
+def _var():
+    legacy_seconds, rows = benchmark_var()
+    return {'legacy_ms': legacy_seconds * 1e3, 'book': rows}
+
+
+def _dashboard():
+    rows, stats = benchmark_dashboard()
+    return {'frames': rows, 'throttle': stats}
+
+
+# Offline suite: synthetic paths, books, chains and equity histories; fixed seeds throughout
+SUITE = [
+    ('monte_carlo', _monte_carlo, _print_monte_carlo),
+    ('monte_carlo_workers', benchmark_monte_carlo_workers, _print_monte_carlo_workers),
+    ('greeks', benchmark_greeks, _print_greeks),
+    ('greeks_book', benchmark_greeks_book, _print_greeks_book),
+    ('black_scholes', _black_scholes, _print_black_scholes),
+    ('vol_surface', benchmark_vol_surface, _print_vol_surface),
+    ('stress', benchmark_stress, _print_stress),
+    ('var', _var, _print_var),
+    ('dashboard', _dashboard, _print_dashboard),
+    ('optimizer', benchmark_optimizer, _print_optimizer),
+]
+
+
+if __name__ == '__main__':
+    sys.exit(bench_report.main(SUITE, description='Offline benchmarks for the Advanced_Version hot paths'))
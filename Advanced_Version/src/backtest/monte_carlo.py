@@ -1,47 +1,102 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
 import numpy as np
-from scipy.stats import norm
 
 class MonteCarloBacktester:
-    def __init__(self, strategy, n_simulations=1000):
+    def __init__(self, strategy, n_simulations=1000, seed=None, chunk_size=10_000, workers=1):
         self.strategy = strategy
         self.n_simulations = n_simulations
+        self.seed = seed
+        # Paths are simulated chunk by chunk so memory stays at chunk_size x periods
+        self.chunk_size = chunk_size
+        # Chunks are spread over a process pool when workers > 1
+        self.workers = workers
+
+    def run(self, initial_capital, periods=252, keep_paths=True):
+        # Every chunk is a shard with its own SeedSequence child stream, and shard summaries
+        # are merged in shard order, so output depends only on (seed, chunk_size) and is
+        # bit-identical for any worker count. keep_paths=False streams only the moments
+        # and the VaR tail back from each shard (final_capital is then None).
+        n_chunks = -(-self.n_simulations // self.chunk_size)
+        seeds = np.random.SeedSequence(self.seed).spawn(n_chunks)
+        sizes = [min(self.chunk_size, self.n_simulations - i * self.chunk_size) for i in range(n_chunks)]
+        tail_size = int(0.05 * self.n_simulations) + 1
+        args = (repeat(self.strategy), seeds, sizes, repeat(periods), repeat(tail_size), repeat(keep_paths))
+
+        if self.workers > 1 and n_chunks > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                return self._merge(pool.map(_chunk_summary, *args), initial_capital, keep_paths)
+        return self._merge(map(_chunk_summary, *args), initial_capital, keep_paths)
+
+    def _merge(self, summaries, initial_capital, keep_paths):
+        count, mean_return, m2 = 0, 0.0, 0.0
+        tail = np.empty(0)
+        paths = []
+        k = int(0.05 * self.n_simulations)
+        for n, chunk_mean, chunk_m2, chunk_tail, chunk_returns in summaries:
+            # Pairwise (Chan et al.) update of mean and sum of squared deviations
+            if count == 0:
+                count, mean_return, m2 = n, chunk_mean, chunk_m2
+            else:
+                total = count + n
+                delta = chunk_mean - mean_return
+                mean_return = mean_return + delta * n / total
+                m2 = m2 + chunk_m2 + delta * delta * count * n / total
+                count = total
+            tail = np.sort(np.concatenate((tail, chunk_tail)))[:k + 1]
+            if keep_paths:
+                paths.append(chunk_returns)
 
-    def run(self, initial_capital, periods=252):
-        results = []
-        for _ in range(self.n_simulations):
-            capital = initial_capital
-            for _ in range(periods):
-                # Simulate market conditions
-                market_return = norm.rvs(loc=0.0003, scale=0.015)
-                volatility_change = norm.rvs(loc=0, scale=0.05)
-
-                # Update strategy parameters (fixed missing “)” below)
-                self.strategy.update_volatility(
-                    self.strategy.volatility * (1 + volatility_change)
-                )
-
-                # Execute strategy
-                pnl = self.strategy.execute(market_return)
-                capital = capital * (1 + pnl)
-
-            results.append(capital)
-
-        # Calculate risk metrics
-        returns = np.log(np.array(results) / initial_capital)
-        mean_return = np.mean(returns)
-        volatility = np.std(returns)
+        volatility = np.sqrt(m2 / count)
         sharpe = mean_return / volatility if volatility != 0 else 0
 
-        # Calculate VaR and CVaR
-        sorted_returns = np.sort(returns)
-        var_95 = sorted_returns[int(0.05 * len(sorted_returns))]
-        cvar_95 = np.mean(sorted_returns[:int(0.05 * len(sorted_returns))])
+        # Calculate VaR and CVaR from the 5% tail
+        var_95 = tail[k]
+        cvar_95 = np.mean(tail[:k])
 
         return {
-            'final_capital': results,
+            'final_capital': initial_capital * np.exp(np.concatenate(paths)) if keep_paths else None,
             'mean_return'  : mean_return,
             'volatility'   : volatility,
             'sharpe'       : sharpe,
             'var_95'       : var_95,
             'cvar_95'      : cvar_95
         }
+
+def _chunk_summary(strategy, chunk_seed, n_paths, periods, tail_size, keep_paths):
+    # Runs one shard and reduces it to (count, mean, M2, smallest returns, returns)
+    returns = _simulate_chunk(strategy, chunk_seed, n_paths, periods)
+    mean = returns.mean()
+    m2 = np.square(returns - mean).sum()
+    if tail_size < n_paths:
+        tail = np.sort(np.partition(returns, tail_size - 1)[:tail_size])
+    else:
+        tail = np.sort(returns)
+    return n_paths, mean, m2, tail, returns if keep_paths else None
+
+def _simulate_chunk(strategy, chunk_seed, n_paths, periods):
+    # Returns log(final_capital / initial_capital) for n_paths paths
+    rng = np.random.default_rng(chunk_seed)
+    market_returns = rng.normal(loc=0.0003, scale=0.015, size=(n_paths, periods))
+    volatility_changes = rng.normal(loc=0, scale=0.05, size=(n_paths, periods))
+
+    if hasattr(strategy, 'execute_vectorized'):
+        # Volatility path per simulation, starting from the strategy's current level
+        volatility = strategy.volatility * np.cumprod(1 + volatility_changes, axis=1)
+        pnl = strategy.execute_vectorized(market_returns, volatility)
+        return np.log1p(pnl).sum(axis=1)
+
+    # Strategies without a vectorized path are stepped one period at a time
+    initial_volatility = strategy.volatility
+    log_growth = np.zeros(n_paths)
+    for p in range(n_paths):
+        strategy.update_volatility(initial_volatility)
+        for t in range(periods):
+            strategy.update_volatility(
+                strategy.volatility * (1 + volatility_changes[p, t])
+            )
+            pnl = strategy.execute(market_returns[p, t])
+            log_growth[p] += np.log1p(pnl)
+    strategy.update_volatility(initial_volatility)
+    return log_growth
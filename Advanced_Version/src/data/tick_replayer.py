@@ -0,0 +1,29 @@
+import asyncio
+import csv
+
+class ReplayTickSource:
+    """
+    Replays locally stored tick batches for offline runs of the asyncio runtime.
+    batches: iterable of lists of tick dicts; delay: seconds between batches.
+    """
+    def __init__(self, batches, delay=0.0):
+        self.batches = batches
+        self.delay = delay
+
+    @classmethod
+    def from_csv(cls, path, delay=0.0):
+        # Consecutive rows sharing a Datetime form one batch
+        batches = []
+        current_dt = None
+        with open(path, newline='') as f:
+            for row in csv.DictReader(f):
+                if row['Datetime'] != current_dt:
+                    batches.append([])
+                    current_dt = row['Datetime']
+                batches[-1].append(row)
+        return cls(batches, delay)
+
+    async def __aiter__(self):
+        for batch in self.batches:
+            yield batch
+            await asyncio.sleep(self.delay)
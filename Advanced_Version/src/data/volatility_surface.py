@@ -1,37 +1,128 @@
 import numpy as np
-from scipy.interpolate import griddata
+from src.data.option_chain import OptionChain
 
 class VolatilitySurface:
-    def __init__(self, option_chain):
-        self.surface = self._build_surface(option_chain)
-    
+    # IV surface on the chain's own (strike, days_to_expiry) grid.
+    # Each node holds the mean IV of the quotes listed there (only out-of-the-money quotes
+    # when underlying_price is known, as ITM IVs are poorly determined); nodes without a quote are
+    # filled by linear interpolation along the strike axis of their expiry (and across
+    # expiries when an expiry has no quotes at all). Queries are bilinear on the grid,
+    # located with searchsorted, and clamp to the edge nodes outside the grid.
+    def __init__(self, option_chain, underlying_price=None):
+        self.underlying_price = underlying_price
+        self.stats = {'rebuilds': 0, 'updates': 0, 'rows_changed': 0, 'expiries_refilled': 0}
+        self._build_surface(option_chain)
+
     def _build_surface(self, chain):
-        # Extract necessary data
-        strikes = np.array([opt['Strike'] for opt in chain])
-        expiries = np.array([opt['DaysToExpiry'] for opt in chain])
-        ivs = np.array([opt['ImpliedVol'] for opt in chain])
-        
-        # Create grid for interpolation
-        grid_x, grid_y = np.mgrid[
-            min(strikes):max(strikes):100j,
-            min(expiries):max(expiries):100j
-        ]
-        
-        # Interpolate volatility surface
-        return griddata(
-            (strikes, expiries), ivs, (grid_x, grid_y), method='cubic'
+        chain = OptionChain.from_records(chain)
+        if self.underlying_price is not None and np.isnan(chain.iv).all():
+            chain.solve_iv(self.underlying_price)
+        listed = np.isfinite(chain.days_to_expiry)
+        self.strikes = np.unique(chain.strike[listed])
+        self.expiries = np.unique(chain.days_to_expiry[listed])
+        used = listed
+        if self.underlying_price is not None:
+            used = listed & np.where(chain.is_call, chain.strike >= self.underlying_price,
+                                     chain.strike <= self.underlying_price)
+
+        # Grid node of every chain row (-1 for rows left out of the surface)
+        self._strike_idx = np.searchsorted(self.strikes, chain.strike)
+        self._expiry_idx = np.searchsorted(self.expiries, chain.days_to_expiry)
+        self._strike_idx[~used] = -1
+        self._expiry_idx[~used] = -1
+        self._row_strike = chain.strike.copy()
+        self._row_expiry = chain.days_to_expiry.copy()
+        self._row_iv = np.full(len(chain), np.nan)
+
+        shape = (len(self.strikes), len(self.expiries))
+        self._iv_sum = np.zeros(shape)
+        self._iv_count = np.zeros(shape, dtype=np.int64)
+        self.surface = np.full(shape, np.nan)
+        self._apply(np.flatnonzero(used), chain.iv)
+        self._refill(np.arange(len(self.expiries)))
+        self.stats['rebuilds'] += 1
+
+    def _apply(self, rows, ivs):
+        # Moves the given rows' contributions from their stored IVs to ivs[rows]
+        old = self._row_iv[rows]
+        new = ivs[rows]
+        i, j = self._strike_idx[rows], self._expiry_idx[rows]
+        had, has = np.isfinite(old), np.isfinite(new)
+        np.add.at(self._iv_sum, (i[had], j[had]), -old[had])
+        np.add.at(self._iv_count, (i[had], j[had]), -1)
+        np.add.at(self._iv_sum, (i[has], j[has]), new[has])
+        np.add.at(self._iv_count, (i[has], j[has]), 1)
+        self._row_iv[rows] = new
+        return np.unique(j)
+
+    def _refill(self, expiry_cols):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            nodes = self._iv_sum[:, expiry_cols] / self._iv_count[:, expiry_cols]
+        for c, j in enumerate(expiry_cols):
+            quoted = self._iv_count[:, j] > 0
+            if quoted.any():
+                self.surface[:, j] = np.interp(self.strikes, self.strikes[quoted], nodes[quoted, c])
+            else:
+                self.surface[:, j] = np.nan
+        # Expiries with no quotes borrow from their neighbours along the expiry axis
+        empty = self._iv_count.sum(axis=0) == 0
+        if empty.any() and not empty.all():
+            for i in range(len(self.strikes)):
+                self.surface[i, empty] = np.interp(
+                    self.expiries[empty], self.expiries[~empty], self.surface[i, ~empty])
+        self.stats['expiries_refilled'] += len(expiry_cols)
+
+    def update(self, option_chain):
+        # Incremental refresh from the same chain layout (e.g. the tick-patched chain after
+        # solve_iv): only rows whose IV changed are re-aggregated and only their expiries
+        # re-interpolated. A chain with different rows triggers a full rebuild.
+        chain = OptionChain.from_records(option_chain)
+        same_layout = (
+            len(chain) == len(self._row_iv)
+            and np.array_equal(chain.strike, self._row_strike)
+            and np.array_equal(chain.days_to_expiry, self._row_expiry, equal_nan=True)
         )
-    
+        if not same_layout:
+            self._build_surface(chain)
+            return self
+        if self.underlying_price is not None and np.isnan(chain.iv).all():
+            chain.solve_iv(self.underlying_price)
+        ivs = chain.iv
+        changed = (ivs != self._row_iv) & ~(np.isnan(ivs) & np.isnan(self._row_iv))
+        changed &= self._expiry_idx >= 0
+        rows = np.flatnonzero(changed)
+        if rows.size:
+            self._refill(self._apply(rows, ivs))
+        self.stats['updates'] += 1
+        self.stats['rows_changed'] += int(rows.size)
+        return self
+
     def get_volatility(self, strike, dte):
-        # Nearest neighbor lookup on grid
-        x_idx = np.abs(self.surface.x - strike).argmin()
-        y_idx = np.abs(self.surface.y - dte).argmin()
-        return self.surface.z[x_idx, y_idx]
-    
+        # Batched bilinear lookup; strike and dte broadcast against each other
+        strike, dte = np.broadcast_arrays(np.asarray(strike, dtype=float), np.asarray(dte, dtype=float))
+        i, wi = self._axis_weights(self.strikes, strike)
+        j, wj = self._axis_weights(self.expiries, dte)
+        i1 = np.minimum(i + 1, len(self.strikes) - 1)
+        j1 = np.minimum(j + 1, len(self.expiries) - 1)
+        z = self.surface
+        vol = ((1 - wi) * (1 - wj) * z[i, j] + wi * (1 - wj) * z[i1, j]
+               + (1 - wi) * wj * z[i, j1] + wi * wj * z[i1, j1])
+        return vol[()]
+
+    @staticmethod
+    def _axis_weights(axis, x):
+        # Lower node index and interpolation weight for x on a sorted axis (clamped)
+        if len(axis) < 2:
+            return np.zeros(x.shape, dtype=np.int64), np.zeros(x.shape)
+        x = np.clip(x, axis[0], axis[-1])
+        idx = np.clip(np.searchsorted(axis, x, side='right') - 1, 0, len(axis) - 2)
+        weight = (x - axis[idx]) / (axis[idx + 1] - axis[idx])
+        return idx, weight
+
     def calculate_skew(self, atm_strike, dte):
         # Calculate 10-delta skew
         k_90 = atm_strike * 0.9
         k_110 = atm_strike * 1.1
         vol_90 = self.get_volatility(k_90, dte)
         vol_110 = self.get_volatility(k_110, dte)
-        return vol_90 - vol_110
\ No newline at end of file
+        return vol_90 - vol_110
@@ -0,0 +1,49 @@
+import bisect
+
+import numpy as np
+import pandas as pd
+
+class PerformanceHistory:
+    # Append-only equity curve for a portfolio manager. A PM keeps one and serves both
+    # dashboard reads from it: get_performance_history() -> history() for a full redraw,
+    # get_performance_since(date) -> since(date) for the points a stream has not seen yet,
+    # found by bisecting the sorted dates instead of filtering the whole frame.
+    def __init__(self, dates=(), equity=()):
+        self._dates = []
+        self._equity = []
+        self.extend(dates, equity)
+
+    def __len__(self):
+        return len(self._dates)
+
+    def append(self, date, equity):
+        self.extend([date], [equity])
+
+    def extend(self, dates, equity):
+        # Dates must not go backwards: since() bisects them
+        dates = pd.DatetimeIndex(dates)
+        equity = np.asarray(equity, dtype=float)
+        if len(dates) != len(equity):
+            raise ValueError('dates and equity must have the same length')
+        if not len(dates):
+            return
+        if not dates.is_monotonic_increasing or (self._dates and dates[0] < self._dates[-1]):
+            raise ValueError('performance points must be appended in date order')
+        self._dates.extend(dates)
+        self._equity.extend(equity.tolist())
+
+    def last(self):
+        # (date, equity) of the latest point, or None
+        return (self._dates[-1], self._equity[-1]) if self._dates else None
+
+    def recent_equity(self, n):
+        # The last n equity values as an array
+        return np.asarray(self._equity[-n:], dtype=float)
+
+    def history(self):
+        return pd.DataFrame({'date': self._dates, 'equity': self._equity})
+
+    def since(self, date=None):
+        # Points strictly after date (all of them for None)
+        start = 0 if date is None else bisect.bisect_right(self._dates, pd.Timestamp(date))
+        return pd.DataFrame({'date': self._dates[start:], 'equity': self._equity[start:]})
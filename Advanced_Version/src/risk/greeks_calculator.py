@@ -1,31 +1,191 @@
-from py_vollib_vectorized import vectorized
+import numpy as np
 import pandas as pd
+from src.pricing import black_scholes
+
+GREEKS = ('delta', 'gamma', 'theta', 'vega')
+
+def _occurrence(codes):
+    # 0 for the first row of each code, 1 for the second, ... in row order
+    order = np.argsort(codes, kind='stable')
+    ordered = codes[order]
+    starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+    rank = np.arange(len(codes)) - np.repeat(starts, np.diff(np.r_[starts, len(codes)]))
+    occurrence = np.empty(len(codes), dtype=np.int64)
+    occurrence[order] = rank
+    return occurrence
 
 class GreeksCalculator:
     def __init__(self, risk_free_rate=0.03):
         self.r = risk_free_rate
-    
+
+    def greeks_arrays(self, option_type, underlying_price, strike, t, iv, qty):
+        # One kernel call for the whole book; inputs are equal-length arrays and
+        # option_type holds 'call'/'put'. Returns quantity-weighted greek arrays.
+        greeks = black_scholes.greeks(
+            np.asarray(option_type) == 'call',
+            np.asarray(underlying_price, dtype=float),
+            np.asarray(strike, dtype=float),
+            np.asarray(t, dtype=float),
+            self.r,
+            np.asarray(iv, dtype=float)
+        )
+        qty = np.asarray(qty, dtype=float)
+        return {name: greeks[name] * qty for name in GREEKS}
+
     def calculate_all_greeks(self, positions):
-        results = []
-        for pos in positions:
-            greeks = vectorized.greeks(
-                'c' if pos['option_type'] == 'call' else 'p',
-                pos['underlying_price'],
-                pos['strike'],
-                pos['t'],
-                self.r,
-                pos['iv'],
-                return_as='dict'
-            )
-            results.append({
-                'symbol': pos['symbol'],
-                'delta': greeks['delta'] * pos['qty'],
-                'gamma': greeks['gamma'] * pos['qty'],
-                'theta': greeks['theta'] * pos['qty'],
-                'vega': greeks['vega'] * pos['qty']
-            })
-        return pd.DataFrame(results)
-    
+        # positions: list of position dicts or a DataFrame with the same keys
+        frame = positions if isinstance(positions, pd.DataFrame) else pd.DataFrame(positions)
+        if frame.empty:
+            return pd.DataFrame(columns=['symbol', *GREEKS])
+        greeks = self.greeks_arrays(
+            frame['option_type'].to_numpy(),
+            frame['underlying_price'].to_numpy(),
+            frame['strike'].to_numpy(),
+            frame['t'].to_numpy(),
+            frame['iv'].to_numpy(),
+            frame['qty'].to_numpy()
+        )
+        return pd.DataFrame({'symbol': frame['symbol'].to_numpy(), **greeks})
+
     def portfolio_greeks(self, positions):
         df = self.calculate_all_greeks(positions)
-        return df.sum().to_dict()
\ No newline at end of file
+        return {name: float(df[name].sum()) for name in GREEKS}
+
+class GreeksBook:
+    # Incremental portfolio greeks. Per-unit greeks are cached per symbol and a position is
+    # only repriced when its strike/type changed or its underlying price, IV or time bucket
+    # moved past a tolerance since it was last priced. Totals are adjusted by the change in
+    # each position's contribution instead of being re-summed.
+    # Positions need the COLUMNS below; can_price() tells whether a book has them. Rows are
+    # matched to the previous update by position_id when the book has one, else by symbol;
+    # a symbol held in several rows is matched by occurrence (its k-th row to its k-th row).
+    COLUMNS = ('symbol', 'option_type', 'underlying_price', 'strike', 't', 'iv', 'qty')
+
+    def __init__(self, calculator, price_tolerance=0.0005, iv_tolerance=0.0025, time_bucket=1 / (365 * 24)):
+        self.calculator = calculator
+        self.price_tolerance = price_tolerance  # relative move in underlying price
+        self.iv_tolerance = iv_tolerance        # absolute move in implied volatility
+        self.time_bucket = time_bucket          # years; repriced when t crosses a bucket
+        self.totals = dict.fromkeys(GREEKS, 0.0)
+        self.stats = {'updates': 0, 'positions': 0, 'recomputed': 0, 'skipped': 0}
+        self._keys = np.empty(0, dtype=object)
+        self._is_call = np.empty(0, dtype=bool)
+        self._strike = np.empty(0)
+        self._price = np.empty(0)
+        self._iv = np.empty(0)
+        self._bucket = np.empty(0)
+        self._qty = np.empty(0)
+        self._unit = {name: np.empty(0) for name in GREEKS}
+
+    @classmethod
+    def from_config(cls, calculator, config):
+        return cls(
+            calculator,
+            price_tolerance=getattr(config, 'GREEKS_PRICE_TOLERANCE', 0.0005),
+            iv_tolerance=getattr(config, 'GREEKS_IV_TOLERANCE', 0.0025),
+            time_bucket=getattr(config, 'GREEKS_TIME_BUCKET', 1 / (365 * 24))
+        )
+
+    @classmethod
+    def can_price(cls, positions):
+        frame = positions if isinstance(positions, pd.DataFrame) else pd.DataFrame(positions)
+        return frame.empty or set(cls.COLUMNS).issubset(frame.columns)
+
+    def update(self, positions):
+        # positions: the full current book (list of position dicts or DataFrame).
+        # Returns the updated portfolio totals.
+        frame = positions if isinstance(positions, pd.DataFrame) else pd.DataFrame(positions)
+        if frame.empty:
+            frame = pd.DataFrame(columns=list(self.COLUMNS))
+        keys = frame['position_id' if 'position_id' in frame else 'symbol'].to_numpy(dtype=object)
+        is_call = frame['option_type'].to_numpy(dtype=object) == 'call'
+        strike = frame['strike'].to_numpy(dtype=float)
+        price = frame['underlying_price'].to_numpy(dtype=float)
+        iv = frame['iv'].to_numpy(dtype=float)
+        t = frame['t'].to_numpy(dtype=float)
+        qty = frame['qty'].to_numpy(dtype=float)
+        bucket = np.floor(t / self.time_bucket)
+
+        if len(keys) == len(self._keys) and (keys == self._keys).all():
+            # Same book in the same order (the common tick-to-tick case)
+            prev = np.arange(len(keys))
+        elif len(self._keys):
+            prev = self._match(self._keys, keys)
+        else:
+            prev = np.full(len(keys), -1)
+        known = prev >= 0
+        p = prev[known]
+        stale = ~known
+        stale[known] = (
+            (is_call[known] != self._is_call[p])
+            | (strike[known] != self._strike[p])
+            | (np.abs(price[known] / self._price[p] - 1) > self.price_tolerance)
+            | (np.abs(iv[known] - self._iv[p]) > self.iv_tolerance)
+            | (bucket[known] != self._bucket[p])
+        )
+
+        # Skipped positions keep the inputs they were last priced at, so slow drift
+        # still triggers a reprice once it adds up to the tolerance.
+        ref_price, ref_iv, ref_bucket = price.copy(), iv.copy(), bucket.copy()
+        keep = known & ~stale
+        ref_price[keep] = self._price[prev[keep]]
+        ref_iv[keep] = self._iv[prev[keep]]
+        ref_bucket[keep] = self._bucket[prev[keep]]
+
+        unit = {}
+        for name in GREEKS:
+            unit[name] = np.zeros(len(keys))
+            unit[name][keep] = self._unit[name][prev[keep]]
+        if stale.any():
+            fresh = self.calculator.greeks_arrays(
+                np.where(is_call[stale], 'call', 'put'), price[stale], strike[stale], t[stale], iv[stale], np.ones(stale.sum())
+            )
+            for name in GREEKS:
+                unit[name][stale] = fresh[name]
+
+        # Contribution changes: repriced or resized positions, plus positions that left the book
+        old_qty = np.full(len(keys), np.nan)
+        old_qty[known] = self._qty[p]
+        changed = stale | (qty != old_qty)
+        removed = np.ones(len(self._keys), dtype=bool)
+        removed[p] = False
+        old_rows = np.concatenate((p[changed[known]], np.flatnonzero(removed)))
+        for name in GREEKS:
+            self.totals[name] += float(
+                (unit[name][changed] * qty[changed]).sum()
+                - (self._unit[name][old_rows] * self._qty[old_rows]).sum()
+            )
+
+        self._keys = keys
+        self._is_call = is_call
+        self._strike = strike
+        self._price = ref_price
+        self._iv = ref_iv
+        self._bucket = ref_bucket
+        self._qty = qty
+        self._unit = unit
+
+        recomputed = int(stale.sum())
+        self.stats['updates'] += 1
+        self.stats['positions'] += len(keys)
+        self.stats['recomputed'] += recomputed
+        self.stats['skipped'] += len(keys) - recomputed
+        return dict(self.totals)
+
+    @staticmethod
+    def _match(old, new):
+        # Row of old holding each row of new (-1 when none); keys may repeat in either
+        codes, _ = pd.factorize(np.concatenate((old, new)))
+        codes = codes.astype(np.int64)
+        occurrence = np.concatenate((_occurrence(codes[:len(old)]), _occurrence(codes[len(old):])))
+        keys = codes * (len(codes) + 1) + occurrence
+        return pd.Index(keys[:len(old)]).get_indexer(keys[len(old):])
+
+    def resync(self):
+        # Re-sums totals from the cached per-position greeks to shed accumulated rounding
+        for name in GREEKS:
+            self.totals[name] = float((self._unit[name] * self._qty).sum())
+        return dict(self.totals)
+
+    def skip_ratio(self):
+        return self.stats['skipped'] / self.stats['positions'] if self.stats['positions'] else 0.0
@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+
+from src.pricing import black_scholes
+
+class StreamingHistogram:
+    # Fixed-memory distribution estimate for tail quantiles. Values fall into n_bins equal
+    # bins; when a batch lands outside the current range, adjacent bins are merged pairwise
+    # and the range doubled towards it, so counts stay exact and only resolution coarsens.
+    # Each bin also keeps the sum of its values, making tail means exact over whole bins.
+    def __init__(self, n_bins=16_384):
+        self.n_bins = n_bins + n_bins % 2
+        self.counts = np.zeros(self.n_bins, dtype=np.int64)
+        self.sums = np.zeros(self.n_bins)
+        self.lo = None
+        self.width = None
+        self.count = 0
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float).ravel()
+        if values.size == 0:
+            return
+        vmin, vmax = values.min(), values.max()
+        if self.lo is None:
+            span = max(vmax - vmin, abs(vmax), 1e-12)
+            self.lo = vmin - 0.5 * span
+            self.width = 2 * span / self.n_bins
+        while vmin < self.lo:
+            self._widen(left=True)
+        while vmax >= self.lo + self.width * self.n_bins:
+            self._widen(left=False)
+        idx = np.minimum(((values - self.lo) / self.width).astype(np.int64), self.n_bins - 1)
+        self.counts += np.bincount(idx, minlength=self.n_bins)
+        self.sums += np.bincount(idx, weights=values, minlength=self.n_bins)
+        self.count += values.size
+
+    def _widen(self, left):
+        half = self.n_bins // 2
+        counts = self.counts.reshape(half, 2).sum(axis=1)
+        sums = self.sums.reshape(half, 2).sum(axis=1)
+        self.counts = np.zeros(self.n_bins, dtype=np.int64)
+        self.sums = np.zeros(self.n_bins)
+        part = slice(half, None) if left else slice(None, half)
+        self.counts[part] = counts
+        self.sums[part] = sums
+        if left:
+            self.lo -= self.width * self.n_bins
+        self.width *= 2
+
+    def lower_tail(self, fraction):
+        # (quantile, mean of values at or below it) for the lowest `fraction` of values;
+        # the quantile is interpolated within its bin
+        target = fraction * self.count
+        cumulative = np.cumsum(self.counts)
+        b = int(np.searchsorted(cumulative, target))
+        b = min(b, self.n_bins - 1)
+        below = cumulative[b - 1] if b > 0 else 0
+        inside = self.counts[b]
+        share = (target - below) / inside if inside else 0.0
+        quantile = self.lo + self.width * (b + share)
+        tail_sum = (self.sums[:b].sum() if b > 0 else 0.0) + share * self.sums[b]
+        tail_count = below + share * inside
+        return quantile, (tail_sum / tail_count if tail_count else quantile)
+
+class MonteCarloVaR:
+    # Multi-asset Monte Carlo VaR/CVaR for an options book.
+    # Daily log-return shocks ~ N(0, covariance * horizon_days) are generated batch by batch
+    # as z @ L.T (L the Cholesky factor); every position is repriced at the shocked spot with
+    # Black-Scholes (time to expiry shortened by the horizon) or marked linearly, and the book
+    # P&L of each batch goes into a StreamingHistogram, so memory is independent of iterations.
+    def __init__(self, positions, assets, spot, covariance, risk_free_rate=0.03):
+        book = positions if isinstance(positions, pd.DataFrame) else pd.DataFrame(positions)
+        self.assets = pd.Index(assets)
+        self.spot = np.asarray(spot, dtype=float)
+        self.cholesky = np.linalg.cholesky(np.asarray(covariance, dtype=float))
+        self.r = risk_free_rate
+
+        key = book['underlying'].fillna(book['symbol']) if 'underlying' in book else book['symbol']
+        self.asset_idx = self.assets.get_indexer(key)
+        if (self.asset_idx < 0).any():
+            missing = sorted(set(key[self.asset_idx < 0]))
+            raise Exception(f"No covariance entry for: {missing}")
+        self.qty = book['qty'].to_numpy(dtype=float)
+        option_type = book['option_type'].to_numpy(dtype=object) if 'option_type' in book else np.full(len(book), None)
+        self.is_option = pd.notna(option_type)
+        self.is_call = option_type == 'call'
+        n = len(book)
+        self.strike = book['strike'].to_numpy(dtype=float) if 'strike' in book else np.full(n, np.nan)
+        self.t = book['t'].to_numpy(dtype=float) if 't' in book else np.full(n, np.nan)
+        self.iv = book['iv'].to_numpy(dtype=float) if 'iv' in book else np.full(n, np.nan)
+        self.value0 = self._value(self.spot[self.asset_idx], self.t)
+
+    def _value(self, underlying, t):
+        if not self.is_option.any():
+            return underlying
+        option_value = black_scholes.price(self.is_call, underlying, self.strike, np.maximum(t, 0.0), self.r, self.iv)
+        return np.where(self.is_option, option_value, underlying)
+
+    def run(self, iterations=10_000, confidence=0.99, horizon_days=1, batch_size=10_000, seed=None, n_bins=16_384):
+        rng = np.random.default_rng(seed)
+        histogram = StreamingHistogram(n_bins)
+        scale = np.sqrt(horizon_days)
+        t_after = self.t - horizon_days / 365
+        done = 0
+        while done < iterations:
+            n = min(batch_size, iterations - done)
+            shocks = rng.standard_normal((n, len(self.assets))) @ self.cholesky.T * scale
+            underlying = self.spot[self.asset_idx] * np.exp(shocks[:, self.asset_idx])
+            pnl = (self._value(underlying, t_after) - self.value0) @ self.qty
+            histogram.update(pnl)
+            done += n
+        quantile, tail_mean = histogram.lower_tail(1 - confidence)
+        return {
+            'var': max(-quantile, 0.0),
+            'cvar': max(-tail_mean, 0.0),
+            'iterations': histogram.count,
+        }
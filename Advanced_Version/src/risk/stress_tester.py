@@ -1,31 +1,135 @@
+import os
+
+import numpy as np
 import pandas as pd
-from scipy.stats import norm
+
+from src.pricing import black_scholes
+from src.risk.monte_carlo_var import MonteCarloVaR
+
+class Scenario:
+    # One historical period held as arrays, rows grouped by symbol so each symbol's
+    # rows are the contiguous slice [start[k], start[k + 1]) of the sorted arrays, in
+    # date order when the scenario has dates (else file order)
+    def __init__(self, frame):
+        frame = frame.sort_values(['symbol', 'date'] if 'date' in frame else 'symbol', kind='stable')
+        self.symbols = pd.Index(frame['symbol'].unique())
+        codes = self.symbols.get_indexer(frame['symbol'])
+        self.start = np.searchsorted(codes, np.arange(len(self.symbols) + 1))
+        self.close = frame['close'].to_numpy(dtype=float)
+        # Move of each row relative to its symbol's first close
+        self.first = self.close[self.start[:-1]]
+        self.ret = self.close / np.repeat(self.first, np.diff(self.start))
+        # Optional columns: scenario IV per row, and elapsed days for time decay
+        self.iv = frame['iv'].to_numpy(dtype=float) if 'iv' in frame else np.full(len(frame), np.nan)
+        if 'date' in frame:
+            dates = pd.to_datetime(frame['date'])
+            self.days = ((dates - dates.min()).dt.days).to_numpy(dtype=float)
+        else:
+            self.days = np.zeros(len(frame))
+
+    def __len__(self):
+        return len(self.close)
 
 class StressTester:
-    def __init__(self, portfolio):
+    def __init__(self, portfolio, config=None, scenario_dir='scenarios', risk_free_rate=0.03):
         self.portfolio = portfolio
-    
+        self.scenario_dir = scenario_dir
+        self.r = risk_free_rate
+        # period -> Scenario, each CSV is read once
+        self._scenarios = {}
+        if config is not None:
+            self.load_scenarios(config.STRESS_SCENARIOS)
+
+    def load_scenarios(self, periods):
+        for period in periods:
+            self.scenario(period)
+
+    def scenario(self, period):
+        if period not in self._scenarios:
+            frame = pd.read_csv(os.path.join(self.scenario_dir, f"{period}.csv"))
+            self._scenarios[period] = Scenario(frame)
+        return self._scenarios[period]
+
     def historical_scenario(self, period):
-        # Load historical scenario data
-        scenario = pd.read_csv(f"scenarios/{period}.csv")
-        pnl_impact = 0
-        
-        for _, row in scenario.iterrows():
-            for position in self.portfolio:
-                if position['symbol'] == row['symbol']:
-                    pnl_impact += position['qty'] * (
-                        row['close'] - position['entry_price']
-                    )
-        return pnl_impact
-    
-    def monte_carlo_var(self, iterations=10000, confidence=0.99):
-        returns = self._simulate_returns()
-        losses = [-x for x in returns if x < 0]
-        losses.sort()
-        var_index = int(len(losses) * (1 - confidence))
-        return losses[var_index] if losses else 0
-    
-    def _simulate_returns(self, days=1):
-        # Simplified implementation
-        # In practice, use correlated asset returns with Cholesky decomposition
-        return [norm.rvs(loc=0, scale=0.02) for _ in range(10000)]
\ No newline at end of file
+        # Total P&L of the book summed over every scenario row of its symbols
+        return float(self.position_pnl(period).sum())
+
+    def run_all(self):
+        return {period: self.historical_scenario(period) for period in self._scenarios}
+
+    def position_pnl(self, period):
+        # Per-position P&L for one period, revalued in a single vectorized pass.
+        # Each position is joined to the scenario rows of its underlying (or its own symbol)
+        # through the scenario's symbol index. Each row's move (close / the symbol's first
+        # close) is applied to the position's current spot (see _spot; the scenario's first
+        # close when the book has no mark for the underlying). Options (positions with option_type) are fully repriced with
+        # Black-Scholes at the shocked spot, the scenario IV when given (else the position's)
+        # and the remaining time after the row's elapsed days; other positions are marked at
+        # the shocked spot.
+        scenario = self.scenario(period)
+        book = self.portfolio if isinstance(self.portfolio, pd.DataFrame) else pd.DataFrame(self.portfolio)
+        if book.empty or not len(scenario):
+            return np.zeros(len(book))
+        key = book['underlying'].fillna(book['symbol']) if 'underlying' in book else book['symbol']
+        code = scenario.symbols.get_indexer(key)
+        matched = code >= 0
+        first = np.where(matched, scenario.start[np.maximum(code, 0)], 0)
+        count = np.where(matched, scenario.start[np.maximum(code, 0) + 1] - first, 0)
+
+        # Expand to one (position, scenario row) pair per match
+        pos = np.repeat(np.arange(len(book)), count)
+        rows = np.repeat(first - np.cumsum(count) + count, count) + np.arange(count.sum())
+        spot = self._spot(book, key).to_numpy()
+        spot = np.where(np.isfinite(spot), spot, scenario.first[np.maximum(code, 0)])
+        close = spot[pos] * scenario.ret[rows]
+        value = close
+        if 'option_type' in book:
+            option_type = book['option_type'].to_numpy(dtype=object)[pos]
+            is_option = pd.notna(option_type)
+            if is_option.any():
+                t = np.maximum(book['t'].to_numpy(dtype=float)[pos] - scenario.days[rows] / 365, 0.0)
+                iv = np.where(np.isfinite(scenario.iv[rows]), scenario.iv[rows], book['iv'].to_numpy(dtype=float)[pos])
+                option_value = black_scholes.price(
+                    option_type == 'call', close, book['strike'].to_numpy(dtype=float)[pos], t, self.r, iv)
+                value = np.where(is_option, option_value, close)
+        qty = book['qty'].to_numpy(dtype=float)[pos]
+        entry = book['entry_price'].to_numpy(dtype=float)[pos]
+        return np.bincount(pos, weights=qty * (value - entry), minlength=len(book))
+
+    @staticmethod
+    def _spot(book, key):
+        # Current spot of each position's underlying: the first underlying_price among the
+        # positions on that underlying, else the first price / entry_price of a non-option
+        # (spot or future) position on it; NaN without any. Option price and entry_price are
+        # premiums and never stand in for the underlying.
+        marks = book['underlying_price'].astype(float) if 'underlying_price' in book else pd.Series(np.nan, index=book.index)
+        linear = pd.isna(book['option_type']) if 'option_type' in book else pd.Series(True, index=book.index)
+        for column in ('price', 'entry_price'):
+            if column in book:
+                marks = marks.fillna(book[column].where(linear))
+        first = marks.groupby(key.to_numpy()).first()
+        return pd.Series(first.reindex(key.to_numpy()).to_numpy(dtype=float), index=book.index)
+
+    def monte_carlo_var(self, iterations=10000, confidence=0.99, **kwargs):
+        # VaR of the book as a positive loss; see monte_carlo_risk
+        return self.monte_carlo_risk(iterations, confidence, **kwargs)['var']
+
+    def monte_carlo_risk(self, iterations=10000, confidence=0.99, covariance=None, assets=None, spot=None,
+                         horizon_days=1, batch_size=10_000, seed=None):
+        # Correlated Monte Carlo VaR/CVaR (MonteCarloVaR). assets/covariance describe daily
+        # log-returns of the underlyings; without them every underlying in the book gets an
+        # independent 2% daily volatility. spot defaults to each underlying's mark in the
+        # book (see _spot); an underlying without one must be given in spot.
+        book = self.portfolio if isinstance(self.portfolio, pd.DataFrame) else pd.DataFrame(self.portfolio)
+        key = book['underlying'].fillna(book['symbol']) if 'underlying' in book else book['symbol']
+        if assets is None:
+            assets = list(pd.unique(key))
+        if covariance is None:
+            covariance = np.eye(len(assets)) * 0.02 ** 2
+        if spot is None:
+            spot = self._spot(book, key).groupby(key.to_numpy()).first().reindex(assets).to_numpy()
+            if np.isnan(spot).any():
+                missing = [asset for asset, value in zip(assets, spot) if np.isnan(value)]
+                raise Exception(f"No underlying_price for: {missing}; pass spot")
+        engine = MonteCarloVaR(book, assets, spot, covariance, self.r)
+        return engine.run(iterations, confidence, horizon_days, batch_size, seed)
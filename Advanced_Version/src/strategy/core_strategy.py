@@ -1,9 +1,15 @@
+from src.data.option_chain import OptionChain
+
 class AdaptiveIronCondor:
     def __init__(self, volatility_surface, market_regime):
         self.vol_surface = volatility_surface
         self.regime = market_regime
     
-    def determine_strikes(self, underlying_price, dte):
+    def determine_strikes(self, underlying_price, dte, option_chain=None):
+        # Snap to strikes actually listed in the chain when one is supplied; without one,
+        # strikes are rounded to the 50-point grid (no chain is kept between calls)
+        chain = OptionChain.from_records(option_chain) if option_chain is not None else None
+
         # Adaptive delta based on volatility regime
         if self.regime.current() == "high":
             short_delta = 0.35
@@ -16,9 +22,9 @@ class AdaptiveIronCondor:
             long_delta = 0.12
         
         # Calculate strikes
-        atm_strike = self._nearest_strike(underlying_price)
-        call_strikes = self._find_strikes('call', atm_strike, dte, short_delta, long_delta)
-        put_strikes = self._find_strikes('put', atm_strike, dte, short_delta, long_delta)
+        atm_strike = self._nearest_strike(underlying_price, chain)
+        call_strikes = self._find_strikes('call', atm_strike, dte, short_delta, long_delta, chain)
+        put_strikes = self._find_strikes('put', atm_strike, dte, short_delta, long_delta, chain)
         
         return {
             'short_call': call_strikes['short'],
@@ -27,7 +33,7 @@ class AdaptiveIronCondor:
             'long_put': put_strikes['long']
         }
     
-    def _find_strikes(self, option_type, atm_strike, dte, short_delta, long_delta):
+    def _find_strikes(self, option_type, atm_strike, dte, short_delta, long_delta, chain=None):
         # Find strikes based on volatility surface
         # This is simplified - real implementation would use the surface
         if option_type == 'call':
@@ -38,9 +44,11 @@ class AdaptiveIronCondor:
             long_strike = atm_strike * (1 - long_delta * 0.08)
         
         return {
-            'short': self._nearest_strike(short_strike),
-            'long': self._nearest_strike(long_strike)
+            'short': self._nearest_strike(short_strike, chain),
+            'long': self._nearest_strike(long_strike, chain)
         }
     
-    def _nearest_strike(self, price, step=50):
+    def _nearest_strike(self, price, chain=None, step=50):
+        if chain is not None and len(chain):
+            return chain.nearest_strike(price)
         return round(price / step) * step
\ No newline at end of file
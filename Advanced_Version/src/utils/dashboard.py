@@ -1,11 +1,85 @@
+import numpy as np
 import panel as pn
 import hvplot.pandas
+from bokeh.models import ColumnDataSource
+from bokeh.plotting import figure
+
+from src.utils.dashboard_state import DashboardStateReader
+from src.utils.dashboard_stream import DashboardStream, current_greeks
 
 class RiskDashboard:
-    def __init__(self, portfolio_manager):
+    def __init__(self, portfolio_manager, greeks_book=None, state_path=None):
         self.pm = portfolio_manager
+        # Optional GreeksBook: gauges read its running totals instead of a full recompute
+        self.greeks_book = greeks_book
+        # Optional state file published by the trading process (dashboard_state.py);
+        # when set, the greeks come from its latest snapshot
+        self.state_reader = DashboardStateReader(state_path) if state_path else None
+        self.stream = None
         pn.extension()
     
+    def latest_state(self):
+        # Latest published snapshot (dict) or None
+        if self.state_reader is None:
+            return None
+        return self.state_reader.read()
+    
+    def create_streaming_dashboard(self, fps=None, rollover=None, periodic=True):
+        # Built once; update() then pushes only changes: gauge and CVaR values are set in
+        # place, new equity points are streamed into the line's source (keeping at most
+        # rollover points) and the exposure bars are patched only when the report changed.
+        # Updates are throttled to fps frames per second (config DASHBOARD_FPS); with
+        # periodic=True a Panel periodic callback drives update() at that rate.
+        fps = fps or getattr(self.pm.config, 'DASHBOARD_FPS', 2.0)
+        self.rollover = rollover or getattr(self.pm.config, 'DASHBOARD_ROLLOVER', None)
+        self.stream = DashboardStream(self.pm, fps, self.greeks_book, self.state_reader)
+        
+        greeks_pane = self._create_greeks_pane()
+        self.gauges = dict(zip(('delta', 'gamma', 'vega'), greeks_pane.objects))
+        self.cvar_indicator = self._create_risk_metrics()
+        
+        self.equity_source = ColumnDataSource({'date': np.array([], dtype='datetime64[ns]'), 'equity': np.array([])})
+        performance_plot = figure(title='Performance', x_axis_type='datetime', height=300)
+        performance_plot.line(x='date', y='equity', source=self.equity_source)
+        
+        self.exposure_source = ColumnDataSource({'asset': [], 'exposure': []})
+        self.exposure_plot = figure(title='Portfolio Exposure', x_range=[], height=300)
+        self.exposure_plot.vbar(x='asset', top='exposure', width=0.8, source=self.exposure_source)
+        
+        self.update(force=True)
+        if periodic:
+            pn.state.add_periodic_callback(self.update, period=int(1000 / fps))
+        return pn.Column(
+            pn.Row(greeks_pane, self.cvar_indicator),
+            pn.Row(pn.pane.Bokeh(self.exposure_plot), pn.pane.Bokeh(performance_plot)),
+            sizing_mode='stretch_width'
+        )
+    
+    def update(self, force=False):
+        # Pushes one throttled frame to the streaming widgets; False when throttled
+        if self.stream is None:
+            return False
+        frame = self.stream.poll(force)
+        if frame is None:
+            return False
+        for name, gauge in self.gauges.items():
+            gauge.value = frame['greeks'][name]
+        self.cvar_indicator.value = frame['cvar']
+        equity = frame['equity']
+        if len(equity):
+            self.equity_source.stream(
+                {'date': equity['date'].to_numpy(), 'equity': equity['equity'].to_numpy()},
+                rollover=self.rollover)
+        exposure = frame['exposure']
+        if exposure is not None:
+            assets = [str(a) for a in exposure['asset']]
+            if assets == list(self.exposure_source.data['asset']):
+                self.exposure_source.patch({'exposure': [(slice(len(assets)), exposure['exposure'].tolist())]})
+            else:
+                self.exposure_plot.x_range.factors = assets
+                self.exposure_source.data = {'asset': assets, 'exposure': exposure['exposure'].tolist()}
+        return True
+    
     def create_dashboard(self):
         # Create components
         greeks_pane = self._create_greeks_pane()
@@ -22,7 +96,7 @@ class RiskDashboard:
         return dashboard
     
     def _create_greeks_pane(self):
-        greeks = self.pm.current_greeks()
+        greeks = current_greeks(self.pm, self.greeks_book, self.state_reader)
         return pn.WidgetBox(
             pn.indicators.Gauge(
                 name='Delta', value=greeks['delta'], 
@@ -0,0 +1,70 @@
+import time
+
+GREEKS_SHOWN = ('delta', 'gamma', 'vega')
+
+def current_greeks(portfolio_manager, greeks_book=None, state_reader=None):
+    # Portfolio greeks from the cheapest available source: the published state snapshot,
+    # the incremental GreeksBook (when the PM's positions carry the option columns it
+    # prices from), or a full recompute by the portfolio manager
+    state = state_reader.read() if state_reader is not None else None
+    if state is not None:
+        return {name: state[name] for name in GREEKS_SHOWN}
+    if greeks_book is not None:
+        positions = portfolio_manager.positions
+        if greeks_book.can_price(positions):
+            return greeks_book.update(positions)
+    return portfolio_manager.current_greeks()
+
+class DashboardStream:
+    # Incremental dashboard feed, independent of the widgets it drives.
+    # poll() returns at most fps frames per second (None when throttled). A frame holds
+    # the latest gauge values, only the equity points added since the previous frame
+    # and the exposure report only when it changed. New equity points come from
+    # portfolio_manager.get_performance_since(last_date) when available, otherwise the
+    # full history is read and sliced after the last date already sent.
+    def __init__(self, portfolio_manager, fps=2.0, greeks_book=None, state_reader=None, clock=time.monotonic):
+        self.pm = portfolio_manager
+        self.min_interval = 1.0 / fps if fps else 0.0
+        self.greeks_book = greeks_book
+        self.state_reader = state_reader
+        self.clock = clock
+        self._last_frame = None
+        self._last_date = None
+        self._exposure = None
+        self.stats = {'polls': 0, 'frames': 0, 'throttled': 0, 'points': 0}
+
+    def poll(self, force=False):
+        self.stats['polls'] += 1
+        now = self.clock()
+        if not force and self._last_frame is not None and now - self._last_frame < self.min_interval:
+            self.stats['throttled'] += 1
+            return None
+        self._last_frame = now
+        equity = self._new_equity()
+        frame = {
+            'greeks': current_greeks(self.pm, self.greeks_book, self.state_reader),
+            'cvar': self.pm.conditional_var(confidence=0.95),
+            'equity': equity,
+            'exposure': self._changed_exposure(),
+        }
+        self.stats['frames'] += 1
+        self.stats['points'] += len(equity)
+        return frame
+
+    def _new_equity(self):
+        if hasattr(self.pm, 'get_performance_since'):
+            rows = self.pm.get_performance_since(self._last_date)
+        else:
+            rows = self.pm.get_performance_history()
+            if self._last_date is not None:
+                rows = rows[rows['date'] > self._last_date]
+        if len(rows):
+            self._last_date = rows['date'].iloc[-1]
+        return rows
+
+    def _changed_exposure(self):
+        exposure = self.pm.get_exposure_report()
+        if self._exposure is not None and exposure.equals(self._exposure):
+            return None
+        self._exposure = exposure
+        return exposure
@@ -0,0 +1,64 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+from src.portfolio.performance_history import PerformanceHistory
+
+class FakePortfolioManager:
+    # Local stand-in for the portfolio manager the dashboard reads, for offline runs and
+    # benchmarks: step() appends random-walk equity points and moves greeks and exposure.
+    # history_calls counts full get_performance_history() reads.
+    def __init__(self, assets=('NIFTY', 'BANKNIFTY', 'FINNIFTY'), history=0, start_equity=10_000_000,
+                 start='2024-01-01 09:15', freq='1min', seed=None):
+        self.config = SimpleNamespace(
+            DELTA_LIMITS=(-5000, 5000), GAMMA_LIMITS=(-2000, 2000), VEGA_LIMITS=(-30000, 30000),
+            DASHBOARD_FPS=2.0, DASHBOARD_ROLLOVER=10_000,
+        )
+        self.positions = pd.DataFrame(columns=['symbol', 'qty'])
+        self.assets = list(assets)
+        self.freq = pd.Timedelta(freq)
+        self._rng = np.random.default_rng(seed)
+        self.performance = PerformanceHistory([start], [start_equity])
+        self._greeks = {'delta': 0.0, 'gamma': 0.0, 'theta': 0.0, 'vega': 0.0}
+        self._exposure = self._rng.normal(0, 1e6, len(self.assets))
+        self.history_calls = 0
+        self.step(history)
+
+    def step(self, n=1, exposure_change=0.1):
+        # Appends n equity points; exposure moves with probability exposure_change per step
+        if n <= 0:
+            return
+        last_date, last_equity = self.performance.last()
+        returns = self._rng.normal(0, 1e-4, n)
+        equity = last_equity * np.cumprod(1 + returns)
+        self.performance.extend(pd.date_range(last_date + self.freq, periods=n, freq=self.freq), equity.tolist())
+        for name, scale in (('delta', 50), ('gamma', 5), ('theta', 20), ('vega', 200)):
+            self._greeks[name] += float(self._rng.normal(0, scale * np.sqrt(n)))
+        if self._rng.random() < 1 - (1 - exposure_change) ** n:
+            self._exposure = self._exposure + self._rng.normal(0, 1e5, len(self.assets))
+
+    def current_greeks(self):
+        return dict(self._greeks)
+
+    def get_exposure_report(self):
+        return pd.DataFrame({'asset': self.assets, 'exposure': self._exposure})
+
+    def get_performance_history(self):
+        self.history_calls += 1
+        return self.performance.history()
+
+    def get_performance_since(self, date=None):
+        return self.performance.since(date)
+
+    def _returns(self, window=1_000):
+        equity = self.performance.recent_equity(window + 1)
+        return np.diff(equity) / equity[:-1] if len(equity) > 1 else np.zeros(1)
+
+    def value_at_risk(self, confidence=0.95):
+        return float(-np.quantile(self._returns(), 1 - confidence) * self.performance.last()[1])
+
+    def conditional_var(self, confidence=0.95):
+        returns = self._returns()
+        tail = returns[returns <= np.quantile(returns, 1 - confidence)]
+        return float(-tail.mean() * self.performance.last()[1])
@@ -0,0 +1,100 @@
+# Kept in sync with Basic_version/tests/test_black_scholes.py (checked by tests/test_shared_modules.py)
+import os
+import sys
+import warnings
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.pricing import black_scholes as bs
+
+norm = pytest.importorskip("scipy.stats").norm
+
+R = 0.03
+# Spot 48000 against strikes from deep ITM to deep OTM (for calls), a week to a year out.
+S = 48000.0
+K = np.array([20000.0, 40000.0, 46000.0, 48000.0, 50000.0, 56000.0, 90000.0])
+T = np.array([[7 / 365], [30 / 365], [1.0]])
+SIGMA = 0.18
+
+def reference(S, K, T, r, sigma):
+    d1 = (np.log(S / K) + (r + 0.5 * sigma ** 2) * T) / (sigma * np.sqrt(T))
+    d2 = d1 - sigma * np.sqrt(T)
+    discount = K * np.exp(-r * T)
+    return {
+        "call": S * norm.cdf(d1) - discount * norm.cdf(d2),
+        "put": discount * norm.cdf(-d2) - S * norm.cdf(-d1),
+        "call_delta": norm.cdf(d1),
+        "put_delta": norm.cdf(d1) - 1.0,
+        "gamma": norm.pdf(d1) / (S * sigma * np.sqrt(T)),
+        "vega": S * norm.pdf(d1) * np.sqrt(T) / 100,
+        "call_theta": (-S * norm.pdf(d1) * sigma / (2 * np.sqrt(T)) - r * discount * norm.cdf(d2)) / 365,
+        "put_theta": (-S * norm.pdf(d1) * sigma / (2 * np.sqrt(T)) + r * discount * norm.cdf(-d2)) / 365,
+    }
+
+def test_norm_cdf_matches_scipy():
+    x = np.concatenate([np.linspace(-40, 40, 4001), [-7.0710678, 7.0710678, -37.5, 37.5]])
+    np.testing.assert_allclose(bs.norm_cdf(x), norm.cdf(x), rtol=1e-13, atol=1e-16)
+    # Lower tail relative to its own size, where 1 - N(-x) would lose it entirely
+    tail = np.linspace(-37, -1, 721)
+    np.testing.assert_allclose(bs.norm_cdf(tail), norm.cdf(tail), rtol=2e-8)
+
+def test_norm_cdf_infinities_without_warnings():
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        values = bs.norm_cdf(np.array([-np.inf, np.inf, np.nan, 0.0]))
+        assert bs.norm_cdf(np.inf) == 1.0
+        assert bs.norm_cdf(-np.inf) == 0.0
+    np.testing.assert_array_equal(values[[0, 1, 3]], [0.0, 1.0, 0.5])
+    assert np.isnan(values[2])
+
+def test_price_matches_scipy():
+    ref = reference(S, K, T, R, SIGMA)
+    np.testing.assert_allclose(bs.price("call", S, K, T, R, SIGMA), ref["call"], rtol=1e-10, atol=1e-8)
+    np.testing.assert_allclose(bs.price("put", S, K, T, R, SIGMA), ref["put"], rtol=1e-10, atol=1e-8)
+
+def test_greeks_match_scipy():
+    ref = reference(S, K, T, R, SIGMA)
+    for option_type in ("call", "put"):
+        greeks = bs.greeks(option_type, S, K, T, R, SIGMA)
+        np.testing.assert_allclose(greeks["delta"], ref[f"{option_type}_delta"], rtol=1e-10, atol=1e-14)
+        np.testing.assert_allclose(greeks["gamma"], ref["gamma"], rtol=1e-10, atol=1e-18)
+        np.testing.assert_allclose(greeks["vega"], ref["vega"], rtol=1e-10, atol=1e-12)
+        np.testing.assert_allclose(greeks["theta"], ref[f"{option_type}_theta"], rtol=1e-10, atol=1e-10)
+        # The single-greek kernels agree with the one-pass version
+        np.testing.assert_allclose(bs.delta(option_type, S, K, T, R, SIGMA), greeks["delta"], rtol=1e-15)
+        np.testing.assert_allclose(bs.theta(option_type, S, K, T, R, SIGMA), greeks["theta"], rtol=1e-15)
+    np.testing.assert_allclose(bs.gamma(S, K, T, R, SIGMA), ref["gamma"], rtol=1e-10, atol=1e-18)
+    np.testing.assert_allclose(bs.vega(S, K, T, R, SIGMA), ref["vega"], rtol=1e-10, atol=1e-12)
+
+def test_deep_itm_and_otm_limits():
+    deep_itm_call = bs.price("call", S, 1000.0, 7 / 365, R, SIGMA)
+    assert deep_itm_call == pytest.approx(S - 1000.0 * np.exp(-R * 7 / 365), rel=1e-12)
+    assert bs.price("call", S, 200000.0, 7 / 365, R, SIGMA) == pytest.approx(0.0, abs=1e-12)
+    assert bs.delta("call", S, 1000.0, 7 / 365, R, SIGMA) == 1.0
+    assert bs.delta("put", S, 200000.0, 7 / 365, R, SIGMA) == -1.0
+    assert bs.delta("put", S, 1000.0, 7 / 365, R, SIGMA) == 0.0
+
+def test_expiry():
+    strikes = np.array([40000.0, 48000.0, 56000.0])
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        call_price = bs.price("call", S, strikes, 0.0, R, SIGMA)
+        put_price = bs.price("put", S, strikes, 0.0, R, SIGMA)
+        call_delta = bs.delta("call", S, strikes, 0.0, R, SIGMA)
+        put_delta = bs.delta("put", S, strikes, 0.0, R, SIGMA)
+    np.testing.assert_array_equal(call_price, [8000.0, 0.0, 0.0])
+    np.testing.assert_array_equal(put_price, [0.0, 0.0, 8000.0])
+    # Exercise indicator, undefined only at the money
+    np.testing.assert_array_equal(call_delta[[0, 2]], [1.0, 0.0])
+    np.testing.assert_array_equal(put_delta[[0, 2]], [0.0, -1.0])
+    assert np.isnan(call_delta[1]) and np.isnan(put_delta[1])
+    assert np.isnan(bs.delta("call", S, 40000.0, -1 / 365, R, SIGMA))
+
+def test_implied_volatility_round_trip():
+    sigma = np.array([0.1, 0.18, 0.35, 0.8])
+    strikes = np.array([44000.0, 48000.0, 52000.0, 60000.0])
+    quotes = bs.price("call", S, strikes, 30 / 365, R, sigma)
+    np.testing.assert_allclose(bs.implied_volatility(quotes, "call", S, strikes, 30 / 365, R), sigma, atol=1e-5)
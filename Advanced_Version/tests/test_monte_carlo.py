@@ -0,0 +1,52 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.backtest.monte_carlo import MonteCarloBacktester, _simulate_chunk
+
+N_PATHS = 1_003
+CHUNK_SIZE = 200
+PERIODS = 21
+
+
+class ShortVolStrategy:
+    # Same toy strategy as scripts/benchmarks.py, vectorized path only
+    def __init__(self, volatility=0.2, carry=0.002, convexity=4.0):
+        self.volatility = volatility
+        self.carry = carry
+        self.convexity = convexity
+
+    def execute_vectorized(self, market_returns, volatility):
+        return self.carry * volatility / 0.2 - self.convexity * market_returns ** 2
+
+
+def run(workers, keep_paths=True):
+    backtester = MonteCarloBacktester(ShortVolStrategy(), N_PATHS, seed=7, chunk_size=CHUNK_SIZE, workers=workers)
+    return backtester.run(1.0, PERIODS, keep_paths=keep_paths)
+
+
+def test_worker_count_does_not_change_results():
+    single = run(workers=1)
+    pooled = run(workers=2)
+    for key in ('mean_return', 'volatility', 'sharpe', 'var_95', 'cvar_95'):
+        assert single[key] == pooled[key], key
+    np.testing.assert_array_equal(single['final_capital'], pooled['final_capital'])
+    assert run(workers=2, keep_paths=False)['var_95'] == single['var_95']
+
+
+def test_chunk_merge_matches_full_sample():
+    # The last chunk is short (1_003 = 5 x 200 + 3), so the merge sees unequal counts
+    seeds = np.random.SeedSequence(7).spawn(6)
+    sizes = [CHUNK_SIZE] * 5 + [3]
+    returns = np.concatenate([_simulate_chunk(ShortVolStrategy(), s, n, PERIODS) for s, n in zip(seeds, sizes)])
+    metrics = run(workers=1)
+
+    np.testing.assert_allclose(metrics['mean_return'], np.mean(returns), rtol=1e-12)
+    np.testing.assert_allclose(metrics['volatility'] ** 2, np.var(returns), rtol=1e-12)
+    k = int(0.05 * N_PATHS)
+    ordered = np.sort(returns)
+    assert metrics['var_95'] == ordered[k]
+    np.testing.assert_allclose(metrics['cvar_95'], np.mean(ordered[:k]), rtol=1e-12)
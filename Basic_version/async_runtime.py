@@ -0,0 +1,547 @@
+# async_runtime.py
+import asyncio
+import copy
+import csv
+import datetime
+from option_chain import OptionChain
+from latency import LatencyRecorder
+from execution import LEGS, LegFailure
+
+_STOP = object()
+
+# Stages timed by AsyncTradingRuntime's LatencyRecorder. fetch is the per-event read of
+# the underlying and chain (a broker round trip on a cache miss). tick_to_trade runs
+# from the arrival of the oldest tick batch behind a signal until its orders are confirmed.
+LATENCY_STAGES = ("apply_ticks", "fetch", "select_strikes", "update_vwap", "check_entry",
+                  "execute_iron_condor", "exit_position", "tick_to_trade")
+
+class FeedTickSource:
+    """
+    Bridges the broker tick feed (callbacks on the SDK's thread) into asyncio.
+    Ticks that arrive while the runtime is busy are merged into one pending batch,
+    so bursts are coalesced instead of queueing up behind each other.
+    """
+    def __init__(self, data_fetcher):
+        self.data_fetcher = data_fetcher
+        self._loop = None
+        self._pending = []
+        self._ready = None
+
+    def _on_ticks(self, ticks):
+        if isinstance(ticks, dict):
+            ticks = [ticks]
+        self._loop.call_soon_threadsafe(self._push, ticks)
+
+    def _push(self, ticks):
+        self._pending.extend(ticks)
+        self._ready.set()
+
+    async def __aiter__(self):
+        self._loop = asyncio.get_running_loop()
+        self._ready = asyncio.Event()
+        self.data_fetcher.start_chain_stream(self._on_ticks)
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            batch, self._pending = self._pending, []
+            if batch:
+                yield batch
+
+class ReplayTickSource:
+    """
+    Replays locally stored tick batches for offline runs and tests.
+    batches: iterable of lists of tick dicts (ScripCode, LTP, Volume[, Datetime]).
+    delay: seconds to wait between batches (0 replays as fast as possible).
+    """
+    def __init__(self, batches, delay=0.0):
+        self.batches = batches
+        self.delay = delay
+
+    @classmethod
+    def from_csv(cls, path, delay=0.0):
+        """
+        Loads ticks from a CSV with columns Datetime, ScripCode, LTP, Volume;
+        consecutive rows sharing a Datetime form one batch.
+        """
+        batches = []
+        current_dt = None
+        with open(path, newline='') as f:
+            for row in csv.DictReader(f):
+                tick = {
+                    "Datetime": row["Datetime"],
+                    "ScripCode": int(row["ScripCode"]),
+                    "LTP": float(row["LTP"]),
+                    "Volume": float(row["Volume"]) if row.get("Volume") else None,
+                }
+                if row["Datetime"] != current_dt:
+                    batches.append([])
+                    current_dt = row["Datetime"]
+                batches[-1].append(tick)
+        return cls(batches, delay)
+
+    async def __aiter__(self):
+        for batch in self.batches:
+            yield batch
+            await asyncio.sleep(self.delay)
+
+class LocalMarket:
+    """
+    Offline stand-in for DataFetcher: holds an OptionChain and underlying price
+    and patches them from replayed ticks.
+    """
+    def __init__(self, option_chain, underlying_price, underlying_scrip_code, latest_expiry=None):
+        self.latest_option_chain = OptionChain.from_records(option_chain)
+        self.underlying_price = underlying_price
+        self.underlying_scrip_code = underlying_scrip_code
+        self.latest_expiry = latest_expiry
+
+    def get_option_chain(self):
+        return self.latest_option_chain
+
+    def get_underlying_price(self):
+        return self.underlying_price
+
+    def needs_refetch(self):
+        return False
+
+    def apply_ticks(self, ticks):
+        for tick in ticks:
+            if tick.get("ScripCode") == self.underlying_scrip_code:
+                self.underlying_price = float(tick["LTP"])
+            else:
+                self.latest_option_chain.update(tick.get("ScripCode"), tick.get("LTP"), tick.get("Volume"))
+
+class AsyncTradingRuntime:
+    """
+    Event-driven replacement for the polling loop in main.py.
+    Ticks are applied to the market as they arrive and wake the strategy task; strategy,
+    risk and execution run as separate tasks connected by bounded queues, so a slow broker
+    call never holds up tick ingestion. The session stops at trading_end_time or when the
+    tick source is exhausted, draining each stage in order; entries still queued once
+    trading_end_time has passed are dropped.
+    With a CheckpointStore, the session first restores the last checkpoint and replays the
+    journal written after it, journals every state change while running (AVWAP inputs,
+    PnL, position changes), and checkpoints every checkpoint_interval seconds. Orders are
+    journaled as an intent before they are submitted; an intent left without an outcome
+    by a crash is reconciled against the broker's positions on restart. State from
+    another trading day is not restored.
+    latency (a LatencyRecorder, disabled by default) times each pipeline stage.
+    expiry_datetime overrides the contract expiry used for the greeks, which otherwise
+    is the market's latest_expiry at the exchange close (trading_config["expiry_time"]).
+    """
+    def __init__(self, market, tick_source, strategy, risk_manager, order_executor, logger,
+                 trading_config, queue_size=16, now=datetime.datetime.now, expiry_datetime=None,
+                 checkpoints=None, checkpoint_interval=5.0, latency=None):
+        self.market = market
+        self.tick_source = tick_source
+        self.strategy = strategy
+        self.risk_manager = risk_manager
+        self.order_executor = order_executor
+        self.logger = logger
+        self.trading_config = trading_config
+        self.now = now
+        self.queue_size = queue_size
+        self.expiry_datetime = expiry_datetime
+        self.checkpoints = checkpoints
+        self.checkpoint_interval = checkpoint_interval
+        self.latency = latency or LatencyRecorder(LATENCY_STAGES, enabled=False)
+
+        self.trading_end_time = datetime.datetime.strptime(trading_config["trading_end_time"], "%H:%M").time()
+        self.expiry_time = datetime.datetime.strptime(trading_config.get("expiry_time", "15:30"), "%H:%M").time()
+        # "flat" -> "entering" -> "open" -> "exiting" -> "flat"
+        self.position_state = "flat"
+        self.trade_setup = None
+        self.entry_trade_straddle = None
+        self.previous_straddle = None
+        # Reason to close the remaining legs at the next check, after a partial exit or
+        # an entry whose rollback left legs open
+        self.exit_pending = None
+        # ("entering"|"exiting", trade_setup, entry straddle) while orders are with the broker
+        self.in_flight = None
+        self.stats = {"ticks": 0, "wakeups": 0, "signals": 0, "orders": 0}
+
+    async def run(self):
+        self._tick_event = asyncio.Event()
+        self._ingest_done = False
+        self._session_end = datetime.datetime.combine(self.now().date(), self.trading_end_time)
+        self._dirty = False
+        self._tick_ns = 0
+        self._risk_queue = asyncio.Queue(maxsize=self.queue_size)
+        self._execution_queue = asyncio.Queue(maxsize=self.queue_size)
+        if self.checkpoints is not None:
+            state, records = self.checkpoints.restore()
+            stale = not self.restore_state(state, records)
+            self.checkpoints.open()
+            if self.in_flight is not None:
+                await self._reconcile()
+            if stale:
+                # Retire the other day's checkpoint and journal right away
+                self.checkpoints.checkpoint(self.snapshot_state())
+            checkpointer = asyncio.create_task(self._checkpoint_task())
+
+        ingest = asyncio.create_task(self._ingest())
+        tasks = [
+            asyncio.create_task(self._strategy_task()),
+            asyncio.create_task(self._risk_task()),
+            asyncio.create_task(self._execution_task()),
+        ]
+        clock = asyncio.create_task(self._session_clock())
+        done, _ = await asyncio.wait([ingest, clock], return_when=asyncio.FIRST_COMPLETED)
+        for task in (ingest, clock):
+            if task not in done:
+                task.cancel()
+        for result in await asyncio.gather(ingest, clock, return_exceptions=True):
+            if isinstance(result, Exception):
+                self.logger.log_event("ERROR", f"Tick ingestion stopped: {str(result)}")
+        # Let the pipeline drain in order: strategy -> risk -> execution.
+        self._ingest_done = True
+        self._tick_event.set()
+        await asyncio.gather(*tasks)
+        if self.checkpoints is not None:
+            checkpointer.cancel()
+            await asyncio.gather(checkpointer, return_exceptions=True)
+            self.checkpoints.close(self.snapshot_state())
+        return self.stats
+
+    def _journal(self, record, durable=False):
+        if self.checkpoints is not None:
+            self.checkpoints.append(record, durable)
+
+    async def _checkpoint_task(self):
+        while True:
+            await asyncio.sleep(self.checkpoint_interval)
+            self.checkpoints.checkpoint(self.snapshot_state())
+
+    def snapshot_state(self):
+        """
+        Strategy, risk and position state as a dict of copies. A signal whose orders were
+        not submitted yet is recorded as not acted on ("entering" -> "flat", "exiting" ->
+        "open"); submitted orders are recorded in in_flight until their outcome is known.
+        trade_setup holds the chain's record dicts, which ticks patch in place, so the
+        runtime state is deep-copied before the checkpoint writer thread pickles it.
+        """
+        position_state = self.position_state
+        if self.in_flight is None:
+            position_state = {"entering": "flat", "exiting": "open"}.get(position_state, position_state)
+        return {
+            "session_date": self.now().date(),
+            "strategy": self.strategy.get_state(),
+            "risk": {"current_pnl": self.risk_manager.current_pnl},
+            "runtime": copy.deepcopy({
+                "position_state": position_state,
+                "trade_setup": self.trade_setup,
+                "entry_trade_straddle": self.entry_trade_straddle,
+                "previous_straddle": self.previous_straddle,
+                "exit_pending": self.exit_pending,
+                "in_flight": self.in_flight,
+            }),
+        }
+
+    def _restored_date(self, state, records):
+        # Trading day of the restored state: the latest date in the checkpoint or journal
+        date = state.get("session_date") if state is not None else None
+        for record in records:
+            if record[0] in ("tick", "chain"):
+                date = record[1].date()
+        return date
+
+    def restore_state(self, state, records=()):
+        """
+        Applies a snapshot_state() checkpoint (may be None) and replays journal records.
+        Returns False, restoring nothing, when they come from another trading day; a
+        position or order left over from that day is flagged and trading is halted
+        ("unreconciled") until the operator reconciles the book and clears CHECKPOINT_DIR.
+        """
+        restored_date = self._restored_date(state, records)
+        if restored_date is not None and restored_date != self.now().date():
+            self._reject_stale(state, records, restored_date)
+            return False
+        if state is not None:
+            self.strategy.set_state(state["strategy"])
+            self.risk_manager.update_pnl(state["risk"]["current_pnl"])
+            for name, value in state["runtime"].items():
+                setattr(self, name, value)
+        for record in records:
+            kind = record[0]
+            if kind == "tick":
+                _, timestamp, call_price, call_volume, put_price, put_volume = record
+                self.strategy.update_vwap(call_price, call_volume, put_price, put_volume, timestamp)
+                self.previous_straddle = call_price + put_price
+            elif kind == "chain":
+                _, timestamp, scrip_code, ltp, volume = record
+                self.strategy.chain_avwap.update(scrip_code, ltp, volume, timestamp)
+            elif kind == "pnl":
+                self.risk_manager.update_pnl(record[1])
+            elif kind == "position":
+                _, self.position_state, self.trade_setup, self.entry_trade_straddle = record[:4]
+                self.exit_pending = record[4] if len(record) > 4 else None
+                self.in_flight = None
+            elif kind in ("entering", "exiting"):
+                self.in_flight = record
+                self.position_state = kind
+        if state is not None or records:
+            self.logger.log_event("RESTORE", f"Restored checkpoint={state is not None}, replayed {len(records)} "
+                                             f"journal records; position {self.position_state}")
+        return True
+
+    def _reject_stale(self, state, records, restored_date):
+        position_state, trade_setup, in_flight = "flat", None, None
+        if state is not None:
+            runtime = state["runtime"]
+            position_state, trade_setup, in_flight = runtime["position_state"], runtime["trade_setup"], runtime.get("in_flight")
+        for record in records:
+            if record[0] == "position":
+                position_state, trade_setup, in_flight = record[1], record[2], None
+            elif record[0] in ("entering", "exiting"):
+                in_flight = record
+        self.logger.log_event("RESTORE", f"Ignored checkpoint and journal from {restored_date}")
+        if position_state != "flat" or in_flight is not None:
+            self.position_state = "unreconciled"
+            self.trade_setup = in_flight[1] if in_flight is not None else trade_setup
+            self.logger.log_event("ERROR", f"Position left over from {restored_date} ({position_state}, in flight: "
+                                           f"{in_flight is not None}); trading halted until it is reconciled")
+
+    def _broker_positions(self):
+        """
+        Net quantity per ScripCode from the broker's positions report.
+        """
+        return {int(p["ScripCode"]): p.get("NetQty", 0) for p in self.order_executor.client.positions() or []}
+
+    async def _reconcile(self):
+        """
+        Settles in_flight (orders whose outcome is unknown) from the broker's positions:
+        legs with a net quantity are open, the others were never filled or were closed.
+        Halts trading ("unreconciled") when the broker cannot be asked; in_flight is kept,
+        so the next restart tries again.
+        """
+        kind, trade_setup, entry_straddle = self.in_flight
+        lots = self.trading_config["lot_size"] * self.trading_config["num_lots"]
+        try:
+            net = await asyncio.to_thread(self._broker_positions)
+        except Exception as e:
+            self.position_state = "unreconciled"
+            self.trade_setup = trade_setup
+            self.logger.log_event("ERROR", f"Could not reconcile {kind} orders with the broker: {str(e)}; trading halted")
+            return
+        open_legs = [leg for leg in LEGS if leg in trade_setup and net.get(int(trade_setup[leg]["ScripCode"]), 0)]
+        self.logger.log_event("RECONCILE", f"{kind} orders in flight; open at the broker: {open_legs}")
+        if kind == "entering" and len(open_legs) == len(LEGS):
+            self.in_flight = None
+            self.trade_setup = trade_setup
+            self.entry_trade_straddle = entry_straddle
+            self.position_state = "open"
+            self.exit_pending = None
+            self._journal(("position", "open", trade_setup, entry_straddle), durable=True)
+            self.logger.update_dashboard("Position Open", 0, f"Entry at straddle {entry_straddle} (reconciled)", position=-lots)
+        else:
+            self.in_flight = None
+            self._hold_legs(trade_setup, open_legs, entry_straddle, f"{kind} interrupted; reconciled with the broker", lots)
+
+    async def _session_clock(self):
+        await asyncio.sleep(max(0.0, (self._session_end - self.now()).total_seconds()))
+
+    def _session_over(self):
+        return self.now() >= self._session_end
+
+    async def _ingest(self):
+        latency = self.latency
+        async for batch in self.tick_source:
+            start = latency.mark()
+            if not self._dirty:
+                # Oldest batch the strategy has not seen yet
+                self._tick_ns = start
+            self.market.apply_ticks(batch)
+            latency.record("apply_ticks", start)
+            self.stats["ticks"] += len(batch)
+            # Latest state lives in the market; one pending wake-up is enough.
+            self._dirty = True
+            self._tick_event.set()
+
+    def _contract_expiry(self):
+        # The contracts expire at the exchange close of the market's expiry date; the
+        # session end today is only a stand-in for a market that does not know it.
+        if self.expiry_datetime is not None:
+            return self.expiry_datetime
+        if self.market.latest_expiry is not None:
+            return datetime.datetime.combine(self.market.latest_expiry, self.expiry_time)
+        return datetime.datetime.combine(self.now().date(), self.trading_end_time)
+
+    async def _strategy_task(self):
+        while True:
+            await self._tick_event.wait()
+            self._tick_event.clear()
+            if self._dirty:
+                self._dirty = False
+                self.stats["wakeups"] += 1
+                try:
+                    await self._on_market_update(self._contract_expiry())
+                except Exception as e:
+                    self.logger.log_event("ERROR", f"Exception in strategy task: {str(e)}")
+            if self._ingest_done and not self._dirty:
+                await self._risk_queue.put(_STOP)
+                return
+
+    async def _on_market_update(self, expiry_datetime):
+        latency = self.latency
+        tick_ns = self._tick_ns
+        start = latency.mark()
+        if self.market.needs_refetch():
+            # A cache miss or stale chain goes to the broker; keep that off the event loop.
+            underlying_price, option_chain = await asyncio.to_thread(self._fetch_market)
+        else:
+            underlying_price, option_chain = self._fetch_market()
+        latency.record("fetch", start)
+        start = latency.mark()
+        trade_setup = self.strategy.select_strikes(option_chain, underlying_price, expiry_datetime)
+        latency.record("select_strikes", start)
+
+        atm_call_price = float(trade_setup["atm_call"].get("LTP", 0))
+        atm_put_price = float(trade_setup["atm_put"].get("LTP", 0))
+        atm_call_volume = float(trade_setup["atm_call"].get("Volume") or 100)
+        atm_put_volume = float(trade_setup["atm_put"].get("Volume") or 100)
+
+        now = self.now()
+        start = latency.mark()
+        avwap_straddle, avwap_call, avwap_put = self.strategy.update_vwap(atm_call_price, atm_call_volume, atm_put_price, atm_put_volume, now)
+        latency.record("update_vwap", start)
+        self._journal(("tick", now, atm_call_price, atm_call_volume, atm_put_price, atm_put_volume))
+        if self.trading_config.get("chain_avwap", False):
+            self.strategy.update_chain_vwap(option_chain, now)
+            if self.checkpoints is not None:
+                chain = OptionChain.from_records(option_chain)
+                self._journal(("chain", now, chain.scrip_code.copy(), chain.ltp.copy(), chain.volume.copy()))
+        current_straddle = atm_call_price + atm_put_price
+        self.logger.log_event("DATA_UPDATE", f"Straddle: {current_straddle}, AVWAP: {avwap_straddle}")
+
+        if self.position_state == "flat":
+            start = latency.mark()
+            entry = self.strategy.check_entry_condition(atm_call_price, atm_put_price, avwap_straddle, avwap_call, avwap_put, self.previous_straddle)
+            latency.record("check_entry", start)
+            if entry:
+                self.logger.log_event("ENTRY_SIGNAL", f"Entry conditions met. Straddle: {current_straddle} < AVWAP: {avwap_straddle}")
+                self.position_state = "entering"
+                self.stats["signals"] += 1
+                await self._risk_queue.put(("ENTER", trade_setup, current_straddle, tick_ns))
+        elif self.position_state == "open":
+            await self._risk_queue.put(("CHECK", current_straddle, avwap_straddle, self.previous_straddle, tick_ns))
+        self.previous_straddle = current_straddle
+
+    def _fetch_market(self):
+        return self.market.get_underlying_price(), self.market.get_option_chain()
+
+    async def _risk_task(self):
+        lots = self.trading_config["lot_size"] * self.trading_config["num_lots"]
+        while True:
+            message = await self._risk_queue.get()
+            if message is _STOP:
+                await self._execution_queue.put(_STOP)
+                return
+            try:
+                if message[0] == "ENTER":
+                    await self._execution_queue.put(message)
+                    continue
+                _, current_straddle, avwap_straddle, previous_straddle, tick_ns = message
+                if self.position_state != "open":
+                    continue
+                # Simple PnL calculation: (entry_straddle - current_straddle)*lot_size*num_lots
+                current_pnl = (self.entry_trade_straddle - current_straddle) * lots
+                self.risk_manager.update_pnl(current_pnl)
+                self._journal(("pnl", current_pnl))
+                self.logger.publish_state(pnl=current_pnl)
+                risk_trigger = self.risk_manager.check_risk()
+                exit_signal = self.risk_manager.should_exit_based_on_avwap(current_straddle, avwap_straddle, previous_straddle)
+                if risk_trigger or exit_signal or self.exit_pending:
+                    reason = risk_trigger or ("AVWAP breakout" if exit_signal else self.exit_pending)
+                    self.logger.log_event("EXIT_SIGNAL", f"Exiting due to {reason}; current_pnl: {current_pnl}")
+                    self.position_state = "exiting"
+                    self.stats["signals"] += 1
+                    await self._execution_queue.put(("EXIT", self.trade_setup, current_pnl, tick_ns))
+            except Exception as e:
+                self.logger.log_event("ERROR", f"Exception in risk task: {str(e)}")
+
+    async def _execution_task(self):
+        # Short straddle quantity, as published to the dashboard state
+        lots = self.trading_config["lot_size"] * self.trading_config["num_lots"]
+        latency = self.latency
+        while True:
+            message = await self._execution_queue.get()
+            if message is _STOP:
+                return
+            action = message[0]
+            try:
+                # Broker calls block; keep them off the event loop.
+                if action == "ENTER":
+                    _, trade_setup, current_straddle, tick_ns = message
+                    if self._session_over():
+                        self.logger.log_event("ENTRY_DROPPED", f"Session ended; not entering at straddle {current_straddle}")
+                        self.position_state = "flat"
+                        continue
+                    self._submit_intent(("entering", trade_setup, current_straddle))
+                    start = latency.mark()
+                    await asyncio.to_thread(self.order_executor.execute_iron_condor, trade_setup)
+                    latency.record("execute_iron_condor", start)
+                    latency.record("tick_to_trade", tick_ns)
+                    self.trade_setup = trade_setup
+                    self.entry_trade_straddle = current_straddle
+                    self.position_state = "open"
+                    self.in_flight = None
+                    self._journal(("position", "open", trade_setup, current_straddle), durable=True)
+                    self.logger.update_dashboard("Position Open", 0, f"Entry at straddle {current_straddle}", position=-lots)
+                else:
+                    _, trade_setup, current_pnl, tick_ns = message
+                    self._submit_intent(("exiting", trade_setup, self.entry_trade_straddle))
+                    start = latency.mark()
+                    order_ids = await asyncio.to_thread(self.order_executor.exit_position, trade_setup)
+                    latency.record("exit_position", start)
+                    latency.record("tick_to_trade", tick_ns)
+                    self.position_state = "flat"
+                    self.trade_setup = None
+                    self.exit_pending = None
+                    self.in_flight = None
+                    self._journal(("position", "flat", None, None), durable=True)
+                    self.logger.update_dashboard("Position Closed", current_pnl, f"Exited with orders: {order_ids}", position=0)
+                self.stats["orders"] += 1
+            except LegFailure as e:
+                self.in_flight = None
+                self.logger.log_event("ERROR", f"Exception in execution task: {str(e)}")
+                if action == "ENTER":
+                    # Rolled back except for the stuck legs, which are closed at the next check
+                    self._hold_legs(trade_setup, e.stuck, current_straddle, "entry rollback left legs open", lots)
+                else:
+                    # Keep only the legs that are still open, so the retry does not re-trade closed ones
+                    open_legs = [leg for leg in LEGS if leg in trade_setup and leg not in e.filled]
+                    self._hold_legs(trade_setup, open_legs, self.entry_trade_straddle, "partial exit", lots)
+            except Exception as e:
+                self.logger.log_event("ERROR", f"Exception in execution task: {str(e)}")
+                if self.in_flight is not None:
+                    # Orders may have gone out before the error: ask the broker what is open.
+                    await self._reconcile()
+                else:
+                    self.position_state = "flat" if action == "ENTER" else "open"
+
+    def _submit_intent(self, intent):
+        # Durable before any order goes out, so a crash mid-submission is reconciled on restart
+        self.in_flight = intent
+        self._journal(intent, durable=True)
+
+    def _hold_legs(self, trade_setup, legs, entry_straddle, reason, lots):
+        """
+        Records the book after a failed order: open with only `legs` left (and an exit
+        pending for them), or flat when none are.
+        """
+        if not legs:
+            self.position_state = "flat"
+            self.trade_setup = None
+            self.exit_pending = None
+            self._journal(("position", "flat", None, None), durable=True)
+            self.logger.update_dashboard("Position Closed", self.risk_manager.current_pnl, reason, position=0)
+            return
+        self.trade_setup = {key: value for key, value in trade_setup.items() if key not in LEGS or key in legs}
+        self.entry_trade_straddle = entry_straddle
+        self.position_state = "open"
+        self.exit_pending = reason
+        self._journal(("position", "open", self.trade_setup, entry_straddle, reason), durable=True)
+        self.logger.log_event("LEGS_OPEN", f"{reason}; still open: {legs}")
+        short = any(leg.startswith("short") for leg in legs)
+        self.logger.update_dashboard("Position Open", self.risk_manager.current_pnl, f"{reason}; open legs {legs}",
+                                     position=-lots if short else 0)
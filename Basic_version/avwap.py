@@ -0,0 +1,174 @@
+# avwap.py
+import datetime
+import numpy as np
+import pandas as pd
+
+def _anchor_minutes(anchor_time):
+    anchor = datetime.datetime.strptime(anchor_time, "%H:%M").time()
+    return anchor.hour * 60 + anchor.minute
+
+class AVWAPEngine:
+    """
+    Streaming Anchored VWAP for many instruments and several anchors at once.
+    Running price*volume and volume sums live in (anchors x instruments) arrays;
+    instruments (any hashable key, e.g. ScripCode) get a column the first time they
+    are seen. A tick batch is folded in with one vectorized update().
+
+    Each anchor restarts its sums the first time a batch arrives at or after its
+    anchor time on a new day. Batches before the anchor time are ignored by that
+    anchor and its AVWAP reads NaN until the session's first batch after the anchor
+    (the same rule as backtest_engine's anchored AVWAP). With no anchor times the
+    sums simply run forever.
+    """
+    def __init__(self, anchor_times=("09:15",), capacity=64):
+        self.anchor_times = list(anchor_times)
+        self._anchor_minutes = np.array([_anchor_minutes(a) for a in self.anchor_times], dtype=np.int64)
+        self._session = np.full(len(self.anchor_times), -1, dtype=np.int64)
+        rows = max(len(self.anchor_times), 1)
+        # Anchors that accepted the latest batch; the others read as NaN
+        self._active = np.full(rows, not self.anchor_times)
+        self._pv = np.zeros((rows, capacity))
+        self._v = np.zeros((rows, capacity))
+        self._keys = pd.Index([])
+        self._slots = {}
+        # Columns of the previous batch's keys; tick batches usually repeat them
+        self._last_keys = None
+        self._last_idx = None
+
+    def __len__(self):
+        return len(self._slots)
+
+    @property
+    def keys(self):
+        return self._keys
+
+    def _slot_indices(self, keys):
+        """
+        Column of each key, registering unseen keys (arrays grow by doubling).
+        """
+        keys = np.asarray(keys)
+        if self._last_keys is not None and np.array_equal(keys, self._last_keys):
+            return self._last_idx
+        idx = self._lookup(keys)
+        missing = idx < 0
+        if missing.any():
+            for key in pd.unique(keys[missing]):
+                self._slots[key] = len(self._slots)
+            self._keys = pd.Index(list(self._slots))
+            if len(self._slots) > self._pv.shape[1]:
+                capacity = max(2 * self._pv.shape[1], len(self._slots))
+                self._pv = np.pad(self._pv, ((0, 0), (0, capacity - self._pv.shape[1])))
+                self._v = np.pad(self._v, ((0, 0), (0, capacity - self._v.shape[1])))
+            idx = self._lookup(keys)
+        self._last_keys, self._last_idx = keys.copy(), idx
+        return idx
+
+    def _lookup(self, keys):
+        # Dict lookups beat building an index for a handful of keys
+        if len(keys) <= 64:
+            slots = self._slots
+            return np.fromiter((slots.get(k, -1) for k in keys.tolist()), dtype=np.int64, count=len(keys))
+        return self._keys.get_indexer(keys)
+
+    def _live_anchors(self, timestamp):
+        """
+        Rows that accumulate this batch, after resetting anchors entering a new session.
+        """
+        if not self.anchor_times:
+            return self._active
+        day = timestamp.toordinal()
+        live = (timestamp.hour * 60 + timestamp.minute) >= self._anchor_minutes
+        reset = live & (self._session != day)
+        if reset.any():
+            self._pv[reset] = 0.0
+            self._v[reset] = 0.0
+            self._session[reset] = day
+        self._active = live
+        return live
+
+    def update(self, keys, prices, volumes, timestamp=None):
+        """
+        Folds one tick batch (all at `timestamp`, default now) into the running sums.
+        keys, prices and volumes are equal-length sequences; repeated keys accumulate.
+        Returns the AVWAPs of the first anchor for the given keys.
+        """
+        timestamp = timestamp or datetime.datetime.now()
+        idx = self._slot_indices(keys)
+        live = self._live_anchors(timestamp)
+        prices = np.asarray(prices, dtype=float)
+        volumes = np.asarray(volumes, dtype=float)
+        if live.any():
+            capacity = self._pv.shape[1]
+            pv = np.bincount(idx, weights=prices * volumes, minlength=capacity)
+            v = np.bincount(idx, weights=volumes, minlength=capacity)
+            if live.all():
+                self._pv += pv
+                self._v += v
+            else:
+                self._pv[live] += pv
+                self._v[live] += v
+        return self._values(idx, 0)
+
+    def avwap(self, keys=None, anchor=None):
+        """
+        AVWAPs for keys (default: every instrument, in registration order) at one anchor
+        (anchor time string, default the first). NaN for unknown keys, for instruments
+        without volume since the anchor, and while the latest batch precedes the anchor.
+        Pass anchor="all" for an (anchors x keys) array.
+        """
+        if keys is None:
+            idx = np.arange(len(self._slots))
+        else:
+            idx = self._lookup(np.asarray(keys))
+        if anchor == "all":
+            return self._values(idx, slice(None))
+        return self._values(idx, 0 if anchor is None else self.anchor_times.index(anchor))
+
+    def _values(self, idx, row):
+        pv, v = self._pv[row, idx], self._v[row, idx]
+        active = self._active[row]
+        if isinstance(row, slice):
+            active = active[:, None]
+        values = np.full(pv.shape, np.nan)
+        np.divide(pv, v, out=values, where=active & (v > 0) & (idx >= 0))
+        return values
+
+    def get_state(self):
+        """
+        Copy of the running sums and session bookkeeping (for checkpoints).
+        """
+        n = len(self._slots)
+        return {
+            "anchor_times": list(self.anchor_times),
+            "keys": list(self._slots),
+            "pv": self._pv[:, :n].copy(),
+            "v": self._v[:, :n].copy(),
+            "session": self._session.copy(),
+            "active": self._active.copy(),
+        }
+
+    def set_state(self, state):
+        """
+        Restores get_state() output. Returns False (and keeps the current state) when the
+        state was taken with different anchor times.
+        """
+        if state["anchor_times"] != self.anchor_times:
+            return False
+        n = len(state["keys"])
+        capacity = max(self._pv.shape[1], n)
+        self._pv = np.zeros((self._pv.shape[0], capacity))
+        self._v = np.zeros((self._v.shape[0], capacity))
+        self._pv[:, :n] = state["pv"]
+        self._v[:, :n] = state["v"]
+        self._session = state["session"].copy()
+        self._active = state["active"].copy()
+        self._slots = {key: i for i, key in enumerate(state["keys"])}
+        self._keys = pd.Index(state["keys"])
+        self._last_keys = self._last_idx = None
+        return True
+
+    def reset(self):
+        self._pv[:] = 0.0
+        self._v[:] = 0.0
+        self._session[:] = -1
+        self._active[:] = not self.anchor_times
@@ -0,0 +1,167 @@
+# backtest_engine.py
+import datetime
+import time
+import numpy as np
+import pandas as pd
+
+class BacktestBars:
+    """
+    ATM call/put bars aligned on a common time axis.
+    Built once from the long-format historical CSV (one row per option per timestamp):
+    for each Datetime the first CE row and the first PE row are kept, and timestamps
+    lacking either side are dropped, exactly as the groupby loop skipped them.
+    Data without the REQUIRED_COLUMNS (e.g. OHLC bars of the underlying) is rejected.
+    """
+    REQUIRED_COLUMNS = ("Datetime", "OptionType", "LTP", "Volume")
+
+    def __init__(self, datetime, call_ltp, call_volume, put_ltp, put_volume):
+        self.datetime = datetime
+        self.call_ltp = call_ltp
+        self.call_volume = call_volume
+        self.put_ltp = put_ltp
+        self.put_volume = put_volume
+
+    def __len__(self):
+        return len(self.datetime)
+
+    @classmethod
+    def from_frame(cls, df):
+        missing = [c for c in cls.REQUIRED_COLUMNS if c not in df.columns]
+        if missing and len(df):
+            raise Exception(f"Historical data has no {', '.join(missing)} column(s); the backtest needs "
+                            f"one row per option per timestamp with {', '.join(cls.REQUIRED_COLUMNS)}.")
+        if missing:
+            # Nothing stored for the range
+            empty = np.empty(0)
+            return cls(pd.DatetimeIndex([]), empty, empty, empty, empty)
+        df = df.sort_values("Datetime", kind="stable")
+        columns = ["Datetime", "LTP", "Volume"]
+        calls = df.loc[df["OptionType"] == "CE", columns].drop_duplicates("Datetime")
+        puts = df.loc[df["OptionType"] == "PE", columns].drop_duplicates("Datetime")
+        bars = calls.merge(puts, on="Datetime", suffixes=("_call", "_put"))
+        return cls(
+            pd.DatetimeIndex(bars["Datetime"]),
+            bars["LTP_call"].to_numpy(),
+            bars["Volume_call"].to_numpy(),
+            bars["LTP_put"].to_numpy(),
+            bars["Volume_put"].to_numpy(),
+        )
+
+    @classmethod
+    def from_csv(cls, historical_file):
+        return cls.from_frame(pd.read_csv(historical_file, parse_dates=['Datetime']))
+
+def _avwap(price, volume):
+    # Running AVWAP over the whole history (no anchor).
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.cumsum(price * volume) / np.cumsum(volume)
+
+def _anchored_avwap(price, volume, session, active):
+    # AVWAP whose sums restart at every session anchor; NaN for bars before the anchor.
+    # Each session is a plain np.cumsum from zero, so sums accumulate left to right
+    # exactly like AVWAPEngine.update.
+    pv = np.where(active, price * volume, 0.0)
+    v = np.where(active, volume, 0.0)
+    cum_pv = np.empty_like(pv)
+    cum_v = np.empty_like(v)
+    bounds = np.append(np.flatnonzero(np.diff(session, prepend=session[:1] - 1)), len(session))
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        np.cumsum(pv[start:stop], out=cum_pv[start:stop])
+        np.cumsum(v[start:stop], out=cum_v[start:stop])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        avwap = np.where(cum_v > 0, cum_pv / cum_v, np.nan)
+    avwap[~active] = np.nan
+    return avwap
+
+def _sessions(datetimes, anchor_time):
+    # Session id per bar (one per trading day) and whether the bar is at/after the anchor.
+    anchor = datetime.datetime.strptime(anchor_time, "%H:%M").time()
+    minutes = datetimes.hour * 60 + datetimes.minute
+    active = np.asarray(minutes >= anchor.hour * 60 + anchor.minute)
+    session = np.asarray(datetimes.normalize().asi8)
+    return session, active
+
+def run_bars(bars, trading_config=None, anchor_time=None):
+    """
+    Runs the AVWAP entry/exit state machine over aligned bars.
+    Entry and exit conditions are evaluated for every bar at once; the position
+    state machine then only jumps between candidate bars with searchsorted.
+    Returns (trade_logs, stats). AVWAPs reset daily at anchor_time (or the
+    trading_config's avwap_anchor_time), as Strategy's AVWAPEngine does; with
+    neither they run over the whole history. With anchor_time alone, trade_logs
+    matches the groupby backtester. With trading_config, the RiskManager
+    stop-loss/target (on PnL scaled by lot_size * num_lots) also close trades.
+    """
+    started = time.perf_counter()
+    call, put = bars.call_ltp, bars.put_ltp
+    straddle = call + put
+    if trading_config is not None:
+        anchor_time = trading_config["avwap_anchor_time"]
+    if anchor_time is None:
+        avwap_straddle = _avwap(straddle, bars.call_volume + bars.put_volume)
+        avwap_call = _avwap(call, bars.call_volume)
+        avwap_put = _avwap(put, bars.put_volume)
+    else:
+        session, active = _sessions(bars.datetime, anchor_time)
+        avwap_straddle = _anchored_avwap(straddle, bars.call_volume + bars.put_volume, session, active)
+        avwap_call = _anchored_avwap(call, bars.call_volume, session, active)
+        avwap_put = _anchored_avwap(put, bars.put_volume, session, active)
+    if trading_config is not None:
+        lots = trading_config["lot_size"] * trading_config["num_lots"]
+        stop_loss = trading_config["capital"] * trading_config["stop_loss_pct"] / 100
+        target = trading_config["capital"] * trading_config["target_pct"] / 100
+
+    # Strategy.check_entry_condition for every bar.
+    entry_ok = (straddle < avwap_straddle) & (call < avwap_call) & (put < avwap_put)
+    # Strategy.should_exit_based_on_avwap for every bar; previous straddle is the prior bar's.
+    exit_ok = straddle >= avwap_straddle
+    exit_ok[1:] &= straddle[:-1] < avwap_straddle[1:]
+    entries = np.flatnonzero(entry_ok)
+    exits = np.flatnonzero(exit_ok)
+
+    trade_logs = []
+    bar = 0
+    while True:
+        i = np.searchsorted(entries, bar)
+        if i == len(entries):
+            break
+        entry = entries[i]
+        dt = bars.datetime[entry]
+        trade_logs.append({"Datetime": dt, "Event": "ENTER", "Details": {
+            "entry_time": dt,
+            "atm_call_price": call[entry],
+            "atm_put_price": put[entry],
+            "avwap_straddle": avwap_straddle[entry]
+        }})
+        # Exits are only checked from the bar after entry.
+        j = np.searchsorted(exits, entry + 1)
+        exit_bar = exits[j] if j < len(exits) else None
+        reason = "AVWAP breakout"
+        if trading_config is not None:
+            # First bar after entry where the scaled PnL breaches stop-loss or target.
+            window = slice(entry + 1, exit_bar + 1 if exit_bar is not None else len(straddle))
+            pnl = (straddle[entry] - straddle[window]) * lots
+            breach = np.flatnonzero((pnl <= -stop_loss) | (pnl >= target))
+            if breach.size:
+                exit_bar = entry + 1 + breach[0]
+                reason = "stop_loss" if pnl[breach[0]] <= -stop_loss else "target"
+        if exit_bar is None:
+            break
+        dt = bars.datetime[exit_bar]
+        exit_trade = {
+            "exit_time": dt,
+            "exit_straddle": straddle[exit_bar],
+            "pnl": (call[entry] + put[entry]) - straddle[exit_bar]
+        }
+        if trading_config is not None:
+            exit_trade["reason"] = reason
+        trade_logs.append({"Datetime": dt, "Event": "EXIT", "Details": exit_trade})
+        bar = exit_bar + 1
+
+    elapsed = time.perf_counter() - started
+    stats = {
+        "bars": len(bars),
+        "seconds": elapsed,
+        "bars_per_sec": len(bars) / elapsed if elapsed > 0 else float("inf"),
+    }
+    return trade_logs, stats
@@ -1,10 +1,13 @@
 # backtester.py
 import os
+import sys
 import pandas as pd
 import datetime
 import config
 from strategy import Strategy
-from data_fetcher import DataFetcher
+from backtest_engine import BacktestBars, run_bars
+from historical_store import HistoricalStore
+from broker_session import BrokerSession
 
 def download_historical_data(client, scrip_code, timeframe, from_date, to_date):
     """
@@ -22,45 +25,71 @@ def download_historical_data(client, scrip_code, timeframe, from_date, to_date):
     df = client.historical_data('N', 'C', scrip_code, timeframe, from_date, to_date)
     return df
 
-def get_backtest_data():
+# Range originally downloaded into historical_data/sample_day.csv.
+SAMPLE_SCRIP_CODE = 1660  # Replace with the appropriate Scrip Code for your instrument
+SAMPLE_TIMEFRAME = "15m"
+SAMPLE_FROM_DATE = "2021-05-25"
+SAMPLE_TO_DATE = "2021-06-16"
+
+def get_backtest_data(scrip_code=SAMPLE_SCRIP_CODE, timeframe=SAMPLE_TIMEFRAME,
+                      from_date=SAMPLE_FROM_DATE, to_date=SAMPLE_TO_DATE, columns=None, filters=None):
     """
-    Checks if the backtest data file exists; if not, downloads historical data using the 5paisa API.
-    Returns the path to the CSV file.
+    Loads historical data for the given range from the on-disk HistoricalStore,
+    downloading only the date ranges the store does not have yet via the 5paisa API.
+    columns/filters are pushed down to the store (see HistoricalStore.read).
+    Returns a pandas DataFrame. The sample range is OHLC bars of the underlying, which
+    run_backtest does not accept; it needs option-chain data (see BacktestBars).
     """
-    # Ensure the backtest data directory exists.
-    if not os.path.exists(config.BACKTEST_DATA_DIR):
-        os.makedirs(config.BACKTEST_DATA_DIR)
-    
-    filename = os.path.join(config.BACKTEST_DATA_DIR, "sample_day.csv")
-    
-    if not os.path.exists(filename):
-        print("Historical data file not found. Downloading historical data...")
-        # Adjust these dates and timeframe as needed.
-        from_date = "2021-05-25"
-        to_date = "2021-06-16"
-        timeframe = "15m"
-        scrip_code = 1660  # Replace with the appropriate Scrip Code for your instrument
-        
-        # Initialize DataFetcher to get access to the 5paisa client.
-        data_fetcher = DataFetcher(config.API_CONFIG)
-        df = download_historical_data(data_fetcher.client, scrip_code, timeframe, from_date, to_date)
-        
-        # Save DataFrame to CSV in the backtest data directory.
-        df.to_csv(filename, index=False)
-        print(f"Historical data saved to {filename}")
+    store = HistoricalStore(config.BACKTEST_STORE_DIR)
+
+    # Seed the store from the legacy single-file download if it is still around.
+    legacy_file = os.path.join(config.BACKTEST_DATA_DIR, "sample_day.csv")
+    if (os.path.exists(legacy_file) and (scrip_code, timeframe) == (SAMPLE_SCRIP_CODE, SAMPLE_TIMEFRAME)
+            and not store.covered_dates(scrip_code, timeframe)):
+        store.write_frame(scrip_code, timeframe, pd.read_csv(legacy_file), SAMPLE_FROM_DATE, SAMPLE_TO_DATE)
+
+    missing = store.missing_ranges(scrip_code, timeframe, from_date, to_date)
+    if missing:
+        print(f"Downloading missing historical data: {missing}")
+        # Reuse the process-wide authenticated session (logs in only on first use).
+        session = BrokerSession.shared()
+        store.ensure(
+            lambda code, tf, start, end: download_historical_data(session, code, tf, start, end),
+            scrip_code, timeframe, from_date, to_date
+        )
     else:
-        print("Historical data file found.")
-    return filename
+        print("Historical data found in store.")
+    return store.read(scrip_code, timeframe, from_date, to_date, columns=columns, filters=filters)
 
 def run_backtest(historical_file):
     """
-    Runs a backtest using historical data contained in the CSV file.
+    Runs a backtest using historical data from a CSV file path or a DataFrame
+    (e.g. from get_backtest_data for an option scrip).
     Assumes the CSV file has at least the following columns:
        Datetime, UnderlyingPrice, OptionType, Strike, LTP, Volume
+    The CSV is pivoted once into aligned call/put arrays (BacktestBars) and the
+    AVWAP entry/exit state machine runs over them. Returns the trade logs.
+    """
+    if isinstance(historical_file, pd.DataFrame):
+        bars = BacktestBars.from_frame(historical_file)
+    else:
+        bars = BacktestBars.from_csv(historical_file)
+    trade_logs, stats = run_bars(bars, anchor_time=config.TRADING_CONFIG["avwap_anchor_time"])
+
+    print("Backtest Results:")
+    for log in trade_logs:
+        print(log)
+    print(f"Processed {stats['bars']} bars in {stats['seconds']:.4f}s ({stats['bars_per_sec']:,.0f} bars/sec)")
+    return trade_logs
+
+def run_backtest_groupby(historical_file):
+    """
+    Reference implementation of run_backtest that iterates df.groupby("Datetime").
+    Kept to cross-check the array engine; returns the trade logs without printing.
     """
     # Updated parse_dates to use the column "Datetime"
     df = pd.read_csv(historical_file, parse_dates=['Datetime'])
-    df.sort_values("Datetime", inplace=True)
+    df.sort_values("Datetime", inplace=True, kind="stable")
     
     # Set a fixed expiry date for simulation (modify as needed)
     expiry_date = datetime.datetime.strptime("24-Apr-2025", "%d-%b-%Y")
@@ -89,7 +118,7 @@ def run_backtest(historical_file):
 
         # Update AVWAP calculations.
         avwap_straddle, avwap_call, avwap_put = strategy.update_vwap(
-            atm_call_price, atm_call_volume, atm_put_price, atm_put_volume
+            atm_call_price, atm_call_volume, atm_put_price, atm_put_volume, dt
         )
 
         if not position_open:
@@ -116,10 +145,12 @@ def run_backtest(historical_file):
 
         previous_straddle = current_straddle
 
-    print("Backtest Results:")
-    for log in trade_logs:
-        print(log)
+    return trade_logs
 
 if __name__ == "__main__":
-    historical_file = get_backtest_data()
-    run_backtest(historical_file)
+    if len(sys.argv) != 2:
+        sys.exit(f"Usage: python backtester.py <option_data.csv>\n"
+                 f"The CSV needs one row per option per timestamp with columns "
+                 f"{', '.join(BacktestBars.REQUIRED_COLUMNS)}; OHLC bars such as "
+                 f"historical_data/sample_day.csv are not option data.")
+    run_backtest(sys.argv[1])
@@ -0,0 +1,202 @@
+# bench_report.py
+# Kept in sync with Advanced_Version/src/utils/bench_report.py (checked by tests/test_shared_modules.py)
+import argparse
+import datetime
+import json
+import math
+import os
+import platform
+import subprocess
+import time
+import numpy as np
+
+# Tokens of a metric name (split on "_") that mark a duration or an error: lower is better.
+# "<x>_per_sec" rates and "speedup" ratios are higher-is-better; everything else is
+# informational and only reported when it changes. Maximum durations are single
+# outliers (a context switch is enough to move them) and are not compared.
+_TIME_UNITS = {"s", "ms", "us", "ns", "seconds"}
+_ERRORS = {"err", "error"}
+
+def _jsonable(value):
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (bool, int, float, str)) or value is None:
+        return value
+    return str(value)
+
+def _label(row):
+    # Rows of a size sweep are labelled by their first field, e.g. "strikes=500"
+    key, value = next(iter(row.items()))
+    return f"{key}={value}"
+
+def flatten(result, prefix=""):
+    """
+    Flattens a benchmark result (nested dicts, lists and tuples of numbers) into
+    {"name.sub[label].metric": value} for every number and boolean in it.
+    """
+    metrics = {}
+    if isinstance(result, dict):
+        for key, value in result.items():
+            metrics.update(flatten(value, f"{prefix}.{key}" if prefix else str(key)))
+    elif isinstance(result, (list, tuple)):
+        labelled = all(isinstance(v, dict) and v for v in result)
+        labels = [_label(v) for v in result] if labelled else []
+        if len(set(labels)) != len(result):
+            labels = [str(i) for i in range(len(result))]
+        for label, value in zip(labels, result):
+            metrics.update(flatten(value, f"{prefix}[{label}]"))
+    elif isinstance(result, (bool, int, float)) and not (isinstance(result, float) and math.isnan(result)):
+        metrics[prefix] = result
+    return metrics
+
+def _tokens(metric):
+    return metric.rsplit(".", 1)[-1].split("_")
+
+def direction(metric):
+    """
+    -1 when lower values are better, +1 when higher values are better, 0 when unknown.
+    """
+    tokens = _tokens(metric)
+    if "per" in tokens and tokens[tokens.index("per") + 1:][:1] == ["sec"]:
+        return 1
+    if "speedup" in tokens:
+        return 1
+    if _TIME_UNITS.intersection(tokens) or _ERRORS.intersection(tokens):
+        return -1
+    return 0
+
+def _noisy(metric):
+    tokens = _tokens(metric)
+    return "max" in tokens and bool(_TIME_UNITS.intersection(tokens))
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+def run_suite(suite, only=None, echo=True):
+    """
+    Runs (name, benchmark, printer) entries of suite (all, or those named in only)
+    and returns the report: environment, raw results and flattened metrics.
+    """
+    results = {}
+    seconds = {}
+    for name, benchmark, printer in suite:
+        if only and name not in only:
+            continue
+        start = time.perf_counter()
+        results[name] = benchmark()
+        seconds[name] = time.perf_counter() - start
+        if echo and printer is not None:
+            printer(results[name])
+            print()
+    results = _jsonable(results)
+    return {
+        "environment": environment(),
+        "seconds": seconds,
+        "results": results,
+        "metrics": flatten(results),
+    }
+
+def write_report(report, path):
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+def load_report(path):
+    with open(path) as f:
+        return json.load(f)
+
+def compare_reports(base, new, threshold=0.25):
+    """
+    Compares the metrics of two reports. Returns rows (metric, base, new, change,
+    status) for every metric present in both, where status is:
+      "regression"  a duration/error grew or a rate fell by more than threshold
+                    (relative; errors below 1e-12 count as equal), or a boolean
+                    check went from true to false
+      "improvement" the opposite move by more than threshold
+      "changed"     an informational value (count, result) differs
+      "ok"          otherwise, and always for maximum durations
+    """
+    rows = []
+    base_metrics, new_metrics = base["metrics"], new["metrics"]
+    for metric in sorted(set(base_metrics) & set(new_metrics)):
+        old, value = base_metrics[metric], new_metrics[metric]
+        change = None
+        if isinstance(old, bool) or isinstance(value, bool):
+            status = "regression" if old and not value else "ok" if old == value else "changed"
+        else:
+            change = (value - old) / abs(old) if old else (0.0 if value == old else math.inf)
+            sign = direction(metric)
+            if _noisy(metric):
+                status = "ok"
+            elif sign and abs(change) > threshold and abs(value - old) > 1e-12:
+                status = "improvement" if change * sign > 0 else "regression"
+            elif sign == 0 and not math.isclose(old, value, rel_tol=1e-9, abs_tol=1e-12):
+                status = "changed"
+            else:
+                status = "ok"
+        rows.append({"metric": metric, "base": old, "new": value, "change": change, "status": status})
+    return rows
+
+def print_comparison(rows, show_all=False):
+    counts = {}
+    for row in rows:
+        counts[row["status"]] = counts.get(row["status"], 0) + 1
+        if not show_all and row["status"] == "ok":
+            continue
+        change = "" if row["change"] is None else f"{row['change']:+.1%}"
+        print(f"{row['status'].upper():<12} {row['metric']:<60} {row['base']:>12.6g} -> {row['new']:<12.6g} {change}")
+    print(", ".join(f"{n} {status}" for status, n in sorted(counts.items())))
+
+def main(suite, description="Benchmarks", argv=None):
+    """
+    Command line for a benchmark suite (list of (name, benchmark, printer) entries).
+    Returns the process exit status: 1 when a comparison found regressions.
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--only", nargs="+", metavar="NAME", help="Run only these benchmarks")
+    parser.add_argument("--list", action="store_true", help="List benchmark names and exit")
+    parser.add_argument("--json", metavar="PATH", help="Write the report (environment, results, metrics) as JSON")
+    parser.add_argument("--baseline", metavar="PATH", help="Compare this run against an earlier JSON report")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="Compare two JSON reports without running")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Relative change flagged as a regression (default 0.25)")
+    parser.add_argument("--all", action="store_true", help="Show unchanged metrics in comparisons")
+    args = parser.parse_args(argv)
+
+    names = [name for name, _, _ in suite]
+    if args.list:
+        print("\n".join(names))
+        return 0
+    if args.only:
+        unknown = set(args.only) - set(names)
+        if unknown:
+            parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+    if args.compare:
+        base, new = (load_report(path) for path in args.compare)
+    else:
+        new = run_suite(suite, args.only)
+        if args.json:
+            write_report(new, args.json)
+            print(f"Report written to {args.json}")
+        if not args.baseline:
+            return 0
+        base = load_report(args.baseline)
+    rows = compare_reports(base, new, args.threshold)
+    print_comparison(rows, args.all)
+    return 1 if any(row["status"] == "regression" for row in rows) else 0
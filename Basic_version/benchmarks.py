@@ -0,0 +1,629 @@
+# benchmarks.py
+import asyncio
+import csv
+import datetime
+import os
+import sys
+import tempfile
+import threading
+import time
+import timeit
+import numpy as np
+import pandas as pd
+import bench_report
+import black_scholes
+import config
+from avwap import AVWAPEngine
+from backtest_engine import BacktestBars, run_bars
+from backtester import run_backtest_groupby
+from historical_store import HistoricalStore
+from strategy import Strategy, calculate_delta
+from option_chain import OptionChain
+from execution import OrderExecutor
+from fake_broker import FakeBrokerClient
+from broker_session import BrokerSession
+from latency import LatencyRecorder
+from logger import CSVLogger
+from dashboard_state import DashboardStatePublisher, DashboardStateReader
+from async_runtime import AsyncTradingRuntime, LATENCY_STAGES, LocalMarket, ReplayTickSource
+from risk_manager import RiskManager
+
+class _NullLogger:
+    def log_event(self, *args, **kwargs):
+        pass
+
+    def update_dashboard(self, *args, **kwargs):
+        pass
+
+    def publish_state(self, **state):
+        pass
+
+def make_synthetic_chain(n_strikes, underlying_price=48000.0, width=0.4, seed=0):
+    """
+    Builds an offline option chain (list of dicts, same keys as the 5paisa chain)
+    with n_strikes strikes spread evenly over +/- width/2 around underlying_price,
+    one CE and one PE per strike.
+    """
+    rng = np.random.default_rng(seed)
+    step = underlying_price * width / n_strikes
+    first = underlying_price - (n_strikes // 2) * step
+    chain = []
+    scrip_code = 100000
+    for i in range(n_strikes):
+        strike = round(first + i * step, 2)
+        for option_type in ("CE", "PE"):
+            chain.append({
+                "Strike": strike,
+                "OptionType": option_type,
+                "LTP": round(float(rng.uniform(1, 500)), 2),
+                "Volume": int(rng.integers(0, 100000)),
+                "ScripCode": scrip_code,
+            })
+            scrip_code += 1
+    return chain
+
+def smile_iv(strike, underlying_price):
+    """
+    Quadratic volatility smile in log-moneyness used by the IV benchmarks.
+    """
+    moneyness = np.log(strike / underlying_price)
+    return 0.15 + 0.5 * moneyness ** 2 - 0.1 * moneyness
+
+def make_priced_chain(n_strikes, underlying_price=48000.0, T=20 / 365, r=0.03, width=0.4):
+    """
+    Like make_synthetic_chain, but every LTP is the Black-Scholes price under
+    smile_iv, so each quote has a known implied volatility.
+    """
+    chain = make_synthetic_chain(n_strikes, underlying_price, width)
+    strike = np.array([opt["Strike"] for opt in chain])
+    is_call = np.array([opt["OptionType"] == "CE" for opt in chain])
+    ltp = black_scholes.price(is_call, underlying_price, strike, T, r, smile_iv(strike, underlying_price))
+    for opt, value in zip(chain, ltp.tolist()):
+        opt["LTP"] = value
+    return chain
+
+def _best_time(func, repeat=5):
+    number, _ = timeit.Timer(func).autorange()
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+def select_strikes_scalar(trading_config, option_chain, underlying_price, expiry_datetime, sigma=0.2, r=0.03):
+    """
+    Selects the following strikes:
+      - ATM strike: closest to underlying_price.
+      - Short Call (approx. 4 delta) from call options with strike > ATM strike.
+      - Long Call (approx. 2 delta) from call options with strike greater than short call.
+      - Short Put (approx. 4 delta) from put options with strike < ATM strike.
+      - Long Put (approx. 2 delta) from put options with strike less than short put.
+    Option chain is assumed to be a list of dictionaries with keys: 'Strike', 'OptionType', 'LTP', 'ScripCode', etc.
+
+    Per-option loop implementation of Strategy.select_strikes (fixed sigma, no IV solve),
+    kept as the reference it is benchmarked and checked against.
+    """
+    short_target = trading_config.get("short_delta", 0.04)
+    long_target = trading_config.get("long_delta", 0.02)
+    strikes = sorted(list(set([opt['Strike'] for opt in option_chain])))
+    atm_strike = min(strikes, key=lambda x: abs(x - underlying_price))
+    # Get ATM call and put for reference:
+    calls_atm = [opt for opt in option_chain if opt['OptionType'] == 'CE' and opt['Strike'] == atm_strike]
+    puts_atm = [opt for opt in option_chain if opt['OptionType'] == 'PE' and opt['Strike'] == atm_strike]
+    if not calls_atm or not puts_atm:
+        raise Exception("ATM options not found in option chain.")
+    atm_call = calls_atm[0]
+    atm_put = puts_atm[0]
+    T = (expiry_datetime - datetime.datetime.now()).total_seconds() / (365 * 24 * 3600)
+
+    # Select short call (approx. 4 delta) from calls with strike > ATM
+    candidate_calls = [opt for opt in option_chain if opt['OptionType'] == 'CE' and opt['Strike'] > atm_strike]
+    selected_short_call = None
+    selected_long_call = None
+    min_diff = float("inf")
+    for opt in candidate_calls:
+        delta = calculate_delta("call", underlying_price, opt['Strike'], T, r, sigma)
+        if abs(delta - short_target) < min_diff:
+            min_diff = abs(delta - short_target)
+            selected_short_call = opt
+    if selected_short_call is None:
+        raise Exception("Appropriate short call not found.")
+    min_diff = float("inf")
+    for opt in candidate_calls:
+        if opt['Strike'] > selected_short_call['Strike']:
+            delta = calculate_delta("call", underlying_price, opt['Strike'], T, r, sigma)
+            if abs(delta - long_target) < min_diff:
+                min_diff = abs(delta - long_target)
+                selected_long_call = opt
+    if selected_long_call is None:
+        raise Exception("Appropriate long call not found.")
+
+    # Select short put (approx. 4 delta) from puts with strike < ATM
+    candidate_puts = [opt for opt in option_chain if opt['OptionType'] == 'PE' and opt['Strike'] < atm_strike]
+    selected_short_put = None
+    selected_long_put = None
+    min_diff = float("inf")
+    for opt in candidate_puts:
+        delta = calculate_delta("put", underlying_price, opt['Strike'], T, r, sigma)
+        if abs(delta - short_target) < min_diff:
+            min_diff = abs(delta - short_target)
+            selected_short_put = opt
+    if selected_short_put is None:
+        raise Exception("Appropriate short put not found.")
+    min_diff = float("inf")
+    for opt in candidate_puts:
+        if opt['Strike'] < selected_short_put['Strike']:
+            delta = calculate_delta("put", underlying_price, opt['Strike'], T, r, sigma)
+            if abs(delta - long_target) < min_diff:
+                min_diff = abs(delta - long_target)
+                selected_long_put = opt
+    if selected_long_put is None:
+        raise Exception("Appropriate long put not found.")
+
+    return {
+        "atm_strike": atm_strike,
+        "atm_call": atm_call,
+        "atm_put": atm_put,
+        "short_call": selected_short_call,
+        "long_call": selected_long_call,
+        "short_put": selected_short_put,
+        "long_put": selected_long_put
+    }
+
+def benchmark_select_strikes(sizes=(50, 100, 500, 1000, 2000)):
+    """
+    Times Strategy.select_strikes against the loop-based select_strikes_scalar above
+    for chains of increasing size and checks both pick the same legs.
+    The 'prebuilt' column reuses an OptionChain built once per fetch, as the live loop does.
+    IV solving is off so both paths use the same fixed sigma (see benchmark_iv_solver).
+    """
+    strategy = Strategy(dict(config.TRADING_CONFIG, solve_iv=False))
+    underlying_price = 48010.0
+    expiry = datetime.datetime.now() + datetime.timedelta(days=20)
+    results = []
+    for n in sizes:
+        chain = make_synthetic_chain(n, underlying_price)
+        fast = strategy.select_strikes(chain, underlying_price, expiry)
+        slow = select_strikes_scalar(strategy.trading_config, chain, underlying_price, expiry)
+        t_fast = _best_time(lambda: strategy.select_strikes(chain, underlying_price, expiry))
+        t_slow = _best_time(lambda: select_strikes_scalar(strategy.trading_config, chain, underlying_price, expiry))
+        columnar = OptionChain(chain)
+        t_prebuilt = _best_time(lambda: strategy.select_strikes(columnar, underlying_price, expiry))
+        results.append({
+            "strikes": n,
+            "scalar_us": t_slow * 1e6,
+            "vectorized_us": t_fast * 1e6,
+            "prebuilt_us": t_prebuilt * 1e6,
+            "speedup": t_slow / t_fast,
+            "match": fast == slow,
+        })
+    return results
+
+def make_synthetic_history(days=5, strikes_per_side=5, seed=0):
+    """
+    Builds a long-format 1-minute option history (Datetime, OptionType, Strike, LTP, Volume)
+    with strikes_per_side CE and PE rows per bar and a mean-reverting straddle.
+    """
+    rng = np.random.default_rng(seed)
+    stamps = pd.DatetimeIndex([
+        ts for day in pd.bdate_range("2024-01-01", periods=days)
+        for ts in pd.date_range(day + pd.Timedelta("09:15:00"), periods=375, freq="1min")
+    ])
+    n = len(stamps)
+    level = 200 + np.cumsum(rng.normal(0, 1.5, n))
+    rows = []
+    for side in ("CE", "PE"):
+        for k in range(strikes_per_side):
+            rows.append(pd.DataFrame({
+                "Datetime": stamps,
+                "OptionType": side,
+                "Strike": 48000 + (k if side == "CE" else -k) * 100,
+                "LTP": np.round(np.abs(level / (k + 1) + rng.normal(0, 2, n)), 2),
+                "Volume": rng.integers(100, 5000, n),
+            }))
+    return pd.concat(rows).sort_values("Datetime", kind="stable")
+
+def benchmark_iv_solver(sizes=(50, 500, 2000), underlying_price=48000.0, T=20 / 365, r=0.03):
+    """
+    Solves a whole chain's IVs cold (flat 0.2 start) and warm (after a 0.1% move in
+    the underlying, starting from the previous tick's IVs, as on the cached chain).
+    Reports solve time, Newton iterations, bisection steps and the worst IV error
+    on quotes carrying at least 0.05 premium.
+    """
+    results = []
+    for n in sizes:
+        chain = OptionChain(make_priced_chain(n, underlying_price, T, r))
+        true_iv = smile_iv(chain.strike, underlying_price)
+
+        def cold_solve():
+            chain.iv.fill(np.nan)
+            chain.solve_iv(underlying_price, T, r)
+
+        cold_seconds = _best_time(cold_solve)
+        cold_solve()
+        cold = dict(chain.iv_stats)
+        error = float(np.nanmax(np.abs(chain.iv - true_iv)[chain.ltp >= 0.05]))
+
+        # Next tick: quotes re-priced at a moved underlying, solve starts from these IVs.
+        moved = underlying_price * 1.001
+        chain.ltp[:] = black_scholes.price(chain.is_call, moved, chain.strike, T, r, true_iv)
+        previous = chain.iv.copy()
+
+        def warm_solve():
+            chain.iv[:] = previous
+            chain.solve_iv(moved, T, r)
+
+        warm_seconds = _best_time(warm_solve)
+        warm_solve()
+        results.append({
+            "options": len(chain),
+            "cold_us": cold_seconds * 1e6,
+            "warm_us": warm_seconds * 1e6,
+            "cold_iterations": cold["iterations"],
+            "warm_iterations": chain.iv_stats["iterations"],
+            "bisections": cold["bisections"],
+            "solved": chain.iv_stats["solved"],
+            "max_iv_error": error,
+        })
+    return results
+
+def benchmark_backtest(day_counts=(1, 5, 20)):
+    """
+    Times run_backtest_groupby against BacktestBars + run_bars on synthetic minute data
+    and checks the trade logs are identical.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for days in day_counts:
+            path = os.path.join(tmp, f"history_{days}.csv")
+            make_synthetic_history(days).to_csv(path, index=False)
+            start = time.perf_counter()
+            reference = run_backtest_groupby(path)
+            t_groupby = time.perf_counter() - start
+            start = time.perf_counter()
+            bars = BacktestBars.from_csv(path)
+            trade_logs, stats = run_bars(bars, anchor_time=config.TRADING_CONFIG["avwap_anchor_time"])
+            t_engine = time.perf_counter() - start
+            results.append({
+                "days": days,
+                "bars": stats["bars"],
+                "groupby_s": t_groupby,
+                "engine_s": t_engine,
+                "kernel_bars_per_sec": stats["bars_per_sec"],
+                "trades": len(trade_logs),
+                "match": trade_logs == reference,
+            })
+    return results
+
+def benchmark_avwap(instruments=(10, 200, 2000), batches=200):
+    """
+    Tracks the AVWAP of every instrument through tick batches covering all of them:
+    per-instrument running sums updated in a Python loop (one calculator each, as
+    Strategy used to keep) versus one vectorized AVWAPEngine.update per batch.
+    """
+    rng = np.random.default_rng(0)
+    stamp = datetime.datetime(2024, 1, 2, 9, 30)
+    results = []
+    for n in instruments:
+        keys = np.arange(n) + 100000
+        prices = rng.uniform(1, 500, (batches, n))
+        volumes = rng.integers(1, 1000, (batches, n)).astype(float)
+        sums = {}
+        start = time.perf_counter()
+        for b in range(batches):
+            for key, price, volume in zip(keys.tolist(), prices[b].tolist(), volumes[b].tolist()):
+                pv, v = sums.get(key, (0.0, 0.0))
+                sums[key] = (pv + price * volume, v + volume)
+        loop_s = time.perf_counter() - start
+        engine = AVWAPEngine(["09:15"])
+        start = time.perf_counter()
+        for b in range(batches):
+            engine.update(keys, prices[b], volumes[b], stamp)
+        engine_s = time.perf_counter() - start
+        expected = np.array([sums[k][0] / sums[k][1] for k in keys.tolist()])
+        results.append({
+            "instruments": n,
+            "loop_us_per_batch": 1e6 * loop_s / batches,
+            "engine_us_per_batch": 1e6 * engine_s / batches,
+            "match": bool(np.allclose(engine.avwap(keys), expected, rtol=1e-12)),
+        })
+    return results
+
+def benchmark_store(days=250, strikes_per_side=5):
+    """
+    Writes a year of synthetic 1-minute chain history into a HistoricalStore and
+    times a full load, a column-pruned load and a filtered (CE-only, one week) load.
+    """
+    history = make_synthetic_history(days, strikes_per_side)
+    first = history["Datetime"].iloc[0].strftime("%Y-%m-%d")
+    last = history["Datetime"].iloc[-1].strftime("%Y-%m-%d")
+    results = {"rows": len(history)}
+    with tempfile.TemporaryDirectory() as tmp:
+        store = HistoricalStore(tmp)
+        start = time.perf_counter()
+        store.write_frame(1660, "1m", history)
+        results["write_s"] = time.perf_counter() - start
+        cases = {
+            "full": dict(),
+            "columns": dict(columns=["Datetime", "OptionType", "LTP"]),
+            "filtered": dict(filters=[("OptionType", "==", "CE")], to_date=history["Datetime"].iloc[0] + pd.Timedelta(days=6)),
+        }
+        for name, kwargs in cases.items():
+            to_date = kwargs.pop("to_date", last)
+            start = time.perf_counter()
+            frame = store.read(1660, "1m", first, to_date, **kwargs)
+            results[f"{name}_s"] = time.perf_counter() - start
+            results[f"{name}_rows"] = len(frame)
+    return results
+
+def benchmark_leg_submission(rounds=20, latency=(0.02, 0.08), failure_rate=0.05):
+    """
+    Enters and exits an iron condor against FakeBrokerClient, sequentially and with
+    concurrent leg submission. Returns mean round-trip times and per-leg latency summaries.
+    """
+    trade_setup = {leg: {"ScripCode": i} for i, leg in enumerate(["long_call", "long_put", "short_call", "short_put"])}
+    results = {}
+    for concurrent in (False, True):
+        trading_config = dict(config.TRADING_CONFIG, concurrent_legs=concurrent, retry_backoff=0.01)
+        executor = OrderExecutor(FakeBrokerClient(latency, failure_rate, seed=1), trading_config, _NullLogger())
+        # The sequential path pays place_order's fixed 1s sleep on every rejection.
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            try:
+                executor.execute_iron_condor(trade_setup)
+                executor.exit_position(trade_setup)
+            except Exception:
+                pass
+            timings.append(time.perf_counter() - start)
+        results["concurrent" if concurrent else "sequential"] = {
+            "mean_round_trip_ms": 1000 * sum(timings) / len(timings),
+            "legs": executor.get_leg_latency_report(),
+        }
+    return results
+
+def benchmark_logging(events=20000):
+    """
+    Caller-side cost of log_event: the previous open/append/close per event versus the
+    queued CSVLogger, plus the time until the background writer has flushed everything.
+    """
+    results = {"events": events}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sync.csv")
+        start = time.perf_counter()
+        for i in range(events):
+            with open(path, mode='a', newline='') as f:
+                csv.writer(f).writerow([datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "DATA_UPDATE", f"tick {i}", ""])
+        results["sync_us"] = 1e6 * (time.perf_counter() - start) / events
+
+        logger = CSVLogger(os.path.join(tmp, "async.csv"), os.path.join(tmp, "dashboard.csv"),
+                           queue_size=events, echo=False)
+        start = time.perf_counter()
+        for i in range(events):
+            logger.log_event("DATA_UPDATE", f"tick {i}")
+        results["async_us"] = 1e6 * (time.perf_counter() - start) / events
+        logger.close()
+        results["drained_s"] = time.perf_counter() - start
+        results.update(logger.stats)
+    return results
+
+def benchmark_dashboard_state(updates=20000):
+    """
+    Cost of one dashboard update: the previous truncate-and-rewrite of dashboard.csv
+    versus a publish to the memory-mapped state record, and the cost of one read.
+    """
+    results = {"updates": updates}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "dashboard.csv")
+        start = time.perf_counter()
+        for i in range(updates):
+            with open(path, mode='w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(["Timestamp", "Status", "PnL", "TradeDetails"])
+                writer.writerow([datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "Position Open", i, ""])
+        results["csv_us"] = 1e6 * (time.perf_counter() - start) / updates
+
+        state_path = os.path.join(tmp, "dashboard.state")
+        publisher = DashboardStatePublisher(state_path)
+        start = time.perf_counter()
+        for i in range(updates):
+            publisher.publish(status="Position Open", pnl=i, position=-1000, delta=0.1)
+        results["publish_us"] = 1e6 * (time.perf_counter() - start) / updates
+        reader = DashboardStateReader(state_path)
+        start = time.perf_counter()
+        for _ in range(updates):
+            snapshot = reader.read()
+        results["read_us"] = 1e6 * (time.perf_counter() - start) / updates
+        results["match"] = snapshot["pnl"] == updates - 1
+        reader.close()
+        publisher.close()
+    return results
+
+def benchmark_broker_session(legs=40, latency=0.005, threads=8, rate_limit=50.0, burst=5, requests=30):
+    """
+    BrokerSession against FakeBrokerClient: quotes for `legs` ScripCodes one request
+    each versus one batched get_quotes call, `threads` concurrent identical option
+    chain requests (coalesced into one), and `requests` calls through a token bucket
+    of rate_limit/s with bursts of `burst`.
+    """
+    chain = make_synthetic_chain(legs // 2)
+    codes = [opt["ScripCode"] for opt in chain]
+    unlimited = dict(rate_limit=1e9, burst=10**9)
+    results = {"legs": legs}
+
+    client = FakeBrokerClient(quote_latency=latency, option_chain=chain)
+    session = BrokerSession(client, **unlimited)
+    start = time.perf_counter()
+    single = {}
+    for code in codes:
+        single.update(session.get_quotes([code]))
+    results["single_ms"] = 1000 * (time.perf_counter() - start)
+    results["single_calls"] = client.calls["fetch_market_feed_scrip"]
+
+    client = FakeBrokerClient(quote_latency=latency, option_chain=chain)
+    session = BrokerSession(client, quote_batch_size=50, **unlimited)
+    start = time.perf_counter()
+    batched = session.get_quotes(codes)
+    results["batched_ms"] = 1000 * (time.perf_counter() - start)
+    results["batched_calls"] = client.calls["fetch_market_feed_scrip"]
+    results["match"] = single == batched and len(batched) == legs
+
+    client = FakeBrokerClient(quote_latency=0.05, option_chain=chain)
+    session = BrokerSession(client, **unlimited)
+    barrier = threading.Barrier(threads)
+    chains = []
+    def fetch():
+        barrier.wait()
+        chains.append(session.get_option_chain("N", "BANKNIFTY", "20240125"))
+    workers = [threading.Thread(target=fetch) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    results["threads"] = threads
+    results["chain_calls"] = client.calls["get_option_chain"]
+    results["coalesced"] = session.stats["coalesced"]
+    results["chains_match"] = len(chains) == threads and all(c == chain for c in chains)
+
+    client = FakeBrokerClient(option_chain=chain)
+    session = BrokerSession(client, rate_limit=rate_limit, burst=burst)
+    start = time.perf_counter()
+    for _ in range(requests):
+        session.get_quote("N", "BANKNIFTY")
+    results["requests"] = requests
+    results["throttled_s"] = time.perf_counter() - start
+    # The burst goes through at once, the rest at rate_limit per second
+    results["expected_s"] = (requests - burst) / rate_limit
+    results.update({f"session_{k}": v for k, v in session.get_stats().items()})
+    return results
+
+def benchmark_latency_recorder(spans=200000):
+    """
+    Cost of one instrumented span (mark() + record()) with the recorder enabled and
+    disabled, and of summary() over full ring buffers.
+    """
+    results = {"spans": spans}
+    for enabled in (True, False):
+        recorder = LatencyRecorder(["stage"], enabled=enabled)
+        start = time.perf_counter()
+        for _ in range(spans):
+            recorder.record("stage", recorder.mark())
+        results["enabled_ns" if enabled else "disabled_ns"] = 1e9 * (time.perf_counter() - start) / spans
+        if enabled:
+            results["summary_ms"] = 1000 * _best_time(recorder.summary)
+            results["summary"] = recorder.summary()["stage"]
+    return results
+
+def make_synthetic_ticks(chain, batches=2000, ticks_per_batch=20, seed=0):
+    """
+    Random tick batches (lists of ScripCode/LTP/Volume dicts) over the chain's contracts.
+    """
+    rng = np.random.default_rng(seed)
+    codes = [opt["ScripCode"] for opt in chain]
+    return [
+        [{"ScripCode": int(code), "LTP": float(abs(rng.normal(200, 80))), "Volume": float(rng.integers(1, 500))}
+         for code in rng.choice(codes, ticks_per_batch)]
+        for _ in range(batches)
+    ]
+
+def benchmark_runtime(batches=2000, ticks_per_batch=20, n_strikes=60, latency=(0.001, 0.002)):
+    """
+    Replays a synthetic tick stream through AsyncTradingRuntime (strategy, risk and
+    execution against FakeBrokerClient) with stage latency tracking on. Returns the
+    throughput and the per-stage latency summaries, including tick_to_trade.
+    """
+    trading_config = dict(config.TRADING_CONFIG, solve_iv=False, trading_end_time="23:59")
+    chain = make_synthetic_chain(n_strikes)
+    ticks = make_synthetic_ticks(chain, batches, ticks_per_batch)
+    clock = [datetime.datetime(2024, 1, 2, 9, 30)]
+    def now():
+        clock[0] += datetime.timedelta(seconds=1)
+        return clock[0]
+    logger = _NullLogger()
+    recorder = LatencyRecorder(LATENCY_STAGES)
+    runtime = AsyncTradingRuntime(
+        LocalMarket(chain, 48000.0, config.UNDERLYING_SCRIP_CODE), ReplayTickSource(ticks),
+        Strategy(trading_config), RiskManager(trading_config, logger),
+        OrderExecutor(FakeBrokerClient(latency, seed=1), trading_config, logger), logger, trading_config,
+        now=now, expiry_datetime=datetime.datetime.now() + datetime.timedelta(days=20), latency=recorder
+    )
+    start = time.perf_counter()
+    stats = asyncio.run(runtime.run())
+    elapsed = time.perf_counter() - start
+    return dict(stats, seconds=elapsed, ticks_per_sec=stats["ticks"] / elapsed, stages=recorder.summary())
+
+def _print_select_strikes(rows):
+    print(f"{'strikes':>8} {'scalar us':>12} {'vector us':>12} {'prebuilt us':>12} {'speedup':>8} match")
+    for row in rows:
+        print(f"{row['strikes']:>8} {row['scalar_us']:>12.1f} {row['vectorized_us']:>12.1f} "
+              f"{row['prebuilt_us']:>12.1f} {row['speedup']:>7.1f}x {row['match']}")
+
+def _print_iv_solver(rows):
+    for row in rows:
+        print(f"iv solve {row['options']:>6} options  cold {row['cold_us']:9.1f}us ({row['cold_iterations']} it, "
+              f"{row['bisections']} bisections)  warm {row['warm_us']:9.1f}us ({row['warm_iterations']} it)  "
+              f"solved={row['solved']} max_err={row['max_iv_error']:.1e}")
+
+def _print_backtest(rows):
+    for row in rows:
+        print(f"backtest {row['days']:>3} days {row['bars']:>6} bars  groupby {row['groupby_s']:7.3f}s  "
+              f"engine {row['engine_s']:7.3f}s  kernel {row['kernel_bars_per_sec']:,.0f} bars/sec  "
+              f"trades={row['trades']} match={row['match']}")
+
+def _print_avwap(rows):
+    for row in rows:
+        print(f"avwap {row['instruments']:>5} instruments: loop {row['loop_us_per_batch']:9.1f}us/batch  "
+              f"engine {row['engine_us_per_batch']:7.1f}us/batch  match={row['match']}")
+
+def _print_store(store):
+    print(f"store: {store['rows']:,} rows written in {store['write_s']:.2f}s; "
+          f"full load {store['full_s']:.3f}s, 3 columns {store['columns_s']:.3f}s, "
+          f"CE-only week {store['filtered_s']:.3f}s ({store['filtered_rows']:,} rows)")
+
+def _print_leg_submission(results):
+    for mode, row in results.items():
+        print(f"{mode:>10}: mean entry+exit {row['mean_round_trip_ms']:.1f} ms")
+        for leg, summary in sorted(row["legs"].items()):
+            print(f"{'':>12}{leg:<11} n={summary['count']:<3} p50={summary['p50_ms']}ms "
+                  f"p99={summary['p99_ms']}ms max={summary['max_ms']:.1f}ms")
+
+def _print_logging(row):
+    print(f"logging {row['events']:,} events: sync {row['sync_us']:.1f}us/event, queued {row['async_us']:.1f}us/event, "
+          f"all written after {row['drained_s']:.2f}s in {row['batches']} batches (dropped={row['dropped']})")
+
+def _print_dashboard_state(row):
+    print(f"dashboard {row['updates']:,} updates: csv rewrite {row['csv_us']:.1f}us, mmap publish "
+          f"{row['publish_us']:.1f}us, read {row['read_us']:.1f}us (match={row['match']})")
+
+def _print_broker_session(row):
+    print(f"broker quotes for {row['legs']} legs: one request per leg {row['single_ms']:.1f}ms ({row['single_calls']} calls), "
+          f"batched {row['batched_ms']:.1f}ms ({row['batched_calls']} calls, match={row['match']})")
+    print(f"broker {row['threads']} concurrent chain requests -> {row['chain_calls']} API call(s), "
+          f"{row['coalesced']} coalesced (match={row['chains_match']})")
+    print(f"broker {row['requests']} rate-limited requests in {row['throttled_s']:.2f}s (expected {row['expected_s']:.2f}s), "
+          f"throttled={row['session_throttled']} waited {row['session_wait_s']:.2f}s")
+
+def _print_latency_recorder(row):
+    print(f"latency span: enabled {row['enabled_ns']:.0f}ns, disabled {row['disabled_ns']:.0f}ns, "
+          f"summary {row['summary_ms']:.2f}ms ({row['summary']})")
+
+def _print_runtime(row):
+    print(f"runtime {row['ticks']:,} ticks in {row['seconds']:.2f}s ({row['ticks_per_sec']:,.0f} ticks/sec), "
+          f"{row['wakeups']} wakeups, {row['orders']} orders")
+    for stage, summary in row["stages"].items():
+        print(f"{'':>8}{stage:<20} n={summary['count']:<5} p50={summary['p50_ms']:.3f}ms "
+              f"p99={summary['p99_ms']:.3f}ms max={summary['max_ms']:.3f}ms")
+
+# Offline suite: synthetic chains, bars and tick streams; fixed seeds throughout.
+SUITE = [
+    ("select_strikes", benchmark_select_strikes, _print_select_strikes),
+    ("iv_solver", benchmark_iv_solver, _print_iv_solver),
+    ("backtest", benchmark_backtest, _print_backtest),
+    ("avwap", benchmark_avwap, _print_avwap),
+    ("store", benchmark_store, _print_store),
+    ("leg_submission", benchmark_leg_submission, _print_leg_submission),
+    ("logging", benchmark_logging, _print_logging),
+    ("dashboard_state", benchmark_dashboard_state, _print_dashboard_state),
+    ("broker_session", benchmark_broker_session, _print_broker_session),
+    ("latency_recorder", benchmark_latency_recorder, _print_latency_recorder),
+    ("runtime", benchmark_runtime, _print_runtime),
+]
+
+if __name__ == "__main__":
+    sys.exit(bench_report.main(SUITE, description="Offline benchmarks for the Basic_version hot paths"))
@@ -0,0 +1,189 @@
+# black_scholes.py
+# Kept in sync with Advanced_Version/src/pricing/black_scholes.py (checked by tests/test_shared_modules.py)
+import numpy as np
+
+# Closed-form Black-Scholes kernels on NumPy arrays. Every function broadcasts its
+# arguments, so the same call prices one option or a whole chain.
+# Conventions follow the broker/py_vollib ones: vega per 1 vol point (0.01),
+# theta per calendar day, time to expiry T in years.
+
+_SQRT_2PI = np.sqrt(2 * np.pi)
+
+# Hart (1968) rational approximation of the normal tail; absolute error below 1e-16.
+_HART_P = (0.0352624965998911, 0.700383064443688, 6.37396220353165, 33.912866078383,
+           112.079291497871, 221.213596169931, 220.206867912376)
+_HART_Q = (0.0883883476483184, 1.75566716318264, 16.064177579207, 86.7807322029461,
+           296.564248779674, 637.333633378831, 793.826512519948, 440.413735824752)
+
+def norm_pdf(x):
+    return np.exp(-0.5 * np.square(x)) / _SQRT_2PI
+
+def norm_cdf(x):
+    """
+    Standard normal CDF without scipy.
+    N(x) = erfc(-x / sqrt(2)) / 2, with the tail evaluated by Hart's rational
+    approximation (|x| < 7.07) or a continued fraction beyond it.
+    Infinite x (d1 at expiry) maps to 0 or 1 without warnings; NaN stays NaN.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    # Past 37 the tail is 0 anyway; clipping keeps inf out of the polynomials.
+    z = np.minimum(np.abs(x), 38.0).reshape(-1)
+    num = np.full_like(z, _HART_P[0])
+    for c in _HART_P[1:]:
+        num *= z
+        num += c
+    den = np.full_like(z, _HART_Q[0])
+    for c in _HART_Q[1:]:
+        den *= z
+        den += c
+    tail = np.exp(-0.5 * z * z)
+    tail *= num
+    tail /= den
+    far = z >= 7.07106781186547
+    if far.any():
+        zf = z[far]
+        fraction = zf + 0.65
+        for k in (4.0, 3.0, 2.0, 1.0):
+            fraction = zf + k / fraction
+        tail[far] = np.where(zf > 37.0, 0.0, np.exp(-0.5 * zf * zf) / fraction / _SQRT_2PI)
+    tail = tail.reshape(x.shape)
+    return np.where(x > 0, 1.0 - tail, tail)[()]
+
+def _as_is_call(option_type):
+    """
+    Accepts a bool (array) or 'call'/'put'/'CE'/'PE' (array) and returns a bool array.
+    """
+    if isinstance(option_type, str):
+        return option_type.lower() in ("call", "ce", "c")
+    option_type = np.asarray(option_type)
+    if option_type.dtype == bool:
+        return option_type
+    return np.isin(np.char.lower(option_type.astype(str)), ("call", "ce", "c"))
+
+def d1_d2(S, K, T, r, sigma):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        vol_sqrt_t = sigma * np.sqrt(T)
+        d1 = (np.log(S / K) + (r + 0.5 * np.square(sigma)) * T) / vol_sqrt_t
+    return d1, d1 - vol_sqrt_t
+
+def price(option_type, S, K, T, r, sigma):
+    """
+    Option premium. At or after expiry (T <= 0) the intrinsic value is returned.
+    """
+    is_call = _as_is_call(option_type)
+    d1, d2 = d1_d2(S, K, T, r, sigma)
+    discount = K * np.exp(-r * np.maximum(T, 0))
+    call = S * norm_cdf(d1) - discount * norm_cdf(d2)
+    # Put via put-call parity, so only two CDF evaluations are needed
+    value = np.where(is_call, call, call - S + discount)
+    intrinsic = np.where(is_call, np.maximum(S - K, 0.0), np.maximum(K - S, 0.0))
+    return np.where(np.asarray(T) > 0, value, intrinsic)
+
+def delta(option_type, S, K, T, r, sigma):
+    """
+    Signed delta (calls in [0, 1], puts in [-1, 0]). At expiry (T == 0) it is the
+    exercise indicator, 1/0 for calls and 0/-1 for puts, and NaN only when S == K;
+    NaN after expiry (T < 0).
+    """
+    d1, _ = d1_d2(S, K, T, r, sigma)
+    n_d1 = norm_cdf(d1)
+    return np.where(_as_is_call(option_type), n_d1, n_d1 - 1.0)
+
+def gamma(S, K, T, r, sigma):
+    d1, _ = d1_d2(S, K, T, r, sigma)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return norm_pdf(d1) / (S * sigma * np.sqrt(T))
+
+def vega(S, K, T, r, sigma):
+    d1, _ = d1_d2(S, K, T, r, sigma)
+    return S * norm_pdf(d1) * np.sqrt(T) / 100
+
+def theta(option_type, S, K, T, r, sigma):
+    d1, d2 = d1_d2(S, K, T, r, sigma)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        decay = -S * norm_pdf(d1) * sigma / (2 * np.sqrt(T))
+    carry = r * K * np.exp(-r * T)
+    cdf_d2 = norm_cdf(d2)
+    return np.where(_as_is_call(option_type), decay - carry * cdf_d2, decay + carry * (1.0 - cdf_d2)) / 365
+
+def greeks(option_type, S, K, T, r, sigma):
+    """
+    Delta, gamma, theta and vega in one pass (d1, d2 and the densities are shared).
+    Returns a dict of arrays. At expiry delta is as in delta(), vega 0 and gamma and
+    theta NaN.
+    """
+    is_call = _as_is_call(option_type)
+    d1, d2 = d1_d2(S, K, T, r, sigma)
+    pdf_d1 = norm_pdf(d1)
+    cdf_d1 = norm_cdf(d1)
+    cdf_d2 = norm_cdf(d2)
+    sqrt_t = np.sqrt(T)
+    carry = r * K * np.exp(-r * T)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        decay = -S * pdf_d1 * sigma / (2 * sqrt_t)
+        gamma_ = pdf_d1 / (S * sigma * sqrt_t)
+    return {
+        "delta": np.where(is_call, cdf_d1, cdf_d1 - 1.0),
+        "gamma": gamma_,
+        "theta": np.where(is_call, decay - carry * cdf_d2, decay + carry * (1.0 - cdf_d2)) / 365,
+        "vega": S * pdf_d1 * sqrt_t / 100,
+    }
+
+def implied_volatility(option_price, option_type, S, K, T, r, initial=0.2, tol=1e-6, max_iter=50,
+                       lower=1e-4, upper=5.0, stats=None):
+    """
+    Vectorized implied volatility for a whole chain.
+    Each element takes a Newton step when it lands inside its current bracket
+    [lo, hi] and a bisection step otherwise (or when vega vanishes), so every
+    quote inside the no-arbitrage bounds converges. initial may be an array,
+    e.g. the previous tick's IVs, to warm-start; NaN entries start at 0.2.
+    tol is the absolute premium error. Returns NaN where the quote lies outside
+    the prices reachable with volatility in [lower, upper] or T <= 0.
+    If stats is a dict it is filled with iterations, solved, failed and bisections.
+    """
+    is_call = _as_is_call(option_type)
+    option_price, S, K, T, initial, is_call = np.broadcast_arrays(
+        *(np.asarray(a, dtype=np.float64) for a in (option_price, S, K, T, initial)), is_call)
+    shape = S.shape
+    option_price, S, K, T, initial, is_call = (a.reshape(-1) for a in (option_price, S, K, T, initial, is_call))
+    sigma = np.where(np.isfinite(initial) & (initial > lower) & (initial < upper), initial, 0.2)
+    sigma = np.array(sigma, dtype=np.float64)
+
+    # Quotes outside [price(lower), price(upper)] have no solution in the bracket.
+    reachable = (T > 0) & (option_price >= price(is_call, S, K, T, r, lower) - tol) & \
+                (option_price <= price(is_call, S, K, T, r, upper) + tol)
+    reachable &= np.isfinite(option_price)
+    lo = np.full(S.shape, lower)
+    hi = np.full(S.shape, upper)
+    active = reachable.copy()
+    iterations = bisections = 0
+    while iterations < max_iter and active.any():
+        iterations += 1
+        idx = np.flatnonzero(active)
+        s, k, t, c = sigma[idx], K[idx], T[idx], is_call[idx]
+        s_spot = S[idx]
+        d1, d2 = d1_d2(s_spot, k, t, r, s)
+        discount = k * np.exp(-r * t)
+        call = s_spot * norm_cdf(d1) - discount * norm_cdf(d2)
+        diff = np.where(c, call, call - s_spot + discount) - option_price[idx]
+        done = np.abs(diff) < tol
+
+        # Price is increasing in sigma, so the sign of diff tightens the bracket.
+        hi[idx] = np.where(diff > 0, s, hi[idx])
+        lo[idx] = np.where(diff < 0, s, lo[idx])
+        v = s_spot * norm_pdf(d1) * np.sqrt(t)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            newton = s - diff / v
+        inside = np.isfinite(newton) & (newton > lo[idx]) & (newton < hi[idx])
+        bisections += int(np.count_nonzero(~inside & ~done))
+        step = np.where(inside, newton, 0.5 * (lo[idx] + hi[idx]))
+        sigma[idx] = np.where(done, s, step)
+        active[idx[done]] = False
+
+    sigma[~reachable | active] = np.nan
+    if stats is not None:
+        stats["iterations"] = iterations
+        stats["solved"] = int(np.count_nonzero(reachable & ~active))
+        stats["failed"] = int(S.size - stats["solved"])
+        stats["bisections"] = bisections
+    return sigma.reshape(shape)[()]
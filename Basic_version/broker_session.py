@@ -0,0 +1,195 @@
+# broker_session.py
+import threading
+import time
+from concurrent.futures import Future
+import config
+
+def login(api_config):
+    """
+    Creates a FivePaisaClient and authenticates it with a TOTP read from stdin.
+    """
+    # Ensure you have installed the 5paisa SDK from https://github.com/OpenApi-5p/py5paisa
+    # (imported here so offline runs with the fake broker or stored data need no SDK).
+    from py5paisa import FivePaisaClient
+    client = FivePaisaClient(cred=config.Cred)
+    TOTP = input("Enter TOTP:")
+    client.get_totp_session(
+        api_config.get("CLIENT_CODE", "YourClientCode"),
+        TOTP,
+        api_config.get("PIN", "YourPin"),
+    )
+    return client
+
+class RateLimitTimeout(Exception):
+    """
+    Raised by TokenBucket.acquire when the next token is due only after the timeout.
+    """
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` requests per second on average, bursts of up to
+    `burst`. acquire() reserves a token and sleeps until it is due, so waiting callers
+    are served in arrival order.
+    """
+    def __init__(self, rate, burst, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=None):
+        """
+        Takes one token; returns the seconds spent waiting for it. With a timeout, a
+        token that would only be due later is not taken and RateLimitTimeout is raised
+        right away instead of sleeping.
+        """
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = (1 - self._tokens) / self.rate if self._tokens < 1 else 0.0
+            if timeout is not None and wait > timeout:
+                raise RateLimitTimeout(f"Rate limit: next token in {wait:.3f}s, exceeds {timeout:.3f}s")
+            self._tokens -= 1
+        if wait > 0:
+            self.sleep(wait)
+        return wait
+
+class BrokerSession:
+    """
+    Process-wide gateway to the broker API around one authenticated client.
+    Every request goes through a token bucket (rate_limit requests/second, bursts of
+    burst). Identical read requests issued concurrently are coalesced: the first
+    caller performs the request and the others wait for and share its result.
+    Orders are never coalesced and draw on their own bucket (order_rate_limit,
+    order_burst), so they never queue behind reads; with a deadline an order fails
+    fast with RateLimitTimeout instead of waiting past it. get_quotes fetches many
+    ScripCodes with one market-feed request per quote_batch_size codes.
+    stats counts requests, coalesced calls, throttled requests and their wait time,
+    requests refused by the rate limit, errors, and batched quotes.
+    """
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, client, rate_limit=10.0, burst=10, quote_batch_size=50, order_rate_limit=5.0, order_burst=4):
+        self.client = client
+        self.bucket = TokenBucket(rate_limit, burst)
+        self.order_bucket = TokenBucket(order_rate_limit, order_burst)
+        self.quote_batch_size = quote_batch_size
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "coalesced": 0, "throttled": 0, "wait_s": 0.0,
+                      "rate_limited": 0, "errors": 0, "quote_batches": 0, "quotes": 0}
+
+    @classmethod
+    def shared(cls, client_factory=None):
+        """
+        The process-wide session, created on first use from client_factory()
+        (default: login(config.API_CONFIG)) with the BROKER_* settings in config.
+        """
+        with cls._shared_lock:
+            if cls._shared is None:
+                client = client_factory() if client_factory else login(config.API_CONFIG)
+                cls._shared = cls(client, config.BROKER_RATE_LIMIT, config.BROKER_BURST,
+                                  config.BROKER_QUOTE_BATCH_SIZE, config.BROKER_ORDER_RATE_LIMIT,
+                                  config.BROKER_ORDER_BURST)
+            return cls._shared
+
+    @classmethod
+    def reset_shared(cls):
+        with cls._shared_lock:
+            cls._shared = None
+
+    def _request(self, method, *args, bucket=None, timeout=None):
+        try:
+            wait = (bucket or self.bucket).acquire(timeout)
+        except RateLimitTimeout:
+            with self._lock:
+                self.stats["rate_limited"] += 1
+            raise
+        with self._lock:
+            self.stats["requests"] += 1
+            if wait > 0:
+                self.stats["throttled"] += 1
+                self.stats["wait_s"] += wait
+        try:
+            return getattr(self.client, method)(*args)
+        except Exception:
+            with self._lock:
+                self.stats["errors"] += 1
+            raise
+
+    def _coalesced(self, method, *args):
+        key = (method, repr(args))
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+            else:
+                self.stats["coalesced"] += 1
+        if not leader:
+            return future.result()
+        try:
+            result = self._request(method, *args)
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def get_expiry(self, exchange, symbol):
+        return self._coalesced("get_expiry", exchange, symbol)
+
+    def get_option_chain(self, exchange, symbol, expiry):
+        return self._coalesced("get_option_chain", exchange, symbol, expiry)
+
+    def get_quote(self, exchange, symbol):
+        return self._coalesced("get_quote", exchange, symbol)
+
+    def historical_data(self, exchange, exchange_type, scrip_code, timeframe, from_date, to_date):
+        return self._coalesced("historical_data", exchange, exchange_type, scrip_code, timeframe, from_date, to_date)
+
+    def get_quotes(self, scrip_codes, exchange="N", exchange_type="D"):
+        """
+        Latest quotes for many ScripCodes, batched into market-feed requests.
+        Returns {scrip_code: quote dict}; codes missing from the response are left out.
+        """
+        codes = sorted(set(int(code) for code in scrip_codes))
+        quotes = {}
+        for i in range(0, len(codes), self.quote_batch_size):
+            batch = codes[i:i + self.quote_batch_size]
+            req_list = [{"Exch": exchange, "ExchType": exchange_type, "ScripCode": code} for code in batch]
+            response = self._coalesced("fetch_market_feed_scrip", req_list)
+            for quote in (response or {}).get("Data", []):
+                code = quote.get("Token", quote.get("ScripCode"))
+                if code is not None:
+                    quotes[int(code)] = quote
+            with self._lock:
+                self.stats["quote_batches"] += 1
+                self.stats["quotes"] += len(batch)
+        return quotes
+
+    def positions(self):
+        return self._coalesced("positions")
+
+    def place_order(self, order_details, deadline=None):
+        """
+        Submits an order through the order bucket. deadline (time.monotonic()) bounds
+        the wait for a token: RateLimitTimeout is raised if it would run past it.
+        """
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        return self._request("place_order", order_details, bucket=self.order_bucket, timeout=timeout)
+
+    def subscribe_ticks(self, instruments, callback):
+        return self.client.subscribe_ticks(instruments, callback)
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self.stats)
@@ -0,0 +1,160 @@
+# checkpoint.py
+import glob
+import os
+import pickle
+import struct
+import threading
+import time
+import zlib
+
+_FRAME = struct.Struct("<II")  # payload length, crc32
+_CHECKPOINT = "checkpoint.bin"
+
+def _frame(payload):
+    return _FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+
+def _read_frames(data):
+    """
+    Yields the payloads of consecutive frames, stopping at the first truncated or
+    corrupt one (a crash mid-append leaves at most one partial frame at the end).
+    """
+    offset = 0
+    while offset + _FRAME.size <= len(data):
+        length, crc = _FRAME.unpack_from(data, offset)
+        payload = data[offset + _FRAME.size:offset + _FRAME.size + length]
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            return
+        yield payload
+        offset += _FRAME.size + length
+
+class CheckpointStore:
+    """
+    Crash recovery for live session state: periodic binary checkpoints plus a
+    write-ahead journal of the events applied since the last one.
+
+    Layout under directory:
+      checkpoint.bin      latest checkpoint: one CRC-framed pickle of the state dict
+      journal.<n>.bin     journal segments of CRC-framed pickled records
+
+    checkpoint(state) closes the current journal segment and starts the next one,
+    then hands the state to a background thread, which writes it to a temporary
+    file, fsyncs it and renames it over checkpoint.bin. Only then are the segments
+    before it deleted, so a crash at any point leaves a checkpoint plus every
+    journal record written after it. The caller only pays for the segment switch.
+    append() writes one record and flushes it to the OS, which survives a process
+    crash; durable=True also fsyncs (for rare events such as fills).
+    restore() returns (state, records): the last checkpoint (or None) and the
+    journal records written after it, oldest first.
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._journal = None
+        self._segment = None
+        self._pending = None
+        self._cond = threading.Condition()
+        self._closed = False
+        self._writer = None
+        self.stats = {"records": 0, "checkpoints": 0, "checkpoint_bytes": 0, "checkpoint_ms": 0.0}
+
+    def _segment_path(self, segment):
+        return os.path.join(self.directory, f"journal.{segment:08d}.bin")
+
+    def _segments(self):
+        paths = glob.glob(os.path.join(self.directory, "journal.*.bin"))
+        return sorted(int(os.path.basename(p).split(".")[1]) for p in paths)
+
+    def restore(self):
+        path = os.path.join(self.directory, _CHECKPOINT)
+        state = None
+        segment = 0
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                frames = list(_read_frames(f.read()))
+            if frames:
+                segment, state = pickle.loads(frames[0])
+        records = []
+        for n in self._segments():
+            if n < segment:
+                continue
+            with open(self._segment_path(n), "rb") as f:
+                records.extend(pickle.loads(payload) for payload in _read_frames(f.read()))
+        return state, records
+
+    def open(self):
+        """
+        Starts a fresh journal segment after the existing ones and the writer thread.
+        """
+        segments = self._segments()
+        self._start_segment(segments[-1] + 1 if segments else 1)
+        self._writer = threading.Thread(target=self._run, name="checkpoint-writer", daemon=True)
+        self._writer.start()
+
+    def _start_segment(self, segment):
+        if self._journal is not None:
+            self._journal.close()
+        self._segment = segment
+        self._journal = open(self._segment_path(segment), "ab")
+
+    def append(self, record, durable=False):
+        self._journal.write(_frame(pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)))
+        self._journal.flush()
+        if durable:
+            os.fsync(self._journal.fileno())
+        self.stats["records"] += 1
+
+    def checkpoint(self, state):
+        """
+        Schedules a checkpoint of state, which must not be mutated afterwards (pass
+        copies). Records appended from now on go to the next journal segment.
+        If the writer is still busy, a pending older checkpoint is replaced.
+        """
+        self._start_segment(self._segment + 1)
+        with self._cond:
+            self._pending = (self._segment, state)
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                if self._pending is None:
+                    return
+                segment, state = self._pending
+                self._pending = None
+            self._write_checkpoint(segment, state)
+
+    def _write_checkpoint(self, segment, state):
+        start = time.perf_counter()
+        data = _frame(pickle.dumps((segment, state), protocol=pickle.HIGHEST_PROTOCOL))
+        path = os.path.join(self.directory, _CHECKPOINT)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        # The checkpoint covers every segment before its own
+        for n in self._segments():
+            if n < segment:
+                os.remove(self._segment_path(n))
+        self.stats["checkpoints"] += 1
+        self.stats["checkpoint_bytes"] = len(data)
+        self.stats["checkpoint_ms"] = 1000 * (time.perf_counter() - start)
+
+    def close(self, state=None):
+        """
+        Writes a final checkpoint of state (if given), waits for the writer and
+        closes the journal.
+        """
+        if state is not None:
+            self.checkpoint(state)
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._writer is not None:
+            self._writer.join()
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
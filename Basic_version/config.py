@@ -34,20 +34,52 @@ TRADING_CONFIG = {
     "lot_size": 25,               # Bank Nifty option lot size
     "num_lots": 1,                # Number of lots to trade
     "max_retries": 3,             # Maximum number of order placement retries
+    "concurrent_legs": True,      # Submit iron condor legs in parallel (hedges, then shorts)
+    "leg_deadline": 5.0,          # Seconds each leg may spend retrying before it is failed
+    "leg_settle_timeout": 30.0,   # Seconds to wait for a timed-out leg's in-flight request to return
+    "retry_backoff": 0.2,         # Base retry backoff in seconds (exponential, jittered)
     "avwap_anchor_time": "09:15", # Time (HH:MM) to anchor the VWAP (typically market open)
+    "chain_avwap": False,         # Also track the AVWAP of every option in the chain (Strategy.chain_avwap)
+    "short_delta": 0.04,          # Target delta for the short call/put legs
+    "long_delta": 0.02,           # Target delta for the long (hedge) call/put legs
+    "solve_iv": True,             # Solve each strike's IV from its LTP for strike selection (else fixed sigma)
     "data_update_interval": 1,    # Data update interval in seconds
     "check_exit_interval": 60,    # Interval in seconds to check exit conditions
+    "chain_max_staleness": 300,   # Seconds before the tick-patched option chain is fully refetched
+    "underlying_max_staleness": 5, # Seconds an underlying tick is trusted before the LTP is re-quoted
     "trading_start_time": "09:15",
-    "trading_end_time": "15:30"
+    "trading_end_time": "15:30",
+    "expiry_time": "15:30"         # Exchange close on the expiry date (HH:MM), when the contracts expire
 }
 
+UNDERLYING_SCRIP_CODE = 999920005  # BankNifty index ScripCode in the 5paisa tick feed
+
+# ------------------------------
+# Broker session (broker_session.py)
+# ------------------------------
+BROKER_RATE_LIMIT = 10.0        # Average market-data API requests per second across the process
+BROKER_BURST = 10               # Requests allowed back to back before throttling
+BROKER_QUOTE_BATCH_SIZE = 50    # ScripCodes per batched market-feed request
+BROKER_ORDER_RATE_LIMIT = 5.0   # Average orders per second, budgeted separately from the requests above
+BROKER_ORDER_BURST = 4          # Orders allowed back to back (all four iron condor legs)
+
 # ------------------------------
 # Files for Logging and Dashboard
 # ------------------------------
 LOG_FILE_PATH = "trade_log.csv"
 DASHBOARD_CSV_PATH = "dashboard.csv"
+DASHBOARD_STATE_PATH = "dashboard.state"  # Memory-mapped latest state (dashboard_state.py)
+LOG_QUEUE_SIZE = 10000          # Events buffered for the background log writer
+LOG_BATCH_SIZE = 256            # Rows written per batch
+LOG_FLUSH_INTERVAL = 1.0        # Seconds before a partial batch is flushed
+LOG_OVERFLOW_POLICY = "drop_oldest"  # "drop_oldest", "drop_newest" or "block" when the queue is full (only DATA_UPDATE is dropped)
+CHECKPOINT_DIR = "checkpoints"  # Session checkpoints and journal for warm restarts (checkpoint.py)
+CHECKPOINT_INTERVAL = 5.0       # Seconds between checkpoints
+LATENCY_TRACKING = True         # Time each live pipeline stage (latency.py); reported at session end
+LATENCY_BUFFER_SIZE = 4096      # Spans kept per stage for the p50/p99 report
 
 # ------------------------------
 # Backtesting configuration
 # ------------------------------
 BACKTEST_DATA_DIR = "historical_data"  # Directory containing historical CSV files
+BACKTEST_STORE_DIR = os.path.join(BACKTEST_DATA_DIR, "store")  # Partitioned column store (see historical_store.py)
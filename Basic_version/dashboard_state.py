@@ -0,0 +1,144 @@
+# dashboard_state.py
+# Kept in sync with Advanced_Version/src/utils/dashboard_state.py (checked by tests/test_shared_modules.py)
+import mmap
+import os
+import struct
+import time
+
+# Latest dashboard snapshot shared through a small memory-mapped file.
+# The file is a fixed header followed by one fixed-layout record:
+#   header: magic, layout version, record size, sequence number
+#   record: timestamp, pnl, position, underlying_price, delta, gamma, theta, vega,
+#           status (32 bytes), details (256 bytes)
+# The writer makes the sequence odd, overwrites the record in place and makes it
+# even again (a seqlock), so a publish is two struct writes and a copy into shared
+# memory, and a reader that copies the record between two equal, even sequence
+# numbers is guaranteed an untorn snapshot.
+
+_MAGIC = b"DASHSTAT"
+_VERSION = 1
+_HEADER = struct.Struct("<8sIIQ")
+_SEQUENCE = struct.Struct("<Q")
+_SEQUENCE_OFFSET = 16
+_RECORD = struct.Struct("<8d32s256s")
+
+NUMERIC_FIELDS = ("timestamp", "pnl", "position", "underlying_price", "delta", "gamma", "theta", "vega")
+TEXT_FIELDS = ("status", "details")
+FIELDS = NUMERIC_FIELDS + TEXT_FIELDS
+
+_SIZE = _HEADER.size + _RECORD.size
+
+def _encode(text, width):
+    data = str(text).encode("utf-8")[:width]
+    # Do not leave half a multi-byte character at the cut
+    return data.decode("utf-8", errors="ignore").encode("utf-8")
+
+class DashboardStatePublisher:
+    """
+    Writer side; owned by the trading process. publish() merges the given fields
+    into the last snapshot (fields not given keep their previous values), stamps it
+    and writes it in place. There must be a single publisher per file.
+    """
+    def __init__(self, path):
+        self.path = path
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size != _SIZE:
+                os.ftruncate(fd, _SIZE)
+            self._mm = mmap.mmap(fd, _SIZE)
+        finally:
+            os.close(fd)
+        magic, version, record_size, sequence = _HEADER.unpack_from(self._mm, 0)
+        # An odd sequence means the previous writer died mid-publish; start over
+        if magic != _MAGIC or version != _VERSION or record_size != _RECORD.size or sequence % 2:
+            sequence = 0
+            self._mm[:] = bytes(_SIZE)
+            _HEADER.pack_into(self._mm, 0, _MAGIC, _VERSION, _RECORD.size, 0)
+        # Continue from an existing file's sequence so readers never see it go backwards
+        self._sequence = sequence
+        self._state = dict.fromkeys(NUMERIC_FIELDS, float("nan"))
+        self._state.update(status="", details="")
+
+    def publish(self, **fields):
+        unknown = set(fields) - set(FIELDS)
+        if unknown:
+            raise Exception(f"Unknown dashboard fields: {sorted(unknown)}")
+        state = self._state
+        state.update(fields)
+        state["timestamp"] = fields.get("timestamp", time.time())
+        record = _RECORD.pack(*(float(state[name]) for name in NUMERIC_FIELDS),
+                              _encode(state["status"], 32), _encode(state["details"], 256))
+        mm = self._mm
+        _SEQUENCE.pack_into(mm, _SEQUENCE_OFFSET, self._sequence + 1)
+        mm[_HEADER.size:] = record
+        self._sequence += 2
+        _SEQUENCE.pack_into(mm, _SEQUENCE_OFFSET, self._sequence)
+
+    @property
+    def sequence(self):
+        return self._sequence
+
+    def close(self):
+        if not self._mm.closed:
+            self._mm.close()
+
+class DashboardStateReader:
+    """
+    Reader side; any number of processes may read while the publisher writes.
+    read() returns the latest snapshot as a dict (with its "sequence"), or None when
+    nothing has been published yet. A read that overlaps a publish is retried,
+    yielding the CPU in between (the publisher may be descheduled mid-write), for up
+    to timeout seconds.
+    """
+    def __init__(self, path, timeout=1.0):
+        self.path = path
+        self.timeout = timeout
+        self._mm = None
+
+    def _map(self):
+        if self._mm is None:
+            if not os.path.exists(self.path) or os.path.getsize(self.path) < _SIZE:
+                return None
+            with open(self.path, "rb") as f:
+                self._mm = mmap.mmap(f.fileno(), _SIZE, access=mmap.ACCESS_READ)
+        return self._mm
+
+    def sequence(self):
+        """
+        Current sequence number (0 before the first publish); cheap change detection.
+        """
+        mm = self._map()
+        return 0 if mm is None else _SEQUENCE.unpack_from(mm, _SEQUENCE_OFFSET)[0]
+
+    def read(self):
+        mm = self._map()
+        if mm is None:
+            return None
+        magic, version, record_size, _ = _HEADER.unpack_from(mm, 0)
+        if magic != _MAGIC or version != _VERSION or record_size != _RECORD.size:
+            return None
+        deadline = None
+        while True:
+            before = _SEQUENCE.unpack_from(mm, _SEQUENCE_OFFSET)[0]
+            if not before % 2:
+                record = mm[_HEADER.size:_SIZE]
+                if _SEQUENCE.unpack_from(mm, _SEQUENCE_OFFSET)[0] == before:
+                    break
+            if deadline is None:
+                deadline = time.monotonic() + self.timeout
+            elif time.monotonic() > deadline:
+                raise Exception("Dashboard state kept changing while being read")
+            time.sleep(0)
+        if before == 0:
+            return None
+        values = _RECORD.unpack(record)
+        snapshot = dict(zip(NUMERIC_FIELDS, values[:len(NUMERIC_FIELDS)]))
+        for name, raw in zip(TEXT_FIELDS, values[len(NUMERIC_FIELDS):]):
+            snapshot[name] = raw.rstrip(b"\0").decode("utf-8", errors="ignore")
+        snapshot["sequence"] = before
+        return snapshot
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
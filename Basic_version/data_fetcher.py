@@ -1,30 +1,38 @@
 # data_fetcher.py
 import datetime
+import threading
+import time
 import config
-# Ensure you have installed the 5paisa SDK from https://github.com/OpenApi-5p/py5paisa
-from py5paisa import FivePaisaClient
+from broker_session import BrokerSession, login
+from option_chain import OptionChain
 
 class DataFetcher:
-    def __init__(self, api_config):
-        """
-        Initialize the FivePaisaClient using TOTP-based authentication.
-        """
-        # Build the credentials dictionary required by the 5paisa SDK
-        cred = config.Cred
-        # Instantiate the 5paisa client with credentials.
-        self.client = FivePaisaClient(cred=cred)
-        # Perform TOTP-based authentication.
-        TOTP= input("Enter TOTP:")
-        self.client.get_totp_session(
-            api_config.get("CLIENT_CODE", "YourClientCode"),
-            TOTP,
-            api_config.get("PIN", "YourPin"),
-        )
+    def __init__(self, api_config, session=None):
+        """
+        Uses the process-wide BrokerSession (logging in via TOTP on first use) unless
+        a session is given. self.client is the session, so everything sharing it
+        (orders, backtest downloads) goes through the same rate limit.
+        """
+        self.session = session or BrokerSession.shared(lambda: login(api_config))
+        self.client = self.session
 
         self.latest_option_chain = None
         self.latest_expiry = None
         self.underlying_price = None
 
+        # Cached chain patched in place from the tick feed; see get_option_chain.
+        self.max_staleness = config.TRADING_CONFIG.get("chain_max_staleness", 300)
+        # The underlying moves the ATM strike; its last tick goes stale much sooner.
+        self.underlying_max_staleness = config.TRADING_CONFIG.get("underlying_max_staleness", 5)
+        self.chain_stats = {"hits": 0, "patches": 0, "refetches": 0}
+        self._chain_lock = threading.Lock()
+        self._chain_fetched_at = None
+        self._chain_date = None
+        self._streaming = False
+        self._stream_callback = self.apply_ticks
+        self._subscribed = set()
+        self._underlying_tick_at = None
+
     def get_latest_monthly_expiry(self):
         """
         Fetch available BankNifty expiries and select the monthly expiry
@@ -44,30 +52,141 @@ class DataFetcher:
         self.latest_expiry = monthly_expiry
         return monthly_expiry
 
-    def get_option_chain(self):
+    def get_option_chain(self, force_refresh=False):
         """
-        Retrieves the full option chain for BankNifty for the latest expiry.
+        Returns the BankNifty option chain for the latest expiry as a columnar OptionChain.
+        While the tick stream is running the cached chain is patched in place by apply_ticks,
+        so a full refetch only happens on expiry rollover, a new trading day, when the cache
+        is older than chain_max_staleness, or when force_refresh is set.
         """
-        if self.latest_expiry is None:
+        with self._chain_lock:
+            if not force_refresh and not self._chain_needs_refetch():
+                self.chain_stats["hits"] += 1
+                return self.latest_option_chain
+
+        today = datetime.date.today()
+        if self.latest_expiry is None or self.latest_expiry < today:
             self.get_latest_monthly_expiry()
         if self.latest_expiry is None:
             raise Exception("No valid monthly expiry found.")
 
-        chain = self.client.get_option_chain("N", "BANKNIFTY", self.latest_expiry.strftime("%d-%b-%Y"))
-        self.latest_option_chain = chain
+        records = self.client.get_option_chain("N", "BANKNIFTY", self.latest_expiry.strftime("%d-%b-%Y"))
+        chain = OptionChain(records)
+        with self._chain_lock:
+            self.latest_option_chain = chain
+            self._chain_fetched_at = time.monotonic()
+            self._chain_date = today
+            self.chain_stats["refetches"] += 1
+        if self._streaming:
+            # Strikes may have been listed; subscribe only those. Ticks for delisted
+            # ScripCodes no longer match a chain row and are ignored by apply_ticks.
+            new = [code for code in self._stream_instruments() if code not in self._subscribed]
+            if new:
+                self.subscribe_tick_data(new, self._stream_callback)
         return chain
 
+    def _chain_needs_refetch(self):
+        if self.latest_option_chain is None or self._chain_fetched_at is None:
+            return True
+        today = datetime.date.today()
+        if self._chain_date != today or (self.latest_expiry is not None and self.latest_expiry < today):
+            return True
+        if not self._streaming:
+            # Without ticks the cache can only be trusted for a single poll.
+            return True
+        return time.monotonic() - self._chain_fetched_at > self.max_staleness
+
+    def _underlying_is_fresh(self):
+        return (self._streaming and self._underlying_tick_at is not None
+                and time.monotonic() - self._underlying_tick_at <= self.underlying_max_staleness)
+
+    def needs_refetch(self):
+        """
+        True when the next get_option_chain or get_underlying_price call would go to
+        the broker instead of being served from the tick-patched cache.
+        """
+        with self._chain_lock:
+            return self._chain_needs_refetch() or not self._underlying_is_fresh()
+
     def get_underlying_price(self):
         """
         Retrieves the current BankNifty underlying price (LTP).
+        Served from the tick stream when it has delivered an underlying tick within the
+        last underlying_max_staleness seconds.
         """
+        with self._chain_lock:
+            if self._underlying_is_fresh():
+                self.chain_stats["hits"] += 1
+                return self.underlying_price
         quote = self.client.get_quote("N", "BANKNIFTY")
         self.underlying_price = float(quote.get("LTP", 0))
         return self.underlying_price
 
+    def start_chain_stream(self, callback=None):
+        """
+        Subscribes the cached chain's ScripCodes (and the underlying) to the tick feed
+        so that subsequent get_option_chain calls are served from the patched cache.
+        By default ticks go straight to apply_ticks; a custom callback (e.g. the asyncio
+        runtime's feed) becomes responsible for calling apply_ticks itself.
+        """
+        if self.latest_option_chain is None:
+            self.get_option_chain()
+        self._streaming = True
+        self._stream_callback = callback or self.apply_ticks
+        self.subscribe_tick_data(self._stream_instruments(), self._stream_callback)
+
+    def _stream_instruments(self):
+        instruments = [code for code in self.latest_option_chain.scrip_code.tolist() if code >= 0]
+        instruments.append(config.UNDERLYING_SCRIP_CODE)
+        return instruments
+
+    def apply_ticks(self, ticks):
+        """
+        Tick-feed callback: patches LTP/Volume of the cached chain rows in place.
+        Accepts a single tick dict or a list of them, keyed either by the REST names
+        (ScripCode, LTP, Volume) or the streaming ones (Token, LastRate, TotalQty).
+        """
+        if isinstance(ticks, dict):
+            ticks = [ticks]
+        with self._chain_lock:
+            chain = self.latest_option_chain
+            for tick in ticks:
+                scrip_code = tick.get("ScripCode", tick.get("Token"))
+                ltp = tick.get("LTP", tick.get("LastRate"))
+                if scrip_code == config.UNDERLYING_SCRIP_CODE:
+                    if ltp is not None:
+                        self.underlying_price = float(ltp)
+                        self._underlying_tick_at = time.monotonic()
+                    continue
+                if chain is None:
+                    continue
+                volume = tick.get("Volume", tick.get("TotalQty"))
+                if chain.update(scrip_code,
+                                float(ltp) if ltp is not None else None,
+                                float(volume) if volume is not None else None):
+                    self.chain_stats["patches"] += 1
+
+    def refresh_quotes(self, scrip_codes):
+        """
+        Fetches fresh quotes for the given ScripCodes in batched requests and applies
+        them to the cached chain (and the underlying). Returns the number of quotes.
+        """
+        quotes = self.session.get_quotes(scrip_codes)
+        self.apply_ticks([{"ScripCode": code, "LTP": quote.get("LastRate"), "Volume": quote.get("TotalQty")}
+                          for code, quote in quotes.items()])
+        return len(quotes)
+
+    def get_chain_stats(self):
+        """
+        Returns a copy of the cache counters: hits, patches and refetches.
+        """
+        with self._chain_lock:
+            return dict(self.chain_stats)
+
     def subscribe_tick_data(self, instruments, callback):
         """
         Subscribes to tick data for the list of instrument ScripCodes.
         The callback is a function that receives tick data as a parameter.
         """
         self.client.subscribe_ticks(instruments, callback)
+        self._subscribed.update(instruments)
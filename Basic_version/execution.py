@@ -1,12 +1,82 @@
 # execution.py
+import bisect
+import random
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 import config
+from broker_session import RateLimitTimeout
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram (log-spaced bucket edges in milliseconds).
+    Percentiles are reported as the upper edge of the bucket they fall in.
+    """
+    BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS_MS) + 1)
+        self.count = 0
+        self.max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        ms = seconds * 1000.0
+        with self._lock:
+            self.counts[bisect.bisect_left(self.BUCKETS_MS, ms)] += 1
+            self.count += 1
+            self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, pct):
+        if self.count == 0:
+            return None
+        rank = pct / 100.0 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return min(self.BUCKETS_MS[i], self.max_ms) if i < len(self.BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "p50_ms": self.percentile(50),
+            "p99_ms": self.percentile(99),
+            "max_ms": self.max_ms,
+        }
+
+LEGS = ("long_call", "long_put", "short_call", "short_put")
+
+class LegFailure(Exception):
+    """
+    Raised when a multi-leg order could not be completed.
+    filled maps leg name -> order ID for legs that went through before the failure.
+    stuck lists legs that may still be open at the broker: entry legs that could not
+    be reversed, and legs whose request outcome is unknown (see _submit_legs).
+    """
+    def __init__(self, message, filled, stuck=()):
+        super().__init__(message)
+        self.filled = filled
+        self.stuck = list(stuck)
+
+class LegCancelled(Exception):
+    """
+    Raised by a leg worker that was cancelled at its deadline before (re)submitting.
+    """
 
 class OrderExecutor:
     def __init__(self, client, trading_config, logger):
         self.client = client  # Instance of FivePaisaClient from data_fetcher
         self.trading_config = trading_config
         self.logger = logger
+        # Concurrent leg submission: each leg retries with jittered backoff until its deadline.
+        self.concurrent_legs = trading_config.get("concurrent_legs", True)
+        self.leg_deadline = trading_config.get("leg_deadline", 5.0)
+        self.retry_backoff = trading_config.get("retry_backoff", 0.2)
+        self.leg_settle_timeout = trading_config.get("leg_settle_timeout", 30.0)
+        self.leg_latency = {}
+        self._pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="order-leg")
 
     def place_order(self, order_details, retry=0):
         """
@@ -34,6 +104,130 @@ class OrderExecutor:
             else:
                 raise e
 
+    def _order_details(self, trade_setup, leg, side):
+        return {
+            "ScripCode": trade_setup[leg]['ScripCode'],
+            "OrderType": side,
+            "PriceType": "MKT",
+            "Qty": self.trading_config["lot_size"] * self.trading_config["num_lots"],
+            "ProductType": "CNC",
+            "Exchange": "N"
+        }
+
+    def _timed_place_order(self, leg, order_details):
+        started = time.monotonic()
+        try:
+            return self.place_order(order_details)
+        finally:
+            self.leg_latency.setdefault(leg, LatencyHistogram()).record(time.monotonic() - started)
+
+    def _place_leg(self, leg, order_details, deadline, cancel):
+        """
+        Submits one leg from a worker thread. Retries up to max_retries with jittered
+        exponential backoff, never sleeping past the leg's deadline. Once cancel is set
+        no further attempt is made, and a leg whose order could not get a rate-limit
+        token before the deadline fails at once.
+        Returns the order ID or raises the last error.
+        """
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            if cancel.is_set():
+                raise LegCancelled(f"{leg} cancelled at its deadline before submission")
+            try:
+                response = self.client.place_order(order_details, deadline=deadline)
+                if response.get("status") == "success":
+                    order_id = response.get("order_id")
+                    self.logger.log_event("ORDER_PLACED", f"{leg} {order_details}", order_id=order_id)
+                    return order_id
+                self.logger.log_event("ORDER_FAILED", f"{leg} {order_details} Error: {response}", order_id="")
+                error = Exception(f"Order failed after retries: {order_details}")
+            except RateLimitTimeout as e:
+                # Not submitted, and no token is due before the deadline: fail the leg now
+                self.logger.log_event("ORDER_EXCEPTION", f"{leg} {order_details} Exception: {str(e)}", order_id="")
+                raise
+            except Exception as e:
+                self.logger.log_event("ORDER_EXCEPTION", f"{leg} {order_details} Exception: {str(e)}", order_id="")
+                error = e
+            finally:
+                self.leg_latency.setdefault(leg, LatencyHistogram()).record(time.monotonic() - started)
+            remaining = deadline - time.monotonic()
+            if attempt >= self.trading_config["max_retries"] or remaining <= 0:
+                raise error
+            delay = self.retry_backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+            time.sleep(min(delay, remaining))
+            attempt += 1
+            started = time.monotonic()
+
+    def _submit_legs(self, trade_setup, legs, side):
+        """
+        Submits the given legs concurrently and waits for all of them.
+        A leg still running after its deadline (plus a 1s grace period) is cancelled so it
+        makes no further attempts, and the outcome of the request it has in flight is
+        awaited for up to leg_settle_timeout seconds: a late fill still counts as filled.
+        Returns (filled, failed, unknown) dicts: leg -> order ID, leg -> exception, and
+        leg -> future for legs whose request had not returned even then (a fill arriving
+        later is logged as ORDER_LATE_FILL).
+        """
+        deadline = time.monotonic() + self.leg_deadline
+        cancels = {leg: threading.Event() for leg in legs}
+        futures = {
+            leg: self._pool.submit(self._place_leg, leg, self._order_details(trade_setup, leg, side), deadline, cancels[leg])
+            for leg in legs
+        }
+        filled, failed, unknown = {}, {}, {}
+        for leg, future in futures.items():
+            try:
+                filled[leg] = future.result(timeout=max(0.0, deadline - time.monotonic()) + 1.0)
+            except FutureTimeout:
+                cancels[leg].set()
+                self.logger.log_event("LEG_TIMEOUT", f"{leg} missed its deadline; waiting for the request in flight")
+                try:
+                    filled[leg] = future.result(timeout=self.leg_settle_timeout)
+                except FutureTimeout:
+                    unknown[leg] = future
+                    future.add_done_callback(lambda f, leg=leg: self._log_late_outcome(leg, f))
+                except Exception as e:
+                    failed[leg] = e
+            except Exception as e:
+                failed[leg] = e
+        return filled, failed, unknown
+
+    def _log_late_outcome(self, leg, future):
+        if future.exception() is None:
+            self.logger.log_event("ORDER_LATE_FILL", f"{leg} filled after its outcome was given up on; reconcile manually",
+                                  order_id=future.result())
+
+    def _rollback(self, trade_setup, filled, entry_sides):
+        """
+        Reverses legs that were filled before a failure, concurrently.
+        entry_sides maps leg -> the side it was opened with.
+        Returns the legs that may still be open: reversals that failed or whose
+        outcome is unknown.
+        """
+        reverse = {"Buy": "Sell", "Sell": "Buy"}
+        stuck = []
+        for side in ("Buy", "Sell"):
+            legs = [leg for leg in filled if reverse[entry_sides[leg]] == side]
+            if not legs:
+                continue
+            undone, failed, unknown = self._submit_legs(trade_setup, legs, side)
+            if undone:
+                self.logger.log_event("ROLLBACK", f"Reversed legs {list(undone)}: {undone}")
+            if failed:
+                self.logger.log_event("ROLLBACK_FAILED", f"Could not reverse legs {list(failed)}: {failed}")
+            if unknown:
+                self.logger.log_event("ROLLBACK_FAILED", f"Reversal outcome unknown for legs {list(unknown)}")
+            stuck.extend(failed)
+            stuck.extend(unknown)
+        return stuck
+
+    def get_leg_latency_report(self):
+        """
+        Returns per-leg latency summaries (count, p50, p99, max in milliseconds).
+        """
+        return {leg: hist.summary() for leg, hist in self.leg_latency.items()}
+
     def execute_iron_condor(self, trade_setup):
         """
         Places the four orders for the Iron Condor:
@@ -43,32 +237,23 @@ class OrderExecutor:
           4. Sell short put
         Returns a dict of order IDs.
         """
+        if self.concurrent_legs:
+            return self._execute_iron_condor_concurrent(trade_setup)
         order_ids = {}
+        try:
+            return self._execute_iron_condor_sequential(trade_setup, order_ids)
+        except Exception as e:
+            # The sequential path does not roll back: every filled leg stays open.
+            raise LegFailure(f"Iron Condor entry failed: {str(e)}", order_ids, stuck=list(order_ids)) from e
+
+    def _execute_iron_condor_sequential(self, trade_setup, order_ids):
         # Place hedge orders first (buy orders)
         for leg in ["long_call", "long_put"]:
-            order_details = {
-                "ScripCode": trade_setup[leg]['ScripCode'],
-                "OrderType": "Buy",
-                "PriceType": "MKT",
-                "Qty": self.trading_config["lot_size"] * self.trading_config["num_lots"],
-                "ProductType": "CNC",
-                "Exchange": "N"
-            }
-            order_id = self.place_order(order_details)
-            order_ids[leg] = order_id
+            order_ids[leg] = self._timed_place_order(leg, self._order_details(trade_setup, leg, "Buy"))
 
         # Then place short orders (sell orders)
         for leg in ["short_call", "short_put"]:
-            order_details = {
-                "ScripCode": trade_setup[leg]['ScripCode'],
-                "OrderType": "Sell",
-                "PriceType": "MKT",
-                "Qty": self.trading_config["lot_size"] * self.trading_config["num_lots"],
-                "ProductType": "CNC",
-                "Exchange": "N"
-            }
-            order_id = self.place_order(order_details)
-            order_ids[leg] = order_id
+            order_ids[leg] = self._timed_place_order(leg, self._order_details(trade_setup, leg, "Sell"))
 
         self.logger.log_event("ENTRY_DONE", f"Iron Condor placed with orders: {order_ids}")
         return order_ids
@@ -80,32 +265,62 @@ class OrderExecutor:
            - For long legs (buy), place sell orders.
         Returns a dict of order IDs.
         """
+        if self.concurrent_legs:
+            return self._exit_position_concurrent(trade_setup)
         order_ids = {}
-        # Close short positions first (buy to cover)
-        for leg in ["short_call", "short_put"]:
-            order_details = {
-                "ScripCode": trade_setup[leg]['ScripCode'],
-                "OrderType": "Buy",
-                "PriceType": "MKT",
-                "Qty": self.trading_config["lot_size"] * self.trading_config["num_lots"],
-                "ProductType": "CNC",
-                "Exchange": "N"
-            }
-            order_id = self.place_order(order_details)
-            order_ids[leg] = order_id
+        try:
+            return self._exit_position_sequential(trade_setup, order_ids)
+        except Exception as e:
+            raise LegFailure(f"Iron Condor exit failed: {str(e)}", order_ids) from e
+
+    def _exit_position_sequential(self, trade_setup, order_ids):
+        # Close short positions first (buy to cover); legs already closed are absent
+        for leg in [leg for leg in ["short_call", "short_put"] if leg in trade_setup]:
+            order_ids[leg] = self._timed_place_order(leg, self._order_details(trade_setup, leg, "Buy"))
 
         # Close long positions (sell to exit)
-        for leg in ["long_call", "long_put"]:
-            order_details = {
-                "ScripCode": trade_setup[leg]['ScripCode'],
-                "OrderType": "Sell",
-                "PriceType": "MKT",
-                "Qty": self.trading_config["lot_size"] * self.trading_config["num_lots"],
-                "ProductType": "CNC",
-                "Exchange": "N"
-            }
-            order_id = self.place_order(order_details)
-            order_ids[leg] = order_id
+        for leg in [leg for leg in ["long_call", "long_put"] if leg in trade_setup]:
+            order_ids[leg] = self._timed_place_order(leg, self._order_details(trade_setup, leg, "Sell"))
+
+        self.logger.log_event("EXIT_DONE", f"Exited Iron Condor with orders: {order_ids}")
+        return order_ids
 
+    def _execute_iron_condor_concurrent(self, trade_setup):
+        """
+        Concurrent entry: both hedges are bought in parallel, then both shorts are sold
+        in parallel, so the book is never short without its wings. If any leg fails,
+        every filled leg is reversed and LegFailure is raised.
+        """
+        sides = {"long_call": "Buy", "long_put": "Buy", "short_call": "Sell", "short_put": "Sell"}
+        order_ids = {}
+        for legs, side in ((["long_call", "long_put"], "Buy"), (["short_call", "short_put"], "Sell")):
+            filled, failed, unknown = self._submit_legs(trade_setup, legs, side)
+            order_ids.update(filled)
+            if failed or unknown:
+                self.logger.log_event("ENTRY_FAILED", f"Legs {list(failed)} failed: {failed}, outcome unknown for "
+                                                      f"{list(unknown)}; rolling back {list(order_ids)}")
+                stuck = self._rollback(trade_setup, order_ids, sides) + list(unknown)
+                raise LegFailure(f"Iron Condor entry failed on legs {list(failed) + list(unknown)}", order_ids, stuck)
+        self.logger.log_event("ENTRY_DONE", f"Iron Condor placed with orders: {order_ids}")
+        return order_ids
+
+    def _exit_position_concurrent(self, trade_setup):
+        """
+        Concurrent exit: both shorts are bought back in parallel, then both hedges are sold.
+        Only legs present in trade_setup are closed, so a retry after a partial exit
+        touches just the legs still open. If a short cannot be covered the hedges are
+        kept (re-hedged book) and LegFailure is raised with the legs closed so far.
+        """
+        order_ids = {}
+        for legs, side in ((["short_call", "short_put"], "Buy"), (["long_call", "long_put"], "Sell")):
+            legs = [leg for leg in legs if leg in trade_setup]
+            if not legs:
+                continue
+            filled, failed, unknown = self._submit_legs(trade_setup, legs, side)
+            order_ids.update(filled)
+            if failed or unknown:
+                self.logger.log_event("EXIT_FAILED", f"Legs {list(failed)} failed: {failed}, outcome unknown for "
+                                                     f"{list(unknown)}; closed so far: {order_ids}")
+                raise LegFailure(f"Iron Condor exit failed on legs {list(failed) + list(unknown)}", order_ids, list(unknown))
         self.logger.log_event("EXIT_DONE", f"Exited Iron Condor with orders: {order_ids}")
         return order_ids
@@ -0,0 +1,97 @@
+# fake_broker.py
+import collections
+import datetime
+import itertools
+import random
+import threading
+import time
+
+class FakeBrokerClient:
+    """
+    Local stand-in for FivePaisaClient used by benchmarks and offline runs.
+    Each place_order call sleeps for a random latency and fails with the given probability.
+    Market-data calls (quotes, batched market feed, expiries, option chain, history)
+    sleep for quote_latency and answer from option_chain (list of chain dicts).
+    calls counts every API call by method name; max_concurrency is the most calls
+    seen in progress at once.
+    """
+    def __init__(self, latency=(0.01, 0.05), failure_rate=0.0, seed=None,
+                 quote_latency=0.0, option_chain=None, underlying_price=48000.0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.quote_latency = quote_latency
+        self.option_chain = option_chain or []
+        self.underlying_price = underlying_price
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._order_ids = itertools.count(1)
+        self.orders = []
+        self.calls = collections.Counter()
+        self._active = 0
+        self.max_concurrency = 0
+
+    def _market_call(self, method):
+        with self._lock:
+            self.calls[method] += 1
+            self._active += 1
+            self.max_concurrency = max(self.max_concurrency, self._active)
+        time.sleep(self.quote_latency)
+        with self._lock:
+            self._active -= 1
+
+    def get_quote(self, exchange, symbol):
+        self._market_call("get_quote")
+        return {"Symbol": symbol, "LTP": self.underlying_price}
+
+    def fetch_market_feed_scrip(self, req_list):
+        self._market_call("fetch_market_feed_scrip")
+        by_code = {opt["ScripCode"]: opt for opt in self.option_chain}
+        data = []
+        for req in req_list:
+            opt = by_code.get(req["ScripCode"])
+            if opt is not None:
+                data.append({"Token": opt["ScripCode"], "LastRate": opt.get("LTP"), "TotalQty": opt.get("Volume")})
+        return {"Data": data}
+
+    def get_expiry(self, exchange, symbol):
+        self._market_call("get_expiry")
+        return [(datetime.date.today() + datetime.timedelta(days=7 * k)).strftime("%d-%b-%Y") for k in range(5)]
+
+    def get_option_chain(self, exchange, symbol, expiry):
+        self._market_call("get_option_chain")
+        return [dict(opt) for opt in self.option_chain]
+
+    def historical_data(self, exchange, exchange_type, scrip_code, timeframe, from_date, to_date):
+        self._market_call("historical_data")
+        return None
+
+    def subscribe_ticks(self, instruments, callback):
+        with self._lock:
+            self.calls["subscribe_ticks"] += 1
+
+    def positions(self):
+        """
+        Net quantity per ScripCode over the orders placed so far (Buy +Qty, Sell -Qty).
+        """
+        net = collections.Counter()
+        with self._lock:
+            self.calls["positions"] += 1
+            for order in self.orders:
+                net[order["ScripCode"]] += order["Qty"] if order["OrderType"] == "Buy" else -order["Qty"]
+        return [{"ScripCode": code, "NetQty": qty} for code, qty in net.items()]
+
+    def _draw(self):
+        with self._lock:
+            return self._rng.uniform(*self.latency), self._rng.random() < self.failure_rate
+
+    def place_order(self, order_details, deadline=None):
+        with self._lock:
+            self.calls["place_order"] += 1
+        delay, fail = self._draw()
+        time.sleep(delay)
+        if fail:
+            return {"status": "failure", "message": "Simulated rejection"}
+        with self._lock:
+            order_id = next(self._order_ids)
+            self.orders.append(dict(order_details, order_id=order_id))
+        return {"status": "success", "order_id": order_id}
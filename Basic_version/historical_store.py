@@ -0,0 +1,195 @@
+# historical_store.py
+import json
+import os
+import numpy as np
+import pandas as pd
+
+_OPS = {
+    "==": np.equal, "!=": np.not_equal,
+    "<": np.less, "<=": np.less_equal,
+    ">": np.greater, ">=": np.greater_equal,
+}
+
+def _concat(chunks, column):
+    # Joins one column across partitions; partitions without it contribute missing
+    # values (NaN, NaT for Datetime), so the result widens to float or object as needed.
+    present = [chunk for chunk in chunks if not isinstance(chunk, int)]
+    if len(present) == len(chunks):
+        return np.concatenate(chunks)
+    dtype = np.result_type(*present)
+    if column == "Datetime":
+        fill, dtype = np.iinfo(np.int64).min, np.int64
+    elif dtype.kind in "biuf":
+        fill, dtype = np.nan, np.result_type(dtype, np.float64)
+    else:
+        fill, dtype = np.nan, object
+    return np.concatenate([np.full(chunk, fill, dtype=dtype) if isinstance(chunk, int) else chunk.astype(dtype)
+                           for chunk in chunks])
+
+class HistoricalStore:
+    """
+    Partitioned, memory-mapped NumPy store for historical bars.
+    Layout: <root>/<scrip_code>/<timeframe>/<YYYY-MM-DD>/<column>.npy, one file per column,
+    plus schema.json (column order) and coverage.json per scrip/timeframe. coverage.json lists
+    every calendar day already downloaded, including days that returned no rows (e.g. holidays),
+    so only missing ranges are fetched.
+    Reads prune partitions by date, load only the requested columns, and apply row
+    filters on the memory-mapped arrays before anything is copied. Partitions written
+    with fewer columns than the schema read back with those columns missing (NaN).
+    """
+    def __init__(self, root):
+        self.root = root
+
+    def _series_dir(self, scrip_code, timeframe):
+        return os.path.join(self.root, str(scrip_code), timeframe)
+
+    def _coverage_path(self, scrip_code, timeframe):
+        return os.path.join(self._series_dir(scrip_code, timeframe), "coverage.json")
+
+    def _schema(self, scrip_code, timeframe):
+        path = os.path.join(self._series_dir(scrip_code, timeframe), "schema.json")
+        if not os.path.exists(path):
+            return []
+        with open(path) as f:
+            return json.load(f)
+
+    def covered_dates(self, scrip_code, timeframe):
+        path = self._coverage_path(scrip_code, timeframe)
+        if not os.path.exists(path):
+            return set()
+        with open(path) as f:
+            return set(json.load(f))
+
+    def _mark_covered(self, scrip_code, timeframe, dates):
+        covered = self.covered_dates(scrip_code, timeframe) | set(dates)
+        path = self._coverage_path(scrip_code, timeframe)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(sorted(covered), f)
+        os.replace(tmp, path)
+
+    def missing_ranges(self, scrip_code, timeframe, from_date, to_date):
+        """
+        Returns [(from_date, to_date), ...] 'YYYY-MM-DD' ranges not yet downloaded.
+        """
+        covered = self.covered_dates(scrip_code, timeframe)
+        days = pd.date_range(from_date, to_date, freq="D").strftime("%Y-%m-%d")
+        ranges = []
+        start = prev = None
+        for day in days:
+            if day in covered:
+                if start is not None:
+                    ranges.append((start, prev))
+                    start = None
+                continue
+            if start is None:
+                start = day
+            prev = day
+        if start is not None:
+            ranges.append((start, prev))
+        return ranges
+
+    def write_frame(self, scrip_code, timeframe, df, from_date=None, to_date=None):
+        """
+        Stores df (must have a Datetime column) split into daily partitions.
+        Every calendar day in [from_date, to_date] is marked as covered.
+        """
+        df = df.copy()
+        df["Datetime"] = pd.to_datetime(df["Datetime"])
+        df.sort_values("Datetime", inplace=True, kind="stable")
+        series_dir = self._series_dir(scrip_code, timeframe)
+        os.makedirs(series_dir, exist_ok=True)
+        schema = self._schema(scrip_code, timeframe)
+        schema += [c for c in df.columns if c not in schema]
+        with open(os.path.join(series_dir, "schema.json"), "w") as f:
+            json.dump(schema, f)
+        for day, part in df.groupby(df["Datetime"].dt.strftime("%Y-%m-%d"), sort=False):
+            part_dir = os.path.join(series_dir, day)
+            os.makedirs(part_dir, exist_ok=True)
+            for column in part.columns:
+                values = part[column]
+                if column == "Datetime":
+                    array = values.to_numpy(dtype="datetime64[ns]").view(np.int64)
+                elif pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+                    array = values.to_numpy()
+                else:
+                    array = values.astype(str).to_numpy(dtype=str)
+                np.save(os.path.join(part_dir, f"{column}.npy"), array)
+        if from_date is None:
+            from_date = df["Datetime"].min().strftime("%Y-%m-%d")
+            to_date = df["Datetime"].max().strftime("%Y-%m-%d")
+        days = pd.date_range(from_date, to_date, freq="D").strftime("%Y-%m-%d")
+        self._mark_covered(scrip_code, timeframe, days)
+
+    def import_csv(self, path, scrip_code, timeframe):
+        self.write_frame(scrip_code, timeframe, pd.read_csv(path))
+
+    def ensure(self, download, scrip_code, timeframe, from_date, to_date):
+        """
+        Downloads only the date ranges not yet in the store.
+        download(scrip_code, timeframe, from_date, to_date) must return a DataFrame.
+        Returns the ranges that were fetched.
+        """
+        ranges = self.missing_ranges(scrip_code, timeframe, from_date, to_date)
+        for start, end in ranges:
+            df = download(scrip_code, timeframe, start, end)
+            if df is None or len(df) == 0:
+                self._mark_covered(scrip_code, timeframe,
+                                   pd.date_range(start, end, freq="D").strftime("%Y-%m-%d"))
+                continue
+            self.write_frame(scrip_code, timeframe, df, start, end)
+        return ranges
+
+    def read(self, scrip_code, timeframe, from_date, to_date, columns=None, filters=None, as_frame=True):
+        """
+        Loads [from_date, to_date] for one scrip/timeframe.
+        columns: subset of columns to load (Datetime is always available for filtering).
+        filters: list of (column, op, value) with op in ==, !=, <, <=, >, >=, 'in'.
+        Columns a partition lacks are filled with NaN (NaT for Datetime) for its rows.
+        Returns a DataFrame, or a dict of arrays when as_frame is False.
+        """
+        series_dir = self._series_dir(scrip_code, timeframe)
+        if not os.path.isdir(series_dir):
+            return pd.DataFrame(columns=columns) if as_frame else {}
+        lo = str(pd.Timestamp(from_date).date())
+        hi = str(pd.Timestamp(to_date).date())
+        days = sorted(d for d in os.listdir(series_dir)
+                      if not d.endswith(".json") and lo <= d <= hi)
+        schema = self._schema(scrip_code, timeframe)
+        filters = filters or []
+        needed = set(columns or []) | {f[0] for f in filters}
+        parts = []
+        for day in days:
+            part_dir = os.path.join(series_dir, day)
+            available = [c for c in schema if os.path.exists(os.path.join(part_dir, f"{c}.npy"))]
+            if not available:
+                continue
+            load = available if columns is None else [c for c in available if c in needed]
+            arrays = {c: np.load(os.path.join(part_dir, f"{c}.npy"), mmap_mode="r") for c in load}
+            rows = len(np.load(os.path.join(part_dir, f"{available[0]}.npy"), mmap_mode="r"))
+            mask = None
+            for column, op, value in filters:
+                data = arrays.get(column)
+                if data is None:
+                    # Not in this partition: every value is missing, which only != matches
+                    cond = np.full(rows, op == "!=")
+                else:
+                    if column == "Datetime":
+                        value = pd.to_datetime(list(value)).asi8 if op == "in" else pd.Timestamp(value).value
+                    cond = np.isin(data, list(value)) if op == "in" else _OPS[op](data, value)
+                mask = cond if mask is None else mask & cond
+            if mask is None:
+                part = {c: np.asarray(arrays[c]) for c in load}
+            else:
+                rows = int(np.count_nonzero(mask))
+                part = {c: arrays[c][mask] for c in load}
+            parts.append((rows, part))
+        if not parts:
+            return pd.DataFrame(columns=columns) if as_frame else {}
+        # Columns of every partition, in schema (or requested) order
+        out_columns = [c for c in (schema if columns is None else columns) if any(c in part for _, part in parts)]
+        result = {c: _concat([part.get(c, rows) for rows, part in parts], c) for c in out_columns}
+        if "Datetime" in result:
+            result["Datetime"] = result["Datetime"].view("datetime64[ns]")
+        return pd.DataFrame(result) if as_frame else result
@@ -0,0 +1,76 @@
+# latency.py
+import time
+from array import array
+import numpy as np
+
+class LatencyRecorder:
+    """
+    Per-stage latency spans for the live hot path, in monotonic nanoseconds.
+    Each stage gets a preallocated ring buffer of the last `capacity` spans, so
+    recording never allocates; count and max cover the whole session.
+
+        start = recorder.mark()
+        ...stage...
+        recorder.record("select_strikes", start)
+
+    When disabled, mark() returns 0 and record() returns immediately, so the
+    instrumentation can stay in place at the cost of two method calls.
+    Not thread-safe: record from one thread (the runtime's event loop).
+    """
+    def __init__(self, stages=(), capacity=4096, enabled=True, clock=time.perf_counter_ns):
+        self.capacity = capacity
+        self.enabled = enabled
+        self.clock = clock
+        self._buffers = {}
+        self._counts = {}
+        self._max = {}
+        for stage in stages:
+            self._add_stage(stage)
+
+    def _add_stage(self, stage):
+        self._buffers[stage] = array("q", bytes(8 * self.capacity))
+        self._counts[stage] = 0
+        self._max[stage] = 0
+
+    def mark(self):
+        return self.clock() if self.enabled else 0
+
+    def record(self, stage, start_ns):
+        """
+        Records the span from start_ns (a mark()) to now. Ignored for start_ns == 0.
+        """
+        if not start_ns:
+            return
+        span = self.clock() - start_ns
+        if stage not in self._buffers:
+            self._add_stage(stage)
+        count = self._counts[stage]
+        self._buffers[stage][count % self.capacity] = span
+        self._counts[stage] = count + 1
+        if span > self._max[stage]:
+            self._max[stage] = span
+
+    def summary(self):
+        """
+        {stage: {"count", "p50_ms", "p99_ms", "max_ms"}} for every stage with spans.
+        Percentiles cover the spans still in the ring buffer, count and max the session.
+        """
+        report = {}
+        for stage, buffer in self._buffers.items():
+            count = self._counts[stage]
+            if not count:
+                continue
+            spans = np.frombuffer(buffer, dtype=np.int64)[:min(count, self.capacity)]
+            p50, p99 = np.percentile(spans, [50, 99]) / 1e6
+            report[stage] = {
+                "count": count,
+                "p50_ms": round(float(p50), 3),
+                "p99_ms": round(float(p99), 3),
+                "max_ms": round(self._max[stage] / 1e6, 3),
+            }
+        return report
+
+    def reset(self):
+        for stage in self._buffers:
+            self._counts[stage] = 0
+            self._max[stage] = 0
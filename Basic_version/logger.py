@@ -1,12 +1,51 @@
 # logger.py
+import atexit
+import collections
 import csv
 import os
+import threading
+import time
 from datetime import datetime
+from dashboard_state import DashboardStatePublisher
 
 class CSVLogger:
-    def __init__(self, log_file, dashboard_file):
+    """
+    Event log written by a background thread.
+    log_event only timestamps the event and hands it to a bounded queue; the writer
+    thread keeps the log file open, formats and writes rows in batches, and flushes
+    when batch_size rows are pending or flush_interval seconds have passed.
+    Only the event types in droppable (market-data noise, DATA_UPDATE by default) are
+    ever dropped. When the queue is full, overflow decides what happens:
+      - "drop_oldest": discard the oldest queued droppable event to make room (default)
+      - "drop_newest": discard the new event if it is droppable, else the oldest
+        queued droppable one
+      - "block": wait for the writer (the only policy that can stall every caller)
+    Under the drop policies, an order/audit event that finds no droppable event to
+    displace waits for the writer. Dropped events are counted in stats.
+    close() (registered with atexit until it runs) drains the queue and flushes every
+    accepted row; events logged after it are written to the file synchronously.
+    Dashboard updates go to the memory-mapped state file (state_file, see
+    dashboard_state.py) immediately; the dashboard CSV is rewritten by the writer
+    thread with the latest row only, via a temporary file and an atomic rename.
+    """
+    OVERFLOW_POLICIES = ("drop_oldest", "drop_newest", "block")
+
+    DROPPABLE_EVENTS = ("DATA_UPDATE",)
+
+    def __init__(self, log_file, dashboard_file, queue_size=10000, batch_size=256,
+                 flush_interval=1.0, overflow="drop_oldest", echo=True, state_file=None,
+                 droppable=DROPPABLE_EVENTS):
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise Exception(f"Unknown overflow policy: {overflow}")
         self.log_file = log_file
         self.dashboard_file = dashboard_file
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.echo = echo
+        self.queue_size = queue_size
+        self.droppable = frozenset(droppable)
+        self.stats = {"logged": 0, "written": 0, "dropped": 0, "batches": 0, "late": 0}
         # Create log file if it does not exist.
         if not os.path.exists(self.log_file):
             with open(self.log_file, mode='w', newline='') as f:
@@ -18,19 +57,146 @@ class CSVLogger:
                 writer = csv.writer(f)
                 writer.writerow(["Timestamp", "Status", "PnL", "TradeDetails"])
 
+        self.dashboard_state = DashboardStatePublisher(state_file) if state_file else None
+        self._dashboard_row = None
+        self._dashboard_lock = threading.Lock()
+
+        # Queued events; _cond guards them and _closed, and wakes the writer and any
+        # caller waiting for room
+        self._events = collections.deque()
+        self._cond = threading.Condition()
+        self._stats_lock = threading.Lock()
+        self._late_lock = threading.Lock()
+        self._closed = False
+        self._writer = threading.Thread(target=self._run, name="csv-logger", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
     def log_event(self, event_type, details, order_id=""):
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        row = [timestamp, event_type, details, order_id]
+        event = (datetime.now(), event_type, details, order_id)
+        with self._cond:
+            queued = self._enqueue(event)
+        if not queued and self._closed:
+            self._write_late(event)
+        with self._stats_lock:
+            self.stats["logged"] += 1
+
+    def _enqueue(self, event):
+        # Called with _cond held. Returns False when the event was dropped or the
+        # logger is closed.
+        while not self._closed:
+            if len(self._events) < self.queue_size:
+                self._events.append(event)
+                self._cond.notify_all()
+                return True
+            if self.overflow != "block":
+                droppable = event[1] in self.droppable
+                if droppable and self.overflow == "drop_newest":
+                    self._count_dropped()
+                    return False
+                victim = next((i for i, queued in enumerate(self._events) if queued[1] in self.droppable), None)
+                if victim is not None:
+                    del self._events[victim]
+                    self._count_dropped()
+                    continue
+                if droppable:
+                    self._count_dropped()
+                    return False
+            # Order/audit events are never dropped: wait for the writer to make room
+            self._cond.wait()
+        return False
+
+    def _count_dropped(self):
+        with self._stats_lock:
+            self.stats["dropped"] += 1
+
+    def _run(self):
         with open(self.log_file, mode='a', newline='') as f:
             writer = csv.writer(f)
-            writer.writerow(row)
-        print(f"[{timestamp}] {event_type}: {details} {order_id}")
+            pending = []
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                with self._cond:
+                    while not self._events and not self._closed:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                    pending.extend(self._events)
+                    self._events.clear()
+                    closed = self._closed
+                    self._cond.notify_all()
+                if closed:
+                    self._write(f, writer, pending)
+                    self._write_dashboard()
+                    return
+                if len(pending) >= self.batch_size or time.monotonic() >= deadline:
+                    self._write(f, writer, pending)
+                    self._write_dashboard()
+                    pending = []
+                    deadline = time.monotonic() + self.flush_interval
+
+    def _write(self, f, writer, events):
+        if not events:
+            return
+        rows = [[ts.strftime("%Y-%m-%d %H:%M:%S"), event_type, details, order_id]
+                for ts, event_type, details, order_id in events]
+        writer.writerows(rows)
+        f.flush()
+        if self.echo:
+            print("\n".join(f"[{row[0]}] {row[1]}: {row[2]} {row[3]}" for row in rows))
+        with self._stats_lock:
+            self.stats["written"] += len(rows)
+            self.stats["batches"] += 1
+
+    def close(self):
+        """
+        Stops queueing events, writes everything already queued and joins the writer.
+        """
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._writer.join()
+        # Let a closed logger be garbage collected before interpreter exit
+        atexit.unregister(self.close)
+
+    def _write_late(self, event):
+        # After close: wait for the writer to finish the queue, then append directly
+        self._writer.join()
+        with self._late_lock, open(self.log_file, mode='a', newline='') as f:
+            self._write(f, csv.writer(f), [event])
+        with self._stats_lock:
+            self.stats["late"] += 1
+
+    def update_dashboard(self, status, pnl, trade_details="", **state):
+        """
+        Publishes the dashboard state (extra fields such as position or greeks go to
+        the state file as well) and schedules the dashboard CSV rewrite.
+        """
+        if self.dashboard_state is not None:
+            self.dashboard_state.publish(status=status, pnl=pnl, details=trade_details, **state)
+        with self._dashboard_lock:
+            self._dashboard_row = [datetime.now(), status, pnl, trade_details]
+
+    def publish_state(self, **state):
+        """
+        Updates the state file only (e.g. live PnL on every tick); the CSV is untouched.
+        """
+        if self.dashboard_state is not None:
+            self.dashboard_state.publish(**state)
 
-    def update_dashboard(self, status, pnl, trade_details=""):
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        row = [timestamp, status, pnl, trade_details]
-        # Overwrite the dashboard file
-        with open(self.dashboard_file, mode='w', newline='') as f:
+    def _write_dashboard(self):
+        with self._dashboard_lock:
+            row, self._dashboard_row = self._dashboard_row, None
+        if row is None:
+            return
+        row[0] = row[0].strftime("%Y-%m-%d %H:%M:%S")
+        # Readers see either the previous file or the new one, never a partial write
+        tmp = self.dashboard_file + ".tmp"
+        with open(tmp, mode='w', newline='') as f:
             writer = csv.writer(f)
             writer.writerow(["Timestamp", "Status", "PnL", "TradeDetails"])
             writer.writerow(row)
+        os.replace(tmp, self.dashboard_file)
@@ -1,17 +1,26 @@
 # main.py
-import time
-import datetime
+import asyncio
 import config
 from data_fetcher import DataFetcher
 from strategy import Strategy
 from execution import OrderExecutor
 from risk_manager import RiskManager
 from logger import CSVLogger
+from async_runtime import AsyncTradingRuntime, FeedTickSource, LATENCY_STAGES
+from checkpoint import CheckpointStore
+from latency import LatencyRecorder
 
 def main():
     # Initialize the logger
-    logger = CSVLogger(config.LOG_FILE_PATH, config.DASHBOARD_CSV_PATH)
+    logger = CSVLogger(
+        config.LOG_FILE_PATH, config.DASHBOARD_CSV_PATH,
+        queue_size=config.LOG_QUEUE_SIZE, batch_size=config.LOG_BATCH_SIZE,
+        flush_interval=config.LOG_FLUSH_INTERVAL, overflow=config.LOG_OVERFLOW_POLICY,
+        state_file=config.DASHBOARD_STATE_PATH
+    )
     logger.log_event("SYSTEM_START", "Starting Iron Condor Trading Bot")
+    latency = LatencyRecorder(LATENCY_STAGES, capacity=config.LATENCY_BUFFER_SIZE,
+                              enabled=config.LATENCY_TRACKING)
 
     # Initialize data fetcher (which logs in via TOTP)
     data_fetcher = DataFetcher(config.API_CONFIG)
@@ -19,7 +28,9 @@ def main():
     # Fetch latest expiry and option chain
     expiry = data_fetcher.get_latest_monthly_expiry()
     logger.log_event("INFO", f"Latest expiry detected: {expiry}")
+    start = latency.mark()
     option_chain = data_fetcher.get_option_chain()
+    latency.record("fetch_option_chain", start)
     underlying_price = data_fetcher.get_underlying_price()
     logger.log_event("INFO", f"Underlying BankNifty price: {underlying_price}")
     
@@ -28,61 +39,27 @@ def main():
     order_executor = OrderExecutor(data_fetcher.client, config.TRADING_CONFIG, logger)
     risk_manager = RiskManager(config.TRADING_CONFIG, logger)
     
-    position_open = False
-    trade_setup = None
-    previous_straddle = None
-    entry_trade_straddle = None
-    
-    # Set trading end time (assumed to be today at specified time)
-    trading_end_time = datetime.datetime.strptime(config.TRADING_CONFIG["trading_end_time"], "%H:%M").time()
-    
-    while datetime.datetime.now().time() < trading_end_time:
-        try:
-            # Refresh underlying price and option chain
-            underlying_price = data_fetcher.get_underlying_price()
-            option_chain = data_fetcher.get_option_chain()
-            
-            # Determine trade setup (selected strikes) using strategy logic.
-            trade_setup = strategy.select_strikes(option_chain, underlying_price, 
-                                                  datetime.datetime.combine(datetime.date.today(), trading_end_time))
-            
-            # Get live quotes for the ATM call and put.
-            quote_call = data_fetcher.client.get_quote_by_scrip(trade_setup["atm_call"]['ScripCode'])
-            quote_put  = data_fetcher.client.get_quote_by_scrip(trade_setup["atm_put"]['ScripCode'])
-            atm_call_price = float(quote_call.get("LTP", 0))
-            atm_put_price = float(quote_put.get("LTP", 0))
-            atm_call_volume = float(quote_call.get("Volume", 100))
-            atm_put_volume = float(quote_put.get("Volume", 100))
-            
-            # Update AVWAP values.
-            avwap_straddle, avwap_call, avwap_put = strategy.update_vwap(atm_call_price, atm_call_volume, atm_put_price, atm_put_volume)
-            current_straddle = atm_call_price + atm_put_price
-            logger.log_event("DATA_UPDATE", f"Straddle: {current_straddle}, AVWAP: {avwap_straddle}")
-            
-            if not position_open:
-                if strategy.check_entry_condition(atm_call_price, atm_put_price, avwap_straddle, avwap_call, avwap_put, previous_straddle):
-                    logger.log_event("ENTRY_SIGNAL", f"Entry conditions met. Straddle: {current_straddle} < AVWAP: {avwap_straddle}")
-                    order_ids = order_executor.execute_iron_condor(trade_setup)
-                    position_open = True
-                    entry_trade_straddle = current_straddle
-                    logger.update_dashboard("Position Open", 0, f"Entry at straddle {current_straddle}")
-            else:
-                # Simple PnL calculation: (entry_straddle - current_straddle)*lot_size*num_lots
-                current_pnl = (entry_trade_straddle - current_straddle) * config.TRADING_CONFIG["lot_size"] * config.TRADING_CONFIG["num_lots"]
-                risk_trigger = risk_manager.check_risk()
-                exit_signal = risk_manager.should_exit_based_on_avwap(current_straddle, avwap_straddle, previous_straddle)
-                if risk_trigger or exit_signal:
-                    reason = risk_trigger if risk_trigger else "AVWAP breakout"
-                    logger.log_event("EXIT_SIGNAL", f"Exiting due to {reason}; current_pnl: {current_pnl}")
-                    order_ids = order_executor.exit_position(trade_setup)
-                    logger.update_dashboard("Position Closed", current_pnl, f"Exited with orders: {order_ids}")
-                    position_open = False
-            previous_straddle = current_straddle
-        except Exception as e:
-            logger.log_event("ERROR", f"Exception in main loop: {str(e)}")
-        time.sleep(config.TRADING_CONFIG["data_update_interval"])
+    # Event-driven session: ticks from the feed patch the cached chain and wake the
+    # strategy; risk and execution run as separate tasks until trading_end_time.
+    # State restored from the last checkpoint and journal survives a crash mid-session.
+    # Greeks are priced to the contract expiry: data_fetcher.latest_expiry at the exchange close.
+    runtime = AsyncTradingRuntime(
+        data_fetcher, FeedTickSource(data_fetcher), strategy, risk_manager,
+        order_executor, logger, config.TRADING_CONFIG,
+        checkpoints=CheckpointStore(config.CHECKPOINT_DIR),
+        checkpoint_interval=config.CHECKPOINT_INTERVAL,
+        latency=latency
+    )
+    stats = asyncio.run(runtime.run())
     
+    logger.log_event("INFO", f"Runtime stats: {stats}")
+    logger.log_event("INFO", f"Option chain cache stats: {data_fetcher.get_chain_stats()}")
+    logger.log_event("INFO", f"Broker session stats: {data_fetcher.session.get_stats()}")
+    if latency.enabled:
+        for stage, summary in latency.summary().items():
+            logger.log_event("LATENCY", f"{stage}: {summary}")
     logger.log_event("SYSTEM_END", "Trading session ended. Exiting.")
+    logger.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,143 @@
+# option_chain.py
+import time
+import numpy as np
+import black_scholes
+
+class OptionChainSide:
+    """
+    Zero-copy view of the call or put rows of an OptionChain.
+    Every attribute is a slice of the parent chain's arrays.
+    """
+    __slots__ = ("chain", "start", "stop", "strike", "ltp", "volume", "iv", "scrip_code")
+
+    def __init__(self, chain, start, stop):
+        self.chain = chain
+        self.start = start
+        self.stop = stop
+        self.strike = chain.strike[start:stop]
+        self.ltp = chain.ltp[start:stop]
+        self.volume = chain.volume[start:stop]
+        self.iv = chain.iv[start:stop]
+        self.scrip_code = chain.scrip_code[start:stop]
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def record(self, i):
+        """Returns the chain record for row i of this side."""
+        return self.chain.record(self.start + i)
+
+class OptionChain:
+    """
+    Columnar option chain built once per fetch.
+    Rows are ordered calls first, then puts, each sorted by strike, so the
+    call/put sides are contiguous views of the same arrays.
+    Arrays: strike, option_type, ltp, volume, iv (NaN when not supplied), scrip_code.
+    """
+    def __init__(self, records):
+        n = len(records)
+        strike = np.fromiter((opt['Strike'] for opt in records), dtype=np.float64, count=n)
+        option_type = np.array([opt['OptionType'] for opt in records], dtype='<U2')
+        type_key = np.where(option_type == 'CE', 0, np.where(option_type == 'PE', 1, 2))
+        order = np.lexsort((strike, type_key))
+
+        self.records = [records[i] for i in order]
+        self.strike = np.ascontiguousarray(strike[order])
+        self.option_type = np.ascontiguousarray(option_type[order])
+        self.ltp = np.fromiter((float(opt.get('LTP') or 0) for opt in self.records), dtype=np.float64, count=n)
+        self.volume = np.fromiter((float(opt.get('Volume') or 0) for opt in self.records), dtype=np.float64, count=n)
+        self.iv = np.fromiter((opt.get('ImpliedVol', np.nan) for opt in self.records), dtype=np.float64, count=n)
+        self.scrip_code = np.fromiter((opt.get('ScripCode', -1) for opt in self.records), dtype=np.int64, count=n)
+        self.is_call = self.option_type == 'CE'
+        self.is_put = self.option_type == 'PE'
+
+        n_calls = int(np.count_nonzero(self.is_call))
+        n_puts = int(np.count_nonzero(self.is_put))
+        self.calls = OptionChainSide(self, 0, n_calls)
+        self.puts = OptionChainSide(self, n_calls, n_calls + n_puts)
+
+        # strike -> row index, one map per side
+        self.call_index = {k: i for i, k in enumerate(self.calls.strike.tolist())}
+        self.put_index = {k: n_calls + i for i, k in enumerate(self.puts.strike.tolist())}
+        self.scrip_index = {k: i for i, k in enumerate(self.scrip_code.tolist())}
+        self.strikes = np.unique(self.strike)
+        self.iv_stats = {}
+
+    @classmethod
+    def from_records(cls, option_chain):
+        """
+        Returns option_chain unchanged if it is already an OptionChain,
+        otherwise builds one from a list of dictionaries.
+        """
+        if isinstance(option_chain, cls):
+            return option_chain
+        return cls(list(option_chain))
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __getitem__(self, row):
+        return self.records[row]
+
+    def record(self, row):
+        return self.records[row]
+
+    def row(self, strike, option_type):
+        """
+        Row index of the given strike and option type ('CE'/'PE'), or None.
+        """
+        index = self.call_index if option_type == 'CE' else self.put_index
+        return index.get(float(strike))
+
+    def update(self, scrip_code, ltp=None, volume=None):
+        """
+        Patches one row in place from a tick. The arrays and the record dict are
+        updated together so consumers holding either see the same quote.
+        Returns False if the scrip code is not part of this chain.
+        """
+        row = self.scrip_index.get(scrip_code)
+        if row is None:
+            return False
+        record = self.records[row]
+        if ltp is not None:
+            self.ltp[row] = ltp
+            record['LTP'] = ltp
+        if volume is not None:
+            self.volume[row] = volume
+            record['Volume'] = volume
+        return True
+
+    def nearest_strike(self, price):
+        """
+        Listed strike closest to price; ties resolve to the lower strike.
+        """
+        if self.strikes.size == 0:
+            return None
+        idx = int(np.searchsorted(self.strikes, price))
+        if idx == self.strikes.size or (idx > 0 and
+                abs(self.strikes[idx - 1] - price) <= abs(self.strikes[idx] - price)):
+            idx -= 1
+        return self.strikes[idx]
+
+    def solve_iv(self, underlying_price, T, r=0.03):
+        """
+        Inverts every quoted row (LTP > 0) to an implied volatility, writing the iv
+        array in place; unquoted or unsolvable rows become NaN. The solve warm-starts
+        from the IVs already held, so on the cached, tick-patched chain each call
+        starts from the previous tick's surface. Record dicts are not touched.
+        Convergence stats and the solve time are kept in iv_stats.
+        """
+        started = time.perf_counter()
+        stats = {}
+        quoted = np.flatnonzero(self.ltp > 0)
+        solved = black_scholes.implied_volatility(
+            self.ltp[quoted], self.is_call[quoted], underlying_price, self.strike[quoted], T, r,
+            initial=self.iv[quoted], stats=stats)
+        self.iv[:] = np.nan
+        self.iv[quoted] = solved
+        stats["seconds"] = time.perf_counter() - started
+        self.iv_stats = stats
+        return self.iv
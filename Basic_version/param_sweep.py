@@ -0,0 +1,159 @@
+# param_sweep.py
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import os
+import random
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+import config
+from backtest_engine import BacktestBars, run_bars
+
+# Default grid for the TRADING_CONFIG keys the sweep tunes. Only keys the ATM-straddle
+# backtest uses belong here (it does not price the wings, so not short_delta/long_delta).
+DEFAULT_GRID = {
+    "stop_loss_pct": [2, 3, 5, 8],
+    "target_pct": [2, 3, 5, 8],
+    "avwap_anchor_time": ["09:15", "09:30", "10:00"],
+}
+
+RESULT_COLUMNS = ["variant_id", "pnl", "max_drawdown", "trades", "params"]
+
+_BAR_FIELDS = ("call_ltp", "call_volume", "put_ltp", "put_volume")
+
+def share_bars(bars, directory):
+    """
+    Writes the bar arrays as .npy files so worker processes can memory-map them
+    instead of each re-parsing the CSV or receiving a pickled copy.
+    """
+    os.makedirs(directory, exist_ok=True)
+    np.save(os.path.join(directory, "datetime.npy"), bars.datetime.asi8)
+    for field in _BAR_FIELDS:
+        np.save(os.path.join(directory, f"{field}.npy"), getattr(bars, field))
+    return directory
+
+def load_shared_bars(directory):
+    arrays = {field: np.load(os.path.join(directory, f"{field}.npy"), mmap_mode="r") for field in _BAR_FIELDS}
+    stamps = np.load(os.path.join(directory, "datetime.npy"), mmap_mode="r")
+    return BacktestBars(pd.DatetimeIndex(stamps.view("M8[ns]")), **arrays)
+
+_worker_bars = None
+
+def _init_worker(directory):
+    global _worker_bars
+    _worker_bars = load_shared_bars(directory)
+
+def evaluate(params):
+    """
+    Backtests one TRADING_CONFIG variant on the worker's shared bars.
+    Returns total PnL and max drawdown in INR (per-unit PnL x lot_size x num_lots) and the trade count.
+    """
+    trading_config = dict(config.TRADING_CONFIG, **params)
+    trade_logs, _ = run_bars(_worker_bars, trading_config)
+    lots = trading_config["lot_size"] * trading_config["num_lots"]
+    pnls = np.array([log["Details"]["pnl"] for log in trade_logs if log["Event"] == "EXIT"]) * lots
+    equity = np.concatenate(([0.0], np.cumsum(pnls)))
+    return {
+        "pnl": float(equity[-1]),
+        "max_drawdown": float(np.max(np.maximum.accumulate(equity) - equity)),
+        "trades": int(pnls.size),
+    }
+
+def variant_id(params):
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:16]
+
+def grid_variants(grid):
+    keys = sorted(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+def random_variants(space, n, seed=0):
+    """
+    Draws n variants: (low, high) tuples are sampled uniformly, lists by choice.
+    """
+    rng = random.Random(seed)
+    variants = []
+    for _ in range(n):
+        params = {}
+        for key, values in sorted(space.items()):
+            if isinstance(values, tuple):
+                params[key] = round(rng.uniform(*values), 4)
+            else:
+                params[key] = rng.choice(values)
+        variants.append(params)
+    return variants
+
+def _completed_ids(results_path):
+    if not os.path.exists(results_path):
+        return set()
+    with open(results_path, newline='') as f:
+        return {row["variant_id"] for row in csv.DictReader(f)}
+
+def _evaluate_pending(pending, shared_dir, results_path, workers):
+    new_file = not os.path.exists(results_path)
+    with open(results_path, "a", newline='') as f, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(shared_dir,)) as pool:
+        writer = csv.writer(f)
+        if new_file:
+            writer.writerow(RESULT_COLUMNS)
+        futures = {pool.submit(evaluate, params): vid for vid, params in pending.items()}
+        for future in as_completed(futures):
+            vid = futures[future]
+            result = future.result()
+            writer.writerow([vid, result["pnl"], result["max_drawdown"], result["trades"],
+                             json.dumps(pending[vid], sort_keys=True)])
+            f.flush()
+
+def run_sweep(historical_file, variants, results_path, workers=None, work_dir=None):
+    """
+    Evaluates every variant in parallel and appends one row per result to results_path
+    as it completes. Variants already present in results_path are skipped, so an
+    interrupted sweep resumes where it stopped. Writes <results>_ranked.csv sorted by
+    PnL and returns the ranked DataFrame.
+    """
+    done = _completed_ids(results_path)
+    pending = {}
+    for params in variants:
+        vid = variant_id(params)
+        if vid not in done:
+            pending[vid] = params
+
+    if pending:
+        bars = BacktestBars.from_csv(historical_file)
+        if work_dir is not None:
+            _evaluate_pending(pending, share_bars(bars, work_dir), results_path, workers)
+        else:
+            with tempfile.TemporaryDirectory(prefix="sweep_") as tmp:
+                _evaluate_pending(pending, share_bars(bars, tmp), results_path, workers)
+
+    ranked = pd.read_csv(results_path).sort_values(["pnl", "max_drawdown"], ascending=[False, True])
+    ranked.to_csv(os.path.splitext(results_path)[0] + "_ranked.csv", index=False)
+    return ranked
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parameter sweep over TRADING_CONFIG variants")
+    parser.add_argument("--data", required=True,
+                        help="Option data CSV, one row per option per timestamp with columns "
+                             f"{', '.join(BacktestBars.REQUIRED_COLUMNS)}")
+    parser.add_argument("--out", default="sweep_results.csv")
+    parser.add_argument("--grid", help="JSON file mapping parameter -> list of values (default: DEFAULT_GRID)")
+    parser.add_argument("--random", type=int, default=0, help="Random search with N samples instead of a grid")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    grid = DEFAULT_GRID
+    if args.grid:
+        with open(args.grid) as f:
+            grid = json.load(f)
+    if args.random:
+        space = {k: (min(v), max(v)) if all(isinstance(x, (int, float)) for x in v) and len(set(v)) > 1 else v
+                 for k, v in grid.items()}
+        variants = random_variants(space, args.random, args.seed)
+    else:
+        variants = grid_variants(grid)
+    ranked = run_sweep(args.data, variants, args.out, workers=args.workers)
+    print(ranked.head(20).to_string(index=False))
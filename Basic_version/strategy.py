@@ -1,27 +1,9 @@
 # strategy.py
 import datetime
 import numpy as np
-from scipy.stats import norm
-
-class AVWAPCalculator:
-    """
-    Calculates Anchored Volume-Weighted Average Price (AVWAP)
-    from an anchor time using tick (price, volume) data.
-    """
-    def __init__(self, anchor_time):
-        self.anchor_time = anchor_time  # e.g., "09:15"
-        self.cumulative_price_volume = 0.0
-        self.cumulative_volume = 0.0
-
-    def update(self, price, volume):
-        self.cumulative_price_volume += price * volume
-        self.cumulative_volume += volume
-        return self.get_avwap()
-
-    def get_avwap(self):
-        if self.cumulative_volume == 0:
-            return None
-        return self.cumulative_price_volume / self.cumulative_volume
+import black_scholes
+from avwap import AVWAPEngine
+from option_chain import OptionChain
 
 def calculate_delta(option_type, S, K, T, r, sigma):
     """
@@ -30,27 +12,61 @@ def calculate_delta(option_type, S, K, T, r, sigma):
     S: underlying price, K: strike, T: time to expiry in years, r: risk-free rate, sigma: volatility.
     Returns the absolute delta.
     """
-    d1 = (np.log(S / K) + (r + 0.5 * sigma ** 2) * T) / (sigma * np.sqrt(T))
-    if option_type.lower() in ['call', 'ce']:
-        delta = norm.cdf(d1)
-    else:
-        delta = norm.cdf(d1) - 1
-    return abs(delta)
+    return np.abs(black_scholes.delta(option_type, S, K, T, r, sigma))
+
+def _closest_delta(deltas, target):
+    """
+    Index of the first entry whose delta is closest to target, or None.
+    NaN deltas (e.g. S == K at expiry, or T < 0) are never selected.
+    """
+    diff = np.abs(deltas - target)
+    diff[np.isnan(diff)] = np.inf
+    if diff.size == 0:
+        return None
+    idx = int(np.argmin(diff))
+    if not np.isfinite(diff[idx]):
+        return None
+    return idx
 
 class Strategy:
+    # Engine keys of the series the entry/exit rules use
+    AVWAP_SERIES = ["straddle", "call", "put"]
+
     def __init__(self, trading_config):
         self.trading_config = trading_config
-        self.avwap_straddle = AVWAPCalculator(self.trading_config["avwap_anchor_time"])
-        self.avwap_call = AVWAPCalculator(self.trading_config["avwap_anchor_time"])
-        self.avwap_put = AVWAPCalculator(self.trading_config["avwap_anchor_time"])
-
-    def update_vwap(self, atm_call_price, atm_call_volume, atm_put_price, atm_put_volume):
-        combined_price = atm_call_price + atm_put_price
-        combined_volume = atm_call_volume + atm_put_volume
-        avwap_straddle_value = self.avwap_straddle.update(combined_price, combined_volume)
-        avwap_call_value = self.avwap_call.update(atm_call_price, atm_call_volume)
-        avwap_put_value = self.avwap_put.update(atm_put_price, atm_put_volume)
-        return avwap_straddle_value, avwap_call_value, avwap_put_value
+        # ATM straddle/call/put AVWAPs, reset daily at avwap_anchor_time
+        self.avwap = AVWAPEngine([self.trading_config["avwap_anchor_time"]], capacity=len(self.AVWAP_SERIES))
+        # Every option in the chain by ScripCode (update_chain_vwap)
+        self.chain_avwap = AVWAPEngine([self.trading_config["avwap_anchor_time"]])
+
+    def update_vwap(self, atm_call_price, atm_call_volume, atm_put_price, atm_put_volume, timestamp=None):
+        """
+        Updates the ATM straddle, call and put AVWAPs with one tick (at timestamp,
+        default now). The straddle is priced call + put and weighted by their combined
+        volume. Returns (straddle, call, put) AVWAPs; NaN before the anchor time.
+        """
+        prices = [atm_call_price + atm_put_price, atm_call_price, atm_put_price]
+        volumes = [atm_call_volume + atm_put_volume, atm_call_volume, atm_put_volume]
+        avwap_straddle, avwap_call, avwap_put = self.avwap.update(self.AVWAP_SERIES, prices, volumes, timestamp)
+        return avwap_straddle, avwap_call, avwap_put
+
+    def update_chain_vwap(self, option_chain, timestamp=None):
+        """
+        Folds a whole chain snapshot (or tick batch) into the per-ScripCode AVWAPs in one
+        vectorized update and returns them aligned with the chain's rows.
+        """
+        chain = OptionChain.from_records(option_chain)
+        return self.chain_avwap.update(chain.scrip_code, chain.ltp, chain.volume, timestamp)
+
+    def get_state(self):
+        return {"avwap": self.avwap.get_state(), "chain_avwap": self.chain_avwap.get_state()}
+
+    def set_state(self, state):
+        """
+        Restores get_state() output; AVWAPs taken with another anchor time are dropped.
+        """
+        self.avwap.set_state(state["avwap"])
+        self.chain_avwap.set_state(state["chain_avwap"])
 
     def check_entry_condition(self, atm_call_price, atm_put_price, avwap_straddle, avwap_call, avwap_put, prev_straddle=None):
         """
@@ -64,6 +80,15 @@ class Strategy:
         else:
             return False
 
+    def should_exit_based_on_avwap(self, current_straddle, avwap_straddle, previous_straddle=None):
+        """
+        Same AVWAP breakout rule as RiskManager.should_exit_based_on_avwap, without logging;
+        used by the backtester, which has no risk manager.
+        """
+        if previous_straddle is not None:
+            return previous_straddle < avwap_straddle and current_straddle >= avwap_straddle
+        return current_straddle >= avwap_straddle
+
     def select_strikes(self, option_chain, underlying_price, expiry_datetime, sigma=0.2, r=0.03):
         """
         Selects the following strikes:
@@ -72,69 +97,82 @@ class Strategy:
           - Long Call (approx. 2 delta) from call options with strike greater than short call.
           - Short Put (approx. 4 delta) from put options with strike < ATM strike.
           - Long Put (approx. 2 delta) from put options with strike less than short put.
-        Option chain is assumed to be a list of dictionaries with keys: 'Strike', 'OptionType', 'LTP', 'ScripCode', etc.
+        Option chain is an OptionChain or a list of dictionaries with keys: 'Strike', 'OptionType', 'LTP', 'ScripCode', etc.
+
+        Each row's delta uses its implied volatility, solved from LTP every call unless
+        trading_config["solve_iv"] is False; sigma is the fallback for rows with no IV, and
+        for the whole chain when the implied deltas leave a leg without a candidate.
+        Every delta is computed in a single batched call over the chain's strike array; the ATM
+        leg is found with searchsorted and the wing legs with argmin over the sorted call/put views.
         """
-        strikes = sorted(list(set([opt['Strike'] for opt in option_chain])))
-        atm_strike = min(strikes, key=lambda x: abs(x - underlying_price))
+        chain = OptionChain.from_records(option_chain)
+        atm_strike = chain.nearest_strike(underlying_price)
         # Get ATM call and put for reference:
-        calls_atm = [opt for opt in option_chain if opt['OptionType'] == 'CE' and opt['Strike'] == atm_strike]
-        puts_atm = [opt for opt in option_chain if opt['OptionType'] == 'PE' and opt['Strike'] == atm_strike]
-        if not calls_atm or not puts_atm:
+        atm_call_row = chain.row(atm_strike, 'CE') if atm_strike is not None else None
+        atm_put_row = chain.row(atm_strike, 'PE') if atm_strike is not None else None
+        if atm_call_row is None or atm_put_row is None:
             raise Exception("ATM options not found in option chain.")
-        atm_call = calls_atm[0]
-        atm_put = puts_atm[0]
         T = (expiry_datetime - datetime.datetime.now()).total_seconds() / (365 * 24 * 3600)
 
-        # Select short call (approx. 4 delta) from calls with strike > ATM
-        candidate_calls = [opt for opt in option_chain if opt['OptionType'] == 'CE' and opt['Strike'] > atm_strike]
-        selected_short_call = None
-        selected_long_call = None
-        min_diff = float("inf")
-        for opt in candidate_calls:
-            delta = calculate_delta("call", underlying_price, opt['Strike'], T, r, sigma)
-            if abs(delta - 0.04) < min_diff:
-                min_diff = abs(delta - 0.04)
-                selected_short_call = opt
-        if selected_short_call is None:
+        # Implied vols from the chain's own quotes; rows without one fall back to sigma.
+        if self.trading_config.get("solve_iv", True):
+            chain.solve_iv(underlying_price, T, r)
+            try:
+                legs = self._select_wings(chain, underlying_price, atm_strike, T, r,
+                                          np.where(np.isfinite(chain.iv), chain.iv, sigma))
+            except Exception:
+                # Noisy quotes can make implied deltas non-monotonic in strike, so the short
+                # leg lands on the last strike with no wing beyond it; use the flat sigma.
+                legs = self._select_wings(chain, underlying_price, atm_strike, T, r, sigma)
+        else:
+            legs = self._select_wings(chain, underlying_price, atm_strike, T, r, sigma)
+        short_call, long_call, short_put, long_put = legs
+        calls, puts = chain.calls, chain.puts
+        atm_call = chain.record(atm_call_row)
+        return {
+            "atm_strike": atm_call['Strike'],
+            "atm_call": atm_call,
+            "atm_put": chain.record(atm_put_row),
+            "short_call": calls.record(short_call),
+            "long_call": calls.record(long_call),
+            "short_put": puts.record(short_put),
+            "long_put": puts.record(long_put)
+        }
+
+    def _select_wings(self, chain, underlying_price, atm_strike, T, r, sigma):
+        """
+        Row indices (into chain.calls / chain.puts) of the short call, long call, short put
+        and long put for the given per-row (or scalar) volatilities.
+        """
+        short_target = self.trading_config.get("short_delta", 0.04)
+        long_target = self.trading_config.get("long_delta", 0.02)
+        # Absolute deltas for the whole chain: N(d1) for calls, 1 - N(d1) for puts.
+        n_d1 = calculate_delta("call", underlying_price, chain.strike, T, r, sigma)
+        calls, puts = chain.calls, chain.puts
+        call_deltas = n_d1[calls.start:calls.stop]
+        put_deltas = np.abs(n_d1[puts.start:puts.stop] - 1)
+
+        # Select short call (approx. 4 delta) from calls with strike > ATM,
+        # then long call (approx. 2 delta) from calls beyond the short call.
+        lo = int(np.searchsorted(calls.strike, atm_strike, side='right'))
+        short_call = _closest_delta(call_deltas[lo:], short_target)
+        if short_call is None:
             raise Exception("Appropriate short call not found.")
-        min_diff = float("inf")
-        for opt in candidate_calls:
-            if opt['Strike'] > selected_short_call['Strike']:
-                delta = calculate_delta("call", underlying_price, opt['Strike'], T, r, sigma)
-                if abs(delta - 0.02) < min_diff:
-                    min_diff = abs(delta - 0.02)
-                    selected_long_call = opt
-        if selected_long_call is None:
+        short_call += lo
+        lo = int(np.searchsorted(calls.strike, calls.strike[short_call], side='right'))
+        long_call = _closest_delta(call_deltas[lo:], long_target)
+        if long_call is None:
             raise Exception("Appropriate long call not found.")
+        long_call += lo
 
-        # Select short put (approx. 4 delta) from puts with strike < ATM
-        candidate_puts = [opt for opt in option_chain if opt['OptionType'] == 'PE' and opt['Strike'] < atm_strike]
-        selected_short_put = None
-        selected_long_put = None
-        min_diff = float("inf")
-        for opt in candidate_puts:
-            delta = calculate_delta("put", underlying_price, opt['Strike'], T, r, sigma)
-            if abs(delta - 0.04) < min_diff:
-                min_diff = abs(delta - 0.04)
-                selected_short_put = opt
-        if selected_short_put is None:
+        # Select short put (approx. 4 delta) from puts with strike < ATM,
+        # then long put (approx. 2 delta) from puts below the short put.
+        hi = int(np.searchsorted(puts.strike, atm_strike, side='left'))
+        short_put = _closest_delta(put_deltas[:hi], short_target)
+        if short_put is None:
             raise Exception("Appropriate short put not found.")
-        min_diff = float("inf")
-        for opt in candidate_puts:
-            if opt['Strike'] < selected_short_put['Strike']:
-                delta = calculate_delta("put", underlying_price, opt['Strike'], T, r, sigma)
-                if abs(delta - 0.02) < min_diff:
-                    min_diff = abs(delta - 0.02)
-                    selected_long_put = opt
-        if selected_long_put is None:
+        hi = int(np.searchsorted(puts.strike, puts.strike[short_put], side='left'))
+        long_put = _closest_delta(put_deltas[:hi], long_target)
+        if long_put is None:
             raise Exception("Appropriate long put not found.")
-
-        return {
-            "atm_strike": atm_strike,
-            "atm_call": atm_call,
-            "atm_put": atm_put,
-            "short_call": selected_short_call,
-            "long_call": selected_long_call,
-            "short_put": selected_short_put,
-            "long_put": selected_long_put
-        }
+        return short_call, long_call, short_put, long_put
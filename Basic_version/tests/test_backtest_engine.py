@@ -0,0 +1,48 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import config
+from backtest_engine import BacktestBars, run_bars
+from backtester import run_backtest_groupby
+
+def make_history(days=2, minutes=120, seed=3):
+    """
+    Long-format option history (one row per option per timestamp) with gaps and
+    duplicates: some timestamps lack the CE or the PE row, some carry a second CE/PE
+    row with another quote, and rows are shuffled within each day.
+    """
+    rng = np.random.default_rng(seed)
+    frames = []
+    for day in range(days):
+        stamps = pd.date_range(pd.Timestamp("2024-01-02 09:15") + pd.Timedelta(days=day), periods=minutes, freq="1min")
+        call = 150 * np.exp(np.cumsum(rng.normal(0, 0.01, minutes)))
+        put = 140 * np.exp(np.cumsum(rng.normal(0, 0.01, minutes)))
+        for option_type, ltp in (("CE", call), ("PE", put)):
+            frames.append(pd.DataFrame({"Datetime": stamps, "UnderlyingPrice": 48000.0, "OptionType": option_type,
+                                        "Strike": 48000.0, "LTP": ltp,
+                                        "Volume": rng.integers(1, 1000, minutes).astype(float)}))
+    df = pd.concat(frames, ignore_index=True)
+    missing = rng.choice(len(df), 15, replace=False)
+    duplicates = df.iloc[rng.choice(len(df), 15, replace=False)].assign(LTP=lambda d: d["LTP"] * 1.5)
+    df = pd.concat([df.drop(index=missing), duplicates], ignore_index=True)
+    return df.sample(frac=1.0, random_state=seed)
+
+def test_run_bars_matches_groupby_backtester(tmp_path):
+    df = make_history()
+    path = tmp_path / "history.csv"
+    df.to_csv(path, index=False)
+
+    reference = run_backtest_groupby(path)
+    bars = BacktestBars.from_csv(path)
+    trade_logs, stats = run_bars(bars, anchor_time=config.TRADING_CONFIG["avwap_anchor_time"])
+
+    # Timestamps lacking a side are skipped, duplicated ones counted once
+    sides = df.groupby("Datetime")["OptionType"].nunique()
+    assert stats["bars"] == (sides == 2).sum() < df["Datetime"].nunique()
+    assert len(reference) > 2
+    assert trade_logs == reference
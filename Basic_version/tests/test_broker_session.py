@@ -0,0 +1,108 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from broker_session import BrokerSession, RateLimitTimeout, TokenBucket
+from fake_broker import FakeBrokerClient
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        # Records the wait without advancing time, as callers queued at the same instant
+        self.sleeps.append(seconds)
+
+def make_bucket(rate, burst):
+    clock = FakeClock()
+    return TokenBucket(rate, burst, clock=clock, sleep=clock.sleep), clock
+
+def test_token_bucket_reserves_tokens_in_arrival_order():
+    bucket, clock = make_bucket(rate=10.0, burst=2)
+    waits = [bucket.acquire() for _ in range(5)]
+    # The burst is free; each later caller waits one more token interval than the one before
+    assert waits == pytest.approx([0.0, 0.0, 0.1, 0.2, 0.3])
+    assert clock.sleeps == pytest.approx([0.1, 0.2, 0.3])
+    clock.now = 0.4
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == pytest.approx(0.1)
+
+def test_token_bucket_timeout_takes_no_token():
+    bucket, clock = make_bucket(rate=10.0, burst=1)
+    bucket.acquire()
+    with pytest.raises(RateLimitTimeout):
+        bucket.acquire(timeout=0.05)
+    with pytest.raises(RateLimitTimeout):
+        bucket.acquire(timeout=0.0)
+    # The refused calls did not push the next token further out
+    assert bucket.acquire(timeout=0.1) == pytest.approx(0.1)
+    assert clock.sleeps == pytest.approx([0.1])
+
+def test_order_past_its_deadline_is_refused_without_a_request():
+    client = FakeBrokerClient(latency=(0.0, 0.0), seed=0)
+    session = BrokerSession(client, order_rate_limit=1.0, order_burst=1)
+    session.order_bucket, _ = make_bucket(rate=1.0, burst=1)
+    order = {"ScripCode": 1, "OrderType": "Buy", "Qty": 25}
+    assert session.place_order(order, deadline=time.monotonic() + 5)["status"] == "success"
+    with pytest.raises(RateLimitTimeout):
+        session.place_order(order, deadline=time.monotonic() + 0.5)
+    assert client.calls["place_order"] == 1
+    stats = session.get_stats()
+    assert (stats["requests"], stats["rate_limited"]) == (1, 1)
+
+class GatedBrokerClient(FakeBrokerClient):
+    # Holds get_quote open until the test has lined up every concurrent caller
+    def __init__(self):
+        super().__init__(seed=0)
+        self.entered = threading.Event()
+        self.gate = threading.Event()
+
+    def get_quote(self, exchange, symbol):
+        self.entered.set()
+        self.gate.wait(5)
+        return super().get_quote(exchange, symbol)
+
+def test_concurrent_identical_reads_are_coalesced():
+    client = GatedBrokerClient()
+    session = BrokerSession(client)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(session.get_quote("N", "NIFTY"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    assert client.entered.wait(5)
+    deadline = time.monotonic() + 5
+    while session.get_stats()["coalesced"] < 7 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    client.gate.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert client.calls["get_quote"] == 1
+    assert len(results) == 8 and all(result is results[0] for result in results)
+    assert session.get_stats()["coalesced"] == 7
+    # Once the request has completed, the next read goes to the broker again
+    session.get_quote("N", "NIFTY")
+    assert client.calls["get_quote"] == 2
+
+def test_get_quotes_batches_market_feed_requests():
+    chain = [{"ScripCode": 1000 + i, "LTP": float(i), "Volume": 10.0} for i in range(120)]
+    client = FakeBrokerClient(seed=0, option_chain=chain)
+    session = BrokerSession(client, quote_batch_size=50)
+    # Duplicates are fetched once; a code the broker does not know is left out
+    codes = [opt["ScripCode"] for opt in chain] + [1000, 1001, 99999]
+    quotes = session.get_quotes(codes)
+
+    assert client.calls["fetch_market_feed_scrip"] == 3
+    assert sorted(quotes) == [opt["ScripCode"] for opt in chain]
+    assert all(quotes[opt["ScripCode"]]["LastRate"] == opt["LTP"] for opt in chain)
+    stats = session.get_stats()
+    assert (stats["quote_batches"], stats["quotes"], stats["requests"]) == (3, 121, 3)
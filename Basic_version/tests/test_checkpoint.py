@@ -0,0 +1,62 @@
+import datetime
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import config
+from async_runtime import AsyncTradingRuntime, LocalMarket
+from checkpoint import CheckpointStore
+from option_chain import OptionChain
+from risk_manager import RiskManager
+from strategy import Strategy
+
+NOW = datetime.datetime(2024, 1, 2, 10, 0)
+
+class NullLogger:
+    def log_event(self, *args, **kwargs):
+        pass
+
+    def update_dashboard(self, *args, **kwargs):
+        pass
+
+def make_chain():
+    records = []
+    for i, strike in enumerate(range(46000, 50001, 500)):
+        for j, option_type in enumerate(('CE', 'PE')):
+            records.append({'Strike': float(strike), 'OptionType': option_type, 'LTP': 100.0 + i,
+                            'Volume': 10.0, 'ScripCode': 1000 + 2 * i + j})
+    return OptionChain.from_records(records)
+
+def make_runtime(chain):
+    logger = NullLogger()
+    return AsyncTradingRuntime(LocalMarket(chain, 48000.0, 999), [], Strategy(config.TRADING_CONFIG),
+                               RiskManager(config.TRADING_CONFIG, logger), None, logger,
+                               config.TRADING_CONFIG, now=lambda: NOW)
+
+def test_checkpoint_restores_positions_as_of_the_snapshot(tmp_path):
+    chain = make_chain()
+    runtime = make_runtime(chain)
+    legs = {'short_call': chain.row(49000, 'CE'), 'long_call': chain.row(50000, 'CE'),
+            'short_put': chain.row(47000, 'PE'), 'long_put': chain.row(46000, 'PE')}
+    runtime.trade_setup = {'atm_strike': 48000.0, **{leg: chain.record(row) for leg, row in legs.items()}}
+    runtime.position_state = "exiting"
+    runtime.entry_trade_straddle = 210.0
+    runtime.in_flight = ("exiting", runtime.trade_setup, 210.0)
+    expected = {leg: dict(record) for leg, record in runtime.trade_setup.items() if leg in legs}
+
+    store = CheckpointStore(str(tmp_path))
+    store.open()
+    # Hold the writer off until the chain has moved, as a tick racing the writer thread would
+    with store._cond:
+        store.checkpoint(runtime.snapshot_state())
+        for row in legs.values():
+            chain.update(chain.record(row)['ScripCode'], ltp=1.0, volume=99.0)
+    store.close()
+
+    restored = make_runtime(make_chain())
+    state, records = CheckpointStore(str(tmp_path)).restore()
+    assert restored.restore_state(state, records)
+    assert restored.position_state == "exiting"
+    assert {leg: restored.trade_setup[leg] for leg in legs} == expected
+    assert {leg: restored.in_flight[1][leg] for leg in legs} == expected
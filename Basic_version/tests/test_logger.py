@@ -0,0 +1,72 @@
+import csv
+import gc
+import os
+import sys
+import threading
+import weakref
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from logger import CSVLogger
+
+def make_logger(tmp_path, **kwargs):
+    return CSVLogger(str(tmp_path / "log.csv"), str(tmp_path / "dashboard.csv"), echo=False, **kwargs)
+
+def written_events(logger):
+    with open(logger.log_file, newline='') as f:
+        return [(row[1], row[2]) for row in list(csv.reader(f))[1:]]
+
+@pytest.mark.parametrize("overflow", ["drop_oldest", "drop_newest"])
+def test_only_market_data_is_dropped(tmp_path, overflow):
+    logger = make_logger(tmp_path, queue_size=3, batch_size=1, overflow=overflow)
+    # Stall the writer inside its first write so the queue fills up behind it
+    stalled, release = threading.Event(), threading.Event()
+    write = logger._write
+    def slow_write(f, writer, events):
+        stalled.set()
+        release.wait()
+        write(f, writer, events)
+    logger._write = slow_write
+    logger.log_event("ORDER_PLACED", "0")
+    assert stalled.wait(5)
+
+    for i in range(1, 4):
+        logger.log_event("DATA_UPDATE", f"d{i}")
+        logger.log_event("ORDER_PLACED", str(i))
+    # The queue is all orders now: market data is dropped, an order waits for room
+    logger.log_event("DATA_UPDATE", "d4")
+    blocked = threading.Thread(target=logger.log_event, args=("ORDER_PLACED", "4"))
+    blocked.start()
+    blocked.join(0.2)
+    assert blocked.is_alive()
+
+    release.set()
+    blocked.join(5)
+    logger.close()
+    events = written_events(logger)
+    assert [details for event, details in events if event == "ORDER_PLACED"] == ["0", "1", "2", "3", "4"]
+    assert logger.stats["dropped"] == 4 - sum(event == "DATA_UPDATE" for event, _ in events) > 0
+    assert logger.stats["logged"] == 9
+
+def test_close_drains_queue(tmp_path):
+    logger = make_logger(tmp_path, batch_size=10_000, flush_interval=60.0)
+    for i in range(500):
+        logger.log_event("DATA_UPDATE" if i % 2 else "ORDER_PLACED", str(i))
+    logger.close()
+    assert [details for _, details in written_events(logger)] == [str(i) for i in range(500)]
+
+    logger.log_event("ORDER_PLACED", "late")
+    assert written_events(logger)[-1] == ("ORDER_PLACED", "late")
+    assert logger.stats["late"] == 1
+    logger.close()
+
+def test_closed_logger_is_not_kept_alive_by_atexit(tmp_path):
+    logger = make_logger(tmp_path)
+    logger.log_event("ORDER_PLACED", "0")
+    logger.close()
+    ref = weakref.ref(logger)
+    del logger
+    gc.collect()
+    assert ref() is None